@@ -7,6 +7,7 @@ from setuptools import setup, find_packages
 from setuptools.command import build_py, sdist
 
 import json
+import pickle
 
 HERE = os.path.abspath(os.path.dirname(__file__))
 
@@ -20,6 +21,9 @@ SHARED_DATA_SUBDIRS = ['labware-json-schema',
                        'robot-data']
 # Where, relative to the package root, we put the files we copy
 DEST_BASE_PATH = 'shared_data'
+# A pickled index of the labware definitions, read by
+# opentrons.util.definition_cache instead of parsing each file separately
+DEFINITION_INDEX = 'definitions2.index.pickle'
 
 
 def get_shared_data_files():
@@ -73,6 +77,26 @@ class BuildWithSharedData(build_py.build_py):
                       destination, to_include))
         return files
 
+    def run(self):
+        super().run()
+        if not self.dry_run:
+            self.build_definition_index()
+
+    def build_definition_index(self):
+        index = {}
+        top = os.path.join(SHARED_DATA_PATH, 'definitions2')
+        for fname in sorted(os.listdir(top)):
+            if fname.endswith('.json'):
+                with open(os.path.join(top, fname),
+                          encoding='utf-8') as definition:
+                    index['definitions2/' + fname] = json.load(definition)
+        dest = os.path.join(
+            self.build_lib, 'opentrons', DEST_BASE_PATH, DEFINITION_INDEX)
+        self.announce('writing labware definition index to {}'.format(dest))
+        self.mkpath(os.path.dirname(dest))
+        with open(dest, 'wb') as index_file:
+            pickle.dump(index, index_file)
+
 
 def get_version():
     with open(os.path.join(HERE, 'src', 'opentrons', 'package.json')) as pkg:
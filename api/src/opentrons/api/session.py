@@ -1,18 +1,18 @@
 import ast
 import asyncio
 from copy import copy
-from functools import reduce
 import json
 import logging
 from time import time
 from uuid import uuid4
 
-from opentrons.broker import Broker
+from opentrons.broker import Broker, RELEASE_TOPIC
 from opentrons.legacy_api.containers import get_container, location_to_list
 from opentrons.legacy_api.containers.placeable import (
     Module as ModulePlaceable, Placeable)
-from opentrons.commands import tree, types as command_types
+from opentrons.commands import types as command_types
 from opentrons.commands.commands import is_new_loc, listify
+from opentrons.commands.run_log import RunLog, WINDOW_SIZE
 from opentrons.protocols import execute_protocol
 from opentrons.config import feature_flags as ff
 from opentrons.protocol_api import (ProtocolContext,
@@ -51,15 +51,19 @@ class SessionManager(object):
 
         self._session_lock = True
         try:
+            self._release()
             session_short_id = hex(uuid4().fields[0])
             session_logger = self._command_logger.getChild(session_short_id)
             self._broker.set_logger(session_logger)
+            previous = self.session
             self.session = Session.build_and_prep(
                 name=name,
                 text=text,
                 hardware=self._hardware,
                 loop=self._loop,
                 broker=self._broker)
+            if previous:
+                previous.close()
         finally:
             self._session_lock = False
 
@@ -72,9 +76,17 @@ class SessionManager(object):
 
         if self.session:
             self._hardware.reset()
+            self._release()
+            self.session.close()
         self.session = None
         self._broker.set_logger(self._command_logger)
 
+    def _release(self):
+        """ Announce that the current session, and everything in it, is no
+        longer needed by clients """
+        if self.session:
+            self._broker.publish(RELEASE_TOPIC, {'name': self.session.name})
+
     def get_session(self):
         return self.session
 
@@ -101,7 +113,8 @@ class Session(object):
         self._simulating_ctx = ProtocolContext(
             loop=self._loop, broker=self._broker)
         self.state = None
-        self.commands = []
+        self.command_count = 0
+        self._run_log = None
         self.command_log = {}
         self.errors = []
 
@@ -155,6 +168,30 @@ class Session(object):
             for module in self._modules
         ]
 
+    def get_commands(self, start=None, count=WINDOW_SIZE):
+        """ Get part of the flat list of simulated commands, without
+        building the whole list. Clients read the commands this way a window
+        at a time, up to :py:attr:`command_count`.
+
+        Each command is a dict with 'level', 'description' and 'id' keys, as
+        in the lists :py:func:`opentrons.commands.tree.from_list` takes.
+
+        :param start: The id of the first command to return. If not
+                      specified, the last `count` commands are returned.
+        :param count: The maximum number of commands to return
+        """
+        if self._run_log is None:
+            return []
+        if start is None:
+            start = max(len(self._run_log) - count, 0)
+        return self._run_log[start:start + count]
+
+    def close(self):
+        """ Close the run log of the simulated commands, deleting its file.
+        The commands in its window can still be read. """
+        if self._run_log is not None:
+            self._run_log.close()
+
     def clear_logs(self):
         self.command_log.clear()
         self.errors.clear()
@@ -162,65 +199,23 @@ class Session(object):
     def _simulate(self):
         self._reset()
 
-        stack = []
-        res = []
-        commands = []
+        # Commands are streamed to disk as they are simulated, and the
+        # labware each one uses is collected straight away, so that memory
+        # use does not grow with the length of the protocol
+        res = RunLog()
 
         self._containers.clear()
         self._instruments.clear()
         self._modules.clear()
         self._interactions.clear()
 
-        def on_command(message):
-            payload = message['payload']
-            description = payload.get('text', '').format(
-                **payload
-            )
-
-            if message['$'] == 'before':
-                level = len(stack)
-
-                stack.append(message)
-                commands.append(payload)
-
-                res.append(
-                    {
-                        'level': level,
-                        'description': description,
-                        'id': len(res)})
-            else:
-                stack.pop()
-
-        unsubscribe = self._broker.subscribe(command_types.COMMAND, on_command)
+        unsubscribe = self._broker.subscribe(
+            command_types.COMMAND, self._command_recorder(res))
 
         try:
             # ensure actual pipettes are cached before driver is disconnected
             if ff.use_protocol_api_v2():
-                self._hardware.cache_instruments()
-                instrs = {}
-                for mount, pip in self._hardware.attached_instruments.items():
-                    if pip:
-                        instrs[mount] = {'model': pip['name'],
-                                         'id': pip.get('pipette_id', '')}
-                sim = adapters.SynchronousAdapter.build(
-                    API.build_hardware_simulator,
-                    instrs,
-                    [mod.name()
-                     for mod in self._hardware.attached_modules.values()],
-                    strict_attached_instruments=False)
-                sim.home()
-                self._simulating_ctx = ProtocolContext(self._loop,
-                                                       sim,
-                                                       self._broker)
-                if self._is_json_protocol:
-                    run_protocol(protocol_json=self._protocol,
-                                 simulate=True,
-                                 context=self._simulating_ctx)
-                else:
-                    run_protocol(protocol_code=self._protocol,
-                                 simulate=True,
-                                 context=self._simulating_ctx)
-                sim.join()
+                self._simulate_v2()
             else:
                 self._hardware.broker = self._broker
                 self._hardware.cache_instrument_models()
@@ -229,6 +224,9 @@ class Session(object):
                     execute_protocol(self._protocol)
                 else:
                     exec(self._protocol, {})
+        except BaseException:
+            res.close()
+            raise
         finally:
             # physically attached pipettes are re-cached during robot.connect()
             # which is important, because during a simulation, the robot could
@@ -237,14 +235,6 @@ class Session(object):
                 self._hardware.connect()
             unsubscribe()
 
-            instruments, containers, modules, interactions = _accumulate(
-                [_get_labware(command) for command in commands])
-
-            self._containers.extend(_dedupe(containers))
-            self._instruments.extend(_dedupe(instruments))
-            self._modules.extend(_dedupe(modules))
-            self._interactions.extend(_dedupe(interactions))
-
             # Labware calibration happens after simulation and before run, so
             # we have to clear the tips if they are left on after simulation
             # to ensure that the instruments are in the expected state at the
@@ -254,6 +244,76 @@ class Session(object):
 
         return res
 
+    def _command_recorder(self, run_log):
+        """ Build a broker callback that appends each simulated command to
+        `run_log` and collects the labware it uses """
+        stack = []
+        seen = (set(), set(), set(), set())
+
+        def on_command(message):
+            payload = message['payload']
+            description = payload.get('text', '').format(
+                **payload
+            )
+
+            if message['$'] == 'before':
+                level = len(stack)
+
+                stack.append(message)
+                self._collect_labware(payload, seen)
+
+                run_log.append(
+                    {
+                        'level': level,
+                        'description': description,
+                        'id': len(run_log)})
+            else:
+                stack.pop()
+
+        return on_command
+
+    def _collect_labware(self, payload, seen):
+        """ Add the instruments, containers, modules and interactions used by
+        a command to the session's, skipping those in `seen` """
+        collected = (self._instruments, self._containers,
+                     self._modules, self._interactions)
+        for found, acc, items in zip(_get_labware(payload), seen, collected):
+            for item in found:
+                if item not in acc:
+                    acc.add(item)
+                    items.append(item)
+
+    def _simulate_v2(self):
+        """ Simulate the protocol with the protocol API, on a hardware
+        simulator with the same instruments and modules as the robot """
+        self._hardware.cache_instruments()
+        instrs = {}
+        for mount, pip in self._hardware.attached_instruments.items():
+            if pip:
+                instrs[mount] = {'model': pip['name'],
+                                 'id': pip.get('pipette_id', '')}
+        sim = adapters.InlineAdapter.build(
+            API.build_hardware_simulator,
+            instrs,
+            [mod.name()
+             for mod in self._hardware.attached_modules.values()],
+            strict_attached_instruments=False)
+        try:
+            sim.home()
+            self._simulating_ctx = ProtocolContext(self._loop,
+                                                   sim,
+                                                   self._broker)
+            if self._is_json_protocol:
+                run_protocol(protocol_json=self._protocol,
+                             simulate=True,
+                             context=self._simulating_ctx)
+            else:
+                run_protocol(protocol_code=self._protocol,
+                             simulate=True,
+                             context=self._simulating_ctx)
+        finally:
+            sim.join()
+
     def refresh(self):
         self._reset()
         self._is_json_protocol = self.name.endswith('.json')
@@ -275,7 +335,9 @@ class Session(object):
         finally:
             self._broker.set_logger(self._default_logger)
 
-        self.commands = tree.from_list(commands)
+        self.close()
+        self._run_log = commands
+        self.command_count = len(commands)
 
         self.containers = self.get_containers()
         self.instruments = self.get_instruments()
@@ -432,22 +494,6 @@ def extract_metadata(parsed):
     return metadata
 
 
-def _accumulate(iterable):
-    return reduce(
-        lambda x, y: tuple([x + y for x, y in zip(x, y)]),
-        iterable,
-        ([], [], [], []))
-
-
-def _dedupe(iterable):
-    acc = set()
-
-    for item in iterable:
-        if item not in acc:
-            acc.add(item)
-            yield item
-
-
 def now():
     return int(time() * 1000)
 
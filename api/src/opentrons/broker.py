@@ -6,6 +6,10 @@ from contextlib import contextmanager
 
 MODULE_LOG = logging.getLogger(__name__)
 
+# Published when objects handed out to clients, for instance a session and
+# everything in it, are no longer needed
+RELEASE_TOPIC = 'release'
+
 
 class Notifications(object):
     def __init__(self, topics, broker, loop=None):
@@ -51,6 +55,9 @@ class Broker:
 
         return unsubscribe
 
+    def has_subscribers(self, topic):
+        return bool(self.subscriptions.get(topic))
+
     def publish(self, topic, message):
         [handler(message) for handler in self.subscriptions.get(topic, [])]
 
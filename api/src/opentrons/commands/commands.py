@@ -3,7 +3,11 @@ from opentrons.broker import Broker
 
 import functools
 import inspect
-from typing import Union, Sequence, List, Any
+import logging
+from time import perf_counter
+from types import CodeType, FunctionType
+from typing import (Union, Sequence, List, Any, Callable, Dict, Optional,
+                    Tuple)
 
 from opentrons.legacy_api.containers import (Well as OldWell,
                                              Container as OldContainer,
@@ -11,6 +15,7 @@ from opentrons.legacy_api.containers import (Well as OldWell,
                                              location_to_list)
 from opentrons.protocol_api.labware import Well, Labware, ModuleGeometry
 from opentrons.types import Location
+from opentrons.util.profiler import profiler
 
 
 def is_new_loc(location: Union[Location, Well, None,
@@ -429,39 +434,110 @@ def resume():
     )
 
 
+class PublishStats:
+    """ Counters of the work done publishing commands, see
+    :py:data:`publish_stats` """
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        #: The number of messages built and published
+        self.published = 0
+        #: The number of messages not built because nothing was listening
+        self.skipped = 0
+        #: The seconds spent deciding whether to publish and building
+        #: messages, not including the time taken by subscribers
+        self.overhead = 0.0
+
+
+#: The publishing counters for this process
+publish_stats = PublishStats()
+
+
+class _PublishSpec:
+    """ How to build a command's payload from a call to the method that
+    publishes it. This is worked out once for each pair of command and
+    method rather than on every call """
+    __slots__ = ('args', 'command_args', 'command_defaults',
+                 'instrument_from_self')
+
+    def __init__(self, cmd, args):
+        command_spec = inspect.getfullargspec(cmd)
+        #: The names of the positional arguments of the method
+        self.args = args
+        self.command_args = tuple(command_spec.args)
+        self.command_defaults = dict(
+            zip(
+                reversed(command_spec.args),
+                reversed(command_spec.defaults or [])))
+        self.instrument_from_self = 'instrument' in command_spec.args
+
+
+_specs: Dict[Tuple[Callable, CodeType], _PublishSpec] = {}
+
+
+def _get_spec(cmd, f) -> Tuple[_PublishSpec, Optional[tuple]]:
+    """ Get the publish spec for a command and method, and the defaults of
+    the method's arguments """
+    func = getattr(f, '__func__', f)
+    if not isinstance(func, FunctionType):
+        argspec = inspect.getfullargspec(f)
+        return _PublishSpec(cmd, tuple(argspec.args)), argspec.defaults
+    # Key on the code rather than the function, so that functions defined
+    # inside the method publishing the command share a spec
+    code = func.__code__
+    try:
+        spec = _specs[(cmd, code)]
+    except KeyError:
+        spec = _PublishSpec(cmd, code.co_varnames[:code.co_argcount])
+        _specs[(cmd, code)] = spec
+    return spec, func.__defaults__
+
+
 def do_publish(broker, cmd, f, when, res, meta, *args, **kwargs):
-    """ Implement the publish so it can be called outside the decorator """
-    publish_command = functools.partial(
-        broker.publish,
-        topic=command_types.COMMAND)
-    call_args = _get_args(f, args, kwargs)
-    if when == 'before':
+    """ Implement the publish so it can be called outside the decorator
+
+    The message is only built if something is listening for it: nothing is
+    done unless the broker has subscribers for
+    :py:data:`command_types.COMMAND` or, for ``'before'`` messages, its
+    logger is enabled for info messages.
+    """
+    start = perf_counter()
+    subscribed = broker.has_subscribers(command_types.COMMAND)
+    log_call = when == 'before' and broker.logger.isEnabledFor(logging.INFO)
+    if not subscribed and not log_call:
+        publish_stats.skipped += 1
+        publish_stats.overhead += perf_counter() - start
+        return
+
+    spec, defaults = _get_spec(cmd, f)
+    call_args = _get_args(spec.args, defaults, args, kwargs)
+    if log_call:
         broker.logger.info("{}: {}".format(
             f.__qualname__,
             {k: v for k, v in call_args.items() if str(k) != 'self'}))
-    command_args = dict(
-        zip(
-            reversed(inspect.getfullargspec(cmd).args),
-            reversed(inspect.getfullargspec(cmd).defaults
-                     or [])))
+    if not subscribed:
+        publish_stats.skipped += 1
+        publish_stats.overhead += perf_counter() - start
+        return
 
     # TODO (artyom, 20170927): we are doing this to be able to use
     # the decorator in Instrument class methods, in which case
     # self is effectively an instrument.
     # To narrow the scope of this hack, we are checking if the
     # command is expecting instrument first.
-    if 'instrument' in inspect.getfullargspec(cmd).args:
+    if spec.instrument_from_self:
         # We are also checking if call arguments have 'self' and
         # don't have instruments specified, in which case
         # instruments should take precedence.
         if 'self' in call_args and 'instrument' not in call_args:
             call_args['instrument'] = call_args['self']
 
+    command_args = dict(spec.command_defaults)
     command_args.update({
         key: call_args[key]
-        for key in
-        (set(inspect.getfullargspec(cmd).args)
-         & call_args.keys())
+        for key in spec.command_args
+        if key in call_args
     })
 
     if meta:
@@ -469,10 +545,10 @@ def do_publish(broker, cmd, f, when, res, meta, *args, **kwargs):
 
     payload = cmd(**command_args)
 
-    message = {**payload, '$': when}
-    if when == 'after':
-        message['return'] = res
-    publish_command(
+    publish_stats.published += 1
+    publish_stats.overhead += perf_counter() - start
+    broker.publish(
+        topic=command_types.COMMAND,
         message={**payload, '$': when})
 
 
@@ -488,7 +564,8 @@ def _publish_dec(before, after, command, meta=None):
             if before:
                 do_publish(
                     broker, command, f, 'before', None, meta, *args, **kwargs)
-            res = f(*args, **kwargs)
+            with profiler.span(f.__qualname__, 'command'):
+                res = f(*args, **kwargs)
             if after:
                 do_publish(
                     broker, command, f, 'after', res, meta, *args, **kwargs)
@@ -516,18 +593,15 @@ class publish:
     both = functools.partial(_publish_dec, before=True, after=True)
 
 
-def _get_args(f, args, kwargs):
+def _get_args(arg_names, defaults, args, kwargs):
     # Create the initial dictionary with args that have defaults
     res = {}
 
-    if inspect.getfullargspec(f).defaults:
-        res = dict(
-            zip(
-                reversed(inspect.getfullargspec(f).args),
-                reversed(inspect.getfullargspec(f).defaults)))
+    if defaults:
+        res = dict(zip(reversed(arg_names), reversed(defaults)))
 
     # Update / insert values for positional args
-    res.update(dict(zip(inspect.getfullargspec(f).args, args)))
+    res.update(zip(arg_names, args))
 
     # Update it with values for named args
     res.update(kwargs)
@@ -0,0 +1,139 @@
+"""
+A run log that streams commands to disk rather than keeping them in memory.
+
+A :py:class:`RunLog` writes each record it is given as one line of JSON
+(newline-delimited JSON) and remembers only where each line starts, so the
+memory it uses grows by eight bytes per record however large the records are.
+Records are read back from the file by their index (which is the command id),
+in slices, or by iterating over the log. The most recent records are also kept
+in memory, so the part of the log that is usually displayed can be read
+without touching the disk.
+
+Anything in a record that JSON cannot represent (for instance the instruments
+and locations in a command payload) is written as its string representation.
+"""
+import json
+import os
+import tempfile
+from array import array
+from collections import abc, deque
+from typing import IO, Any, Deque, Dict, Iterator, List, Union
+
+#: The default number of recent records kept in memory
+WINDOW_SIZE = 100
+
+
+def _jsonable(obj: Any) -> Any:
+    """ Convert an object to something json can encode, replacing anything
+    it can't with its string representation """
+    if obj is None or isinstance(obj, (str, int, float, bool)):
+        return obj
+    elif isinstance(obj, dict):
+        return {str(key): _jsonable(value) for key, value in obj.items()}
+    elif type(obj) in (list, tuple):
+        # type() rather than isinstance() so that named tuples (like
+        # locations) are written as their string representation
+        return [_jsonable(value) for value in obj]
+    return str(obj)
+
+
+class RunLog(abc.Sequence):
+    """ A sequence of records that is stored on disk as it is appended to """
+
+    def __init__(self, path: str = None, window: int = WINDOW_SIZE) -> None:
+        """ Build a run log.
+
+        :param path: The file to write the log to. Any existing file is
+                     overwritten. If not specified, a temporary file is used
+                     and deleted when the log is closed.
+        :param window: The number of recent records to keep in memory
+        """
+        self._file: IO[bytes]
+        self._temporary: bool
+        if path is None:
+            fd, path = tempfile.mkstemp(prefix='runlog-', suffix='.ndjson')
+            self._file = os.fdopen(fd, 'w+b')
+            self._temporary = True
+        else:
+            self._file = open(path, 'w+b')
+            self._temporary = False
+        self.path = path
+        self._offsets = array('q')
+        self._end = 0
+        self._window: Deque[Dict[str, Any]] = deque(maxlen=window)
+
+    def __enter__(self) -> 'RunLog':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __del__(self):
+        if hasattr(self, '_file'):
+            self.close()
+
+    @property
+    def closed(self) -> bool:
+        return self._file.closed
+
+    def close(self):
+        """ Close the log file, deleting it if it is temporary. The records
+        in the window can still be read from :py:meth:`window` """
+        if self._file.closed:
+            return
+        self._file.close()
+        if self._temporary:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+    def append(self, record: Dict[str, Any]) -> int:
+        """ Write a record to the end of the log.
+
+        :returns: The index of the record
+        """
+        record = _jsonable(record)
+        line = json.dumps(record, separators=(',', ':')).encode() + b'\n'
+        # Reads move the file position, so always seek back to the end
+        self._file.seek(self._end)
+        self._file.write(line)
+        self._offsets.append(self._end)
+        self._end += len(line)
+        self._window.append(record)
+        return len(self._offsets) - 1
+
+    def window(self) -> List[Dict[str, Any]]:
+        """ The most recent records, oldest first """
+        return list(self._window)
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def _read(self, index: int) -> Dict[str, Any]:
+        first_in_window = len(self._offsets) - len(self._window)
+        if index >= first_in_window:
+            return self._window[index - first_in_window]
+        self._file.seek(self._offsets[index])
+        return json.loads(self._file.readline().decode())
+
+    def __getitem__(self, index: Union[int, slice]):  # type: ignore
+        if isinstance(index, slice):
+            return [self._read(idx)
+                    for idx in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('run log index out of range')
+        return self._read(index)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        count = len(self)
+        first_in_window = count - len(self._window)
+        window = list(self._window)
+        if first_in_window:
+            self._file.flush()
+            with open(self.path, 'rb') as f:
+                for _ in range(first_in_window):
+                    yield json.loads(f.readline().decode())
+        yield from window
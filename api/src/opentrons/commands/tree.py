@@ -1,33 +1,28 @@
 def from_list(commands):
     """
-    Given a list of tuples of form (depth, text)
+    Given an iterable of dicts with 'level', 'description' and 'id' keys
     that represents a DFS traversal of a command tree,
-    returns a dictionary representing command tree.
-    """
-    def subtrees(commands, level):
-        if not commands:
-            return
-
-        acc = []
-        parent, *commands = commands
+    returns a list of dictionaries representing the command tree.
 
-        for command in commands:
-            if command['level'] > level:
-                acc.append(command)
-            else:
-                yield (parent, acc)
-                parent = command
-                acc.clear()
-        yield (parent, acc)
+    The commands are consumed one at a time, so they can be streamed (for
+    instance from a :py:class:`opentrons.commands.run_log.RunLog`).
+    """
+    roots = []
+    # The most recent node at each level, paired with that level
+    stack = []
 
-    def walk(commands, level=0):
-        return [
-            {
-                'description': key['description'],
-                'children': walk(subtree, level + 1),
-                'id': key['id']
-            }
-            for key, subtree in subtrees(commands, level)
-        ]
+    for command in commands:
+        node = {
+            'description': command['description'],
+            'children': [],
+            'id': command['id']
+        }
+        while stack and stack[-1][0] >= command['level']:
+            stack.pop()
+        if stack:
+            stack[-1][1]['children'].append(node)
+        else:
+            roots.append(node)
+        stack.append((command['level'], node))
 
-    return walk(commands)
+    return roots
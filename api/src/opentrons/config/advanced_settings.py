@@ -70,6 +70,14 @@ settings = [
                     ' P50M, and P300S pipettes. Note this will cause the '
                     ' default aspirate behavior (ul to mm conversion) to '
                     ' function as it did prior to version 3.7.0.'
+    ),
+    Setting(
+        _id='enableGcodeStreaming',
+        title='Stream motion commands',
+        description='Send consecutive moves to the motor controller without'
+                    ' waiting for each one to finish, so they can be planned'
+                    ' together. Please restart the robot after changing this'
+                    ' setting.'
     )
 ]
 
@@ -183,7 +191,17 @@ def _migrate0to1(previous: Mapping[str, Any]) -> SettingsMap:
     return next
 
 
-_MIGRATIONS = [_migrate0to1]
+def _migrate1to2(previous: Mapping[str, Any]) -> SettingsMap:
+    """
+    Migrate to version 2 of the feature flags file. Adds the
+    enableGcodeStreaming setting
+    """
+    next: SettingsMap = dict(previous)
+    next.setdefault('enableGcodeStreaming', None)
+    return next
+
+
+_MIGRATIONS = [_migrate0to1, _migrate1to2]
 """
 List of all migrations to apply, indexed by (version - 1). See _migrate below
 for how the migration functions are applied. Each migration function should
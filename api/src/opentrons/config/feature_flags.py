@@ -32,3 +32,7 @@ def use_protocol_api_v2():
 
 def use_old_aspiration_functions():
     return get_setting_with_env_overload('useOldAspirationFunctions')
+
+
+def enable_gcode_streaming():
+    return get_setting_with_env_overload('enableGcodeStreaming')
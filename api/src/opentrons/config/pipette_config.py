@@ -4,9 +4,9 @@ import json
 import re
 from collections import namedtuple
 from typing import Any, Dict, List, Union, Tuple, Sequence, Optional
-import pkgutil
 
 from opentrons.config import feature_flags as ff, CONFIG
+from opentrons.util import definition_cache
 
 
 log = logging.getLogger(__name__)
@@ -64,23 +64,31 @@ HAS_MODEL_RE = re.compile('^p.+_v.+$')
 #: If a prospective model string matches this, it has a full model number
 
 
+def _shared_model_config() -> Dict[str, Any]:
+    """ The cached per-pipette-model config, which is shared and cannot be
+    modified (see :py:mod:`opentrons.util.definition_cache`) """
+    return definition_cache.load_shared_data(
+        'robot-data/pipetteModelSpecs.json')
+
+
+def _shared_name_config() -> Dict[str, Any]:
+    """ The cached per-pipette-name config, which is shared and cannot be
+    modified (see :py:mod:`opentrons.util.definition_cache`) """
+    return definition_cache.load_shared_data(
+        'robot-data/pipetteNameSpecs.json')
+
+
 def model_config() -> Dict[str, Any]:
     """ Load the per-pipette-model config file from within the wheel """
-    return json.loads(
-        pkgutil.get_data(
-            'opentrons', 'shared_data/robot-data/pipetteModelSpecs.json')
-        or '{}')
+    return copy.deepcopy(_shared_model_config())
 
 
 def name_config() -> Dict[str, Any]:
     """ Load the per-pipette-name config file from within the wheel """
-    return json.loads(
-        pkgutil.get_data(
-            'opentrons', 'shared_data/robot-data/pipetteNameSpecs.json')
-        or '{}')
+    return copy.deepcopy(_shared_name_config())
 
 
-config_models = list(model_config()['config'].keys())
+config_models = list(_shared_model_config()['config'].keys())
 configs = model_config()['config']
 #: A list of pipette model names for which we have config entries
 mutable_configs = model_config()['mutableConfigs']
@@ -120,7 +128,7 @@ def load(pipette_model: str, pipette_id: str = None) -> pipette_config:
 
     # Load the model config and update with the name config
     cfg = copy.deepcopy(configs[pipette_model])
-    cfg.update(copy.deepcopy(name_config()[cfg['name']]))
+    cfg.update(copy.deepcopy(_shared_name_config()[cfg['name']]))
     # Load overrides if we have a pipette id
     if pipette_id:
         try:
@@ -284,8 +292,8 @@ def load_config_dict(pipette_id: str) -> Dict:
     """
     override = load_overrides(pipette_id)
     model = override['model']
-    config = copy.deepcopy(model_config()['config'][model])
-    config.update(copy.deepcopy(name_config()[config['name']]))
+    config = copy.deepcopy(_shared_model_config()['config'][model])
+    config.update(copy.deepcopy(_shared_name_config()[config['name']]))
 
     for top_level_key in config.keys():
         add_default(config[top_level_key])
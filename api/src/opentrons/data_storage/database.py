@@ -1,7 +1,9 @@
 # pylama:ignore=E252
+import contextlib
 import sqlite3
+import threading
 # import warnings
-from typing import List
+from typing import Dict, Iterator, List, Optional, Tuple
 from opentrons.legacy_api.containers.placeable\
     import Container, Well, Module, Placeable
 from opentrons.data_storage import database_queries as db_queries
@@ -16,9 +18,59 @@ log = logging.getLogger(__file__)
 database_path = str(CONFIG['labware_database_file'])
 log.debug("Database path: {}".format(database_path))
 
+# The connection to database_path, opened the first time it is needed and
+# kept until the path changes (or the database is reset). sqlite3 keeps the
+# statements prepared on a connection, so reusing one also reuses those.
+# A connection must not be used across a fork, so the process that opened it
+# is remembered too, and a forked process (like a worker of
+# opentrons.simulate.simulate_batch) opens its own.
+_connection: Optional[sqlite3.Connection] = None
+_connection_path: Optional[str] = None
+_connection_pid: Optional[int] = None
+_connection_lock = threading.RLock()
+
+# The Containers and ContainerWells rows of each container loaded so far,
+# by name, forgotten when the container is saved, overwritten or deleted
+_container_rows: Dict[str, Tuple[tuple, List[tuple]]] = {}
+
 # ======================== Private Functions ======================== #
 
 
+@contextlib.contextmanager
+def _connect() -> Iterator[sqlite3.Connection]:
+    """ Use the connection to the database, opening it if needed """
+    global _connection, _connection_path, _connection_pid
+    with _connection_lock:
+        if _connection_pid != os.getpid():
+            # Opened by the process this one was forked from, which may still
+            # be using it; leave it alone rather than closing it
+            _connection = None
+        if _connection is None or _connection_path != database_path:
+            _close()
+            log.debug("Opening database {}".format(database_path))
+            _connection = sqlite3.connect(
+                database_path, check_same_thread=False)
+            # Writers don't block readers, and a write is appended to the
+            # log instead of also being journaled
+            _connection.execute('PRAGMA journal_mode=WAL')
+            _connection_path = database_path
+            _connection_pid = os.getpid()
+        yield _connection
+
+
+def _close():
+    """ Close the connection to the database (if open) and forget the
+    containers loaded from it """
+    global _connection, _connection_path, _connection_pid
+    with _connection_lock:
+        if _connection is not None:
+            _connection.close()
+        _connection = None
+        _connection_path = None
+        _connection_pid = None
+        _container_rows.clear()
+
+
 def _parse_container_obj(container: Container):
     # Note: in the new labware system, container coordinates are always (0,0,0)
     return dict(zip('xyz', container._coordinates))
@@ -44,14 +96,24 @@ def _parse_well_obj(well: Well):
 
 
 def _create_container_obj_in_db(db, container: Container, container_name: str):
-    db_queries.create_container(
-        db, container_name, **_parse_container_obj(container)
+    wells = [_parse_well_obj(well) for well in container]
+    db_queries.insert_container_with_wells(
+        db, container_name,
+        wells=[
+            (well['location'], well['x'], well['y'], well['z'],
+             well['depth'], well['volume'], well['diameter'],
+             well['length'], well['width'])
+            for well in wells],
+        **_parse_container_obj(container)
     )
-    for well in iter(container):
-        _create_well_obj_in_db(db, container_name, well)
 
 
-def _load_container_object_from_db(db, container_name: str):
+def _get_container_rows_from_db(db, container_name: str):
+    try:
+        return _container_rows[container_name]
+    except KeyError:
+        pass
+
     db_data = db_queries.get_container_by_name(db, container_name)
     if not db_data:
         raise ValueError(
@@ -59,13 +121,21 @@ def _load_container_object_from_db(db, container_name: str):
             .format(container_name)
         )
 
-    container_type, *rel_coords = db_data
     wells = db_queries.get_wells_by_container_name(db, container_name)
     if not wells:
         raise ResourceWarning(
             "No wells for container {} found in ContainerWells database"
             .format(container_name)
         )
+    _container_rows[container_name] = (db_data, wells)
+    return db_data, wells
+
+
+def _load_container_object_from_db(db, container_name: str):
+    # Containers are built from the rows every time they are loaded,
+    # because the robot moves and calibrates the object it is given
+    db_data, wells = _get_container_rows_from_db(db, container_name)
+    container_type, *rel_coords = db_data
 
     if container_name in SUPPORTED_MODULES:
         container: Placeable = Module()
@@ -96,13 +166,6 @@ def _delete_container_object_in_db(db, container_name: str):
     db_queries.delete_container(db, container_name)
 
 
-def _create_well_obj_in_db(db, container_name: str, well: Well):
-    well_data = _parse_well_obj(well)
-    db_queries.insert_well_into_db(
-        db_conn=db, container_name=container_name, **well_data
-    )
-
-
 def _load_well_object_from_db(db, well_data):
     container_name, location, x, y, z, \
         depth, volume, diameter, length, width = well_data
@@ -147,69 +210,76 @@ def _get_db_version(db):
 
 # ======================== Public Functions ======================== #
 def save_new_container(container: Container, container_name: str) -> bool:
-    db_conn = sqlite3.connect(database_path)
-    _create_container_obj_in_db(db_conn, container, container_name)
+    with _connect() as db_conn:
+        _container_rows.pop(container_name, None)
+        _create_container_obj_in_db(db_conn, container, container_name)
     res = True  # old create fn does not return anything
     return res
 
 
 def load_container(container_name: str) -> Container:
-    db_conn = sqlite3.connect(database_path)
-    res = _load_container_object_from_db(db_conn, container_name)
+    with _connect() as db_conn:
+        res = _load_container_object_from_db(db_conn, container_name)
     return res
 
 
 def overwrite_container(container: Container) -> bool:
     log.debug("Overwriting container definition: {}".format(
         container.get_type()))
-    db_conn = sqlite3.connect(database_path)
-    _update_container_object_in_db(db_conn, container)
+    with _connect() as db_conn:
+        _container_rows.pop(container.get_type(), None)
+        _update_container_object_in_db(db_conn, container)
     res = True  # old overwrite fn does not return anything
     return res
 
 
 def delete_container(container_name) -> bool:
-    db_conn = sqlite3.connect(database_path)
-    _delete_container_object_in_db(db_conn, container_name)
+    with _connect() as db_conn:
+        _container_rows.pop(container_name, None)
+        _delete_container_object_in_db(db_conn, container_name)
     res = True  # old delete fn does not return anything
     return res
 
 
 def list_all_containers() -> List[str]:
-    db_conn = sqlite3.connect(database_path)
-    res = _list_all_containers_by_name(db_conn)
+    with _connect() as db_conn:
+        res = _list_all_containers_by_name(db_conn)
     return res
 
 
 def load_module(module_name: str) -> Container:
-    db_conn = sqlite3.connect(database_path)
-    res = _load_module_dict_from_db(db_conn, module_name)
+    with _connect() as db_conn:
+        res = _load_module_dict_from_db(db_conn, module_name)
     return res
 
 
 def change_database(db_path: str):
     global database_path
-    database_path = db_path
+    with _connection_lock:
+        _close()
+        database_path = db_path
 
 
 def get_version():
     '''Get the Opentrons-defined database version'''
-    db_conn = sqlite3.connect(database_path)
-    return _get_db_version(db_conn)
+    with _connect() as db_conn:
+        return _get_db_version(db_conn)
 
 
 def set_version(version):
-    db_conn = sqlite3.connect(database_path)
-    db_queries.set_user_version(db_conn, version)
+    with _connect() as db_conn:
+        db_queries.set_user_version(db_conn, version)
 
 
 def reset():
     """ Unmount and remove the sqlite database (used in robot reset) """
+    _close()
     if os.path.exists(database_path):
         os.remove(database_path)
-    # Not an os.path.join because it is a suffix to the full filename
-    journal_path = database_path + '-journal'
-    if os.path.exists(journal_path):
-        os.remove(journal_path)
+    # Not an os.path.join because they are suffixes to the full filename
+    for suffix in ('-journal', '-wal', '-shm'):
+        journal_path = database_path + suffix
+        if os.path.exists(journal_path):
+            os.remove(journal_path)
 
 # ======================== END Public Functions ======================== #
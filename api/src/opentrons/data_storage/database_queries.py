@@ -88,6 +88,20 @@ def insert_well_into_db(db_conn, container_name, location, x, y, z,
         )
 
 
+def insert_container_with_wells(db_conn, container_name, x, y, z, wells):
+    # wells are (location, x, y, z, depth, volume, diameter, length, width)
+    # tuples, inserted with the container in a single transaction
+    with db_conn:
+        db_conn.execute(
+            'INSERT INTO Containers VALUES (?, ?, ?, ?)',
+            (container_name, x, y, z,)
+        )
+        db_conn.executemany(
+            'INSERT INTO ContainerWells VALUES (?,?,?,?,?,?,?,?,?,?)',
+            [(container_name, *well) for well in wells]
+        )
+
+
 def get_wells_by_container_name(db_conn, container_name):
     with db_conn:
         cursor = db_conn.cursor()
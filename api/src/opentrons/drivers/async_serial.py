@@ -0,0 +1,155 @@
+"""
+An asyncio-native transport for serial devices.
+
+Unlike :py:mod:`opentrons.drivers.serial_communication`, which blocks the
+calling thread until a device responds, an :py:class:`AsyncSerial` registers
+its port with the event loop and dispatches each acknowledged response to the
+coroutine waiting for it. Commands may be pipelined: responses are matched to
+commands in the order the commands were written. A command that times out
+keeps its place in that order, so that its response, if it arrives late, is
+not taken for the response to a later command.
+
+Anything the device sends while no command is waiting for a response (for
+instance, the thermocycler's lid-open interrupt) is passed line by line to an
+optional callback.
+"""
+import asyncio
+import logging
+from collections import deque
+from typing import Callable, Deque, Optional
+
+import serial
+
+from .serial_communication import (
+    DEFAULT_WRITE_TIMEOUT, SerialNoResponse, _parse_serial_response)
+
+log = logging.getLogger(__name__)
+
+LINE_TERMINATOR = b'\r\n'
+
+
+class AsyncSerial:
+    def __init__(self,
+                 connection: serial.Serial,
+                 ack: str,
+                 loop: asyncio.AbstractEventLoop = None,
+                 unsolicited_callback: Callable[[str], None] = None) -> None:
+        """ Build an AsyncSerial around an open pyserial connection.
+
+        :param connection: The open connection. Its timeout is set to 0 so
+                           that reads never block.
+        :param ack: The string the device sends at the end of every response
+        :param loop: The event loop to register the connection with (default
+                     is the current event loop)
+        :param unsolicited_callback: A function called with each line the
+                                     device sends when no command is waiting
+                                     for a response
+        """
+        self._connection = connection
+        self._connection.timeout = 0
+        self._ack = ack.encode()
+        self._loop = loop or asyncio.get_event_loop()
+        self._unsolicited_callback = unsolicited_callback
+        self._buffer = bytearray()
+        self._pending: Deque[asyncio.Future] = deque()
+        self._loop.add_reader(self._connection.fileno(), self._on_readable)
+
+    @classmethod
+    async def connect(
+            cls,
+            port: str,
+            ack: str,
+            baudrate: int = 115200,
+            loop: asyncio.AbstractEventLoop = None,
+            unsolicited_callback: Callable[[str], None] = None)\
+            -> 'AsyncSerial':
+        """ Open a serial port and build an AsyncSerial around it """
+        connection = serial.Serial(port=port, baudrate=baudrate, timeout=0)
+        log.debug(connection)
+        return cls(connection, ack, loop, unsolicited_callback)
+
+    @property
+    def port(self) -> Optional[str]:
+        return self._connection.port
+
+    def is_open(self) -> bool:
+        return self._connection.is_open
+
+    @property
+    def pending(self) -> int:
+        """ The number of commands waiting for a response """
+        return sum(1 for fut in self._pending if not fut.done())
+
+    def close(self):
+        """ Stop reading, fail any waiting commands, and close the port """
+        if self._connection.is_open:
+            self._loop.remove_reader(self._connection.fileno())
+            self._connection.close()
+        while self._pending:
+            fut = self._pending.popleft()
+            if not fut.done():
+                fut.set_exception(SerialNoResponse('Connection closed'))
+
+    async def write_and_return(
+            self, command: str, timeout: float = DEFAULT_WRITE_TIMEOUT) -> str:
+        """ Write a command and return the device's response to it.
+
+        :raises SerialNoResponse: If the device does not acknowledge the
+                                  command within `timeout` seconds
+        """
+        self._discard_stale()
+        fut = self._loop.create_future()
+        self._pending.append(fut)
+        log.debug('Write -> {!r}'.format(command))
+        self._connection.write(command.encode())
+        try:
+            # On timeout, the (cancelled) future stays queued to take the
+            # command's response if it arrives while later commands wait
+            return await asyncio.wait_for(fut, timeout)
+        except asyncio.TimeoutError:
+            raise SerialNoResponse(
+                'No response from serial port after {} second(s)'.format(
+                    timeout))
+
+    def _discard_stale(self):
+        """ If only commands that timed out are waiting for a response, stop
+        waiting and drop anything the device has sent since, so that a
+        response that was lost does not take the place of the next one """
+        if any(not fut.done() for fut in self._pending):
+            return
+        if self._pending or self._buffer:
+            log.debug('Discarding {} stale command(s) and {!r}'.format(
+                len(self._pending), bytes(self._buffer)))
+        self._pending.clear()
+        self._buffer.clear()
+        self._connection.reset_input_buffer()
+
+    def _on_readable(self):
+        try:
+            data = self._connection.read(self._connection.in_waiting or 1)
+        except serial.SerialException:
+            log.exception('Failed to read from {}'.format(self.port))
+            self.close()
+            return
+        self._buffer.extend(data)
+        self._dispatch()
+
+    def _dispatch(self):
+        while self._pending:
+            end = self._buffer.find(self._ack)
+            if end < 0:
+                return
+            end += len(self._ack)
+            response = bytes(self._buffer[:end])
+            del self._buffer[:end]
+            log.debug('Read <- {!r}'.format(response))
+            fut = self._pending.popleft()
+            if not fut.done():
+                fut.set_result(
+                    _parse_serial_response(response, self._ack).decode())
+        while LINE_TERMINATOR in self._buffer:
+            line, _, rest = bytes(self._buffer).partition(LINE_TERMINATOR)
+            self._buffer[:] = rest
+            if line.strip() and self._unsolicited_callback:
+                log.debug('Unsolicited <- {!r}'.format(line))
+                self._unsolicited_callback(line.decode().strip())
@@ -53,13 +53,10 @@ def clear_buffer(serial_connection):
     serial_connection.reset_input_buffer()
 
 
-def _write_to_device_and_return(cmd, ack, device_connection):
-    '''Writes to a serial device.
-    - Formats command
+def _read_from_device_until_ack(ack, device_connection):
+    '''Reads from a serial device.
     - Wait for ack return
     - return parsed response'''
-    log.debug('Write -> {}'.format(cmd.encode()))
-    device_connection.write(cmd.encode())
     response = device_connection.read_until(ack.encode())
     log.debug('Read <- {}'.format(response))
     if ack.encode() not in response:
@@ -72,6 +69,16 @@ def _write_to_device_and_return(cmd, ack, device_connection):
     return ''
 
 
+def _write_to_device_and_return(cmd, ack, device_connection):
+    '''Writes to a serial device.
+    - Formats command
+    - Wait for ack return
+    - return parsed response'''
+    log.debug('Write -> {}'.format(cmd.encode()))
+    device_connection.write(cmd.encode())
+    return _read_from_device_until_ack(ack, device_connection)
+
+
 def _connect(port_name, baudrate):
     ser = serial.Serial(
         port=port_name,
@@ -105,6 +112,21 @@ def write_and_return(
     return response
 
 
+def write(command, serial_connection):
+    '''Write a command without waiting for its response. The response must
+    later be collected with read_response'''
+    log.debug('Write -> {}'.format(command.encode()))
+    serial_connection.write(command.encode())
+
+
+def read_response(ack, serial_connection, timeout=DEFAULT_WRITE_TIMEOUT):
+    '''Read the response to the oldest command sent with write'''
+    with serial_with_temp_timeout(
+            serial_connection, timeout) as device_connection:
+        response = _read_from_device_until_ack(ack, device_connection)
+    return response
+
+
 def connect(device_name=None, port=None, baudrate=115200):
     '''
     Creates a serial connection
@@ -1,15 +1,17 @@
 import asyncio
+from collections import deque
 from os import environ
 import logging
 from time import sleep
 from threading import Event
-from typing import Any, Dict, Optional
+from typing import Any, Deque, Dict, Optional, Tuple
 
 from serial.serialutil import SerialException
 
 from opentrons.drivers import serial_communication
 from opentrons.drivers.rpi_drivers import gpio
 from opentrons.system import smoothie_update
+from opentrons.util.profiler import profiler
 '''
 - Driver is responsible for providing an interface for motion control
 - Driver is the only system component that knows about GCODES or how smoothie
@@ -107,6 +109,18 @@ GCODE_ROUNDING_PRECISION = 3
 SMOOTHIE_COMMAND_TERMINATOR = '\r\n\r\n'
 SMOOTHIE_ACK = 'ok\r\nok\r\n'
 
+# The dwell appended to every current-setting command, see
+# SmoothieDriver_3_0_0._generate_current_command
+CURRENT_CHANGE_DWELL = '{}P{}'.format(GCODES['DWELL'], CURRENT_CHANGE_DELAY)
+
+# When gcode streaming is enabled, the maximum number of commands that may be
+# written to Smoothieware before their acknowledgements have been read
+DEFAULT_STREAMING_WINDOW = 4
+# GCodes that Smoothieware queues in its motion planner, and which therefore
+# do not need to wait for previous motion to complete when streaming
+STREAMABLE_GCODES = (
+    GCODES['MOVE'], GCODES['ABSOLUTE_COORDS'], GCODES['RELATIVE_COORDS'])
+
 
 class SmoothieError(Exception):
     pass
@@ -116,6 +130,19 @@ class ParseError(Exception):
     pass
 
 
+def _split_current_command(command: str) -> Tuple[Optional[str], str]:
+    '''
+    Split a command that starts with a current-setting gcode (as generated by
+    SmoothieDriver_3_0_0._generate_current_command) into the current setting
+    and the remainder of the command. If the command does not start with a
+    current setting, the first element of the returned tuple is None
+    '''
+    if not command.startswith(GCODES['SET_CURRENT']):
+        return None, command
+    current, dwell, remainder = command.partition(CURRENT_CHANGE_DWELL)
+    return current + dwell, remainder.strip()
+
+
 def _parse_number_from_substring(smoothie_substring):
     '''
     Returns the number in the expected string "N:12.3", where "N" is the
@@ -276,6 +303,14 @@ class SmoothieDriver_3_0_0:
         self._connection = None
         self._config = config
 
+        # Gcode streaming (see set_streaming): commands that have been written
+        # but whose acknowledgements have not yet been read, oldest first, and
+        # the last current setting sent to Smoothieware
+        self._streaming = False
+        self._streaming_window = DEFAULT_STREAMING_WINDOW
+        self._streamed_commands: Deque[str] = deque()
+        self._sent_current_command: Optional[str] = None
+
         # Current settings:
         # The amperage of each axis, has been organized into three states:
         # Current-Settings is the amperage each axis was last set to
@@ -495,6 +530,7 @@ class SmoothieDriver_3_0_0:
         if self.is_connected():
             self._connection.close()
         self._connection = None
+        self._streamed_commands.clear()
         self.simulating = True
 
     def is_connected(self):
@@ -519,6 +555,41 @@ class SmoothieDriver_3_0_0:
             error_msg += 'the UART port is disabled on this device (OS)'
             raise SerialException(error_msg)
 
+    @property
+    def streaming(self) -> bool:
+        return self._streaming
+
+    def set_streaming(self, enabled: bool,
+                      window: int = DEFAULT_STREAMING_WINDOW):
+        '''
+        Enable or disable gcode streaming.
+
+        Normally every command is followed by an M400, so that it has
+        completed before _send_command returns. When streaming is enabled,
+        commands that only queue motion in Smoothieware's planner are instead
+        written without an M400, and up to `window` of them may be in flight
+        before their acknowledgements are read. This lets Smoothieware plan
+        consecutive moves together.
+
+        Any other command (position reads, homing, probing, current changes,
+        and so on) is a synchronization point: the acknowledgements of all
+        in-flight commands are read and an M400 waits for the motion they
+        queued to finish before the command is written, and the command is
+        followed by M400 as usual.
+
+        enabled:
+            Boolean (bool) whether to stream commands
+        window:
+            Integer (int) maximum number of unacknowledged commands
+        '''
+        if window < 1:
+            raise ValueError(
+                'Streaming window must be at least 1, not {}'.format(window))
+        if not enabled:
+            self._flush_streamed_commands()
+        self._streaming = enabled
+        self._streaming_window = window
+
     @property
     def port(self):
         if not self._connection:
@@ -871,13 +942,14 @@ class SmoothieDriver_3_0_0:
         self._send_command(GCODES['RESET_FROM_ERROR'])
         self.update_homed_flags()
 
-    # Potential place for command optimization (buffering, flushing, etc)
     def _send_command(self, command, timeout=DEFAULT_SMOOTHIE_TIMEOUT):
         """
         Submit a GCODE command to the robot, followed by M400 to block until
-        done. This method also ensures that any command on the B or C axis
-        (the axis for plunger control) do current ramp-up and ramp-down, so
-        that plunger motors rest at a low current to prevent burn-out.
+        done (unless streaming is enabled and the command can be streamed; see
+        set_streaming). This method also ensures that any command on the B or
+        C axis (the axis for plunger control) do current ramp-up and
+        ramp-down, so that plunger motors rest at a low current to prevent
+        burn-out.
 
         In the case of a limit-switch alarm during any command other than home,
         the robot should home the axis from the alarm and then raise a
@@ -894,23 +966,116 @@ class SmoothieDriver_3_0_0:
         """
         if self.simulating:
             return
-        cmd_ret = self._write_with_retries(
-            command + SMOOTHIE_COMMAND_TERMINATOR,
-            5.0, DEFAULT_COMMAND_RETRIES)
-        cmd_ret = self._remove_unwanted_characters(command, cmd_ret)
-        self._handle_return(cmd_ret, GCODES['HOME'] in command)
-        wait_ret = serial_communication.write_and_return(
-            GCODES['WAIT'] + SMOOTHIE_COMMAND_TERMINATOR,
-            SMOOTHIE_ACK, self._connection, timeout=12000)
-        wait_ret = self._remove_unwanted_characters(
-            GCODES['WAIT'], wait_ret)
-        self._handle_return(wait_ret, GCODES['HOME'] in command)
+        if self._streaming:
+            if self._can_stream(command):
+                return self._stream_command(command)
+            self._flush_streamed_commands(command)
+        current_command, _ = _split_current_command(command)
+        with profiler.span(
+                command, 'smoothie', phase='write',
+                current_change=bool(current_command)
+                and current_command != self._sent_current_command):
+            cmd_ret = self._write_with_retries(
+                command + SMOOTHIE_COMMAND_TERMINATOR,
+                5.0, DEFAULT_COMMAND_RETRIES)
+            cmd_ret = self._remove_unwanted_characters(command, cmd_ret)
+            self._handle_return(cmd_ret, GCODES['HOME'] in command)
+        self._update_sent_current(command)
+        self._wait_for_motion(command, GCODES['HOME'] in command)
         return cmd_ret.strip()
 
+    def _wait_for_motion(self, command: str, was_home: bool = False):
+        '''
+        Send M400, which Smoothieware only acknowledges once all the motion
+        queued before it has finished
+
+        command:
+            The command (str) being waited for, for the profiler
+        '''
+        with profiler.span(GCODES['WAIT'], 'smoothie', phase='wait',
+                           command=command):
+            wait_ret = serial_communication.write_and_return(
+                GCODES['WAIT'] + SMOOTHIE_COMMAND_TERMINATOR,
+                SMOOTHIE_ACK, self._connection, timeout=12000)
+            wait_ret = self._remove_unwanted_characters(
+                GCODES['WAIT'], wait_ret)
+            self._handle_return(wait_ret, was_home)
+
+    def _can_stream(self, command: str) -> bool:
+        '''
+        Whether a command only queues motion in Smoothieware's planner, and so
+        may be streamed without waiting for previous commands to complete.
+
+        Smoothieware applies motor currents as soon as it receives them rather
+        than in planner order, so a command that changes the current of any
+        axis has to wait for in-flight motion to finish.
+        '''
+        current_command, motion = _split_current_command(command)
+        if current_command and current_command != self._sent_current_command:
+            return False
+        codes = motion.split()
+        if not (current_command or codes):
+            return False
+        return all(code.startswith(STREAMABLE_GCODES) for code in codes)
+
+    def _stream_command(self, command: str) -> str:
+        '''
+        Write a command without waiting for it to complete, first reading
+        enough acknowledgements to keep the number of in-flight commands
+        within the streaming window
+        '''
+        while len(self._streamed_commands) >= self._streaming_window:
+            self._read_streamed_response()
+        with profiler.span(command, 'smoothie', phase='stream'):
+            serial_communication.write(
+                command + SMOOTHIE_COMMAND_TERMINATOR, self._connection)
+        self._streamed_commands.append(command)
+        self._update_sent_current(command)
+        return ''
+
+    def _read_streamed_response(self):
+        command = self._streamed_commands.popleft()
+        try:
+            with profiler.span(command, 'smoothie', phase='ack'):
+                ret = serial_communication.read_response(
+                    SMOOTHIE_ACK, self._connection,
+                    timeout=DEFAULT_MOVEMENT_TIMEOUT)
+        except serial_communication.SerialNoResponse:
+            # Later acknowledgements can no longer be matched to commands
+            self._streamed_commands.clear()
+            raise
+        ret = self._remove_unwanted_characters(command, ret)
+        self._handle_return(ret, GCODES['HOME'] in command)
+
+    def _flush_streamed_commands(self, command: str = None):
+        '''
+        Read the acknowledgements of all in-flight streamed commands, then
+        wait for the motion they queued to complete. Smoothieware
+        acknowledges a move as soon as it is planned, so reading the
+        acknowledgements alone does not mean the moves have finished
+
+        command:
+            The command (str) that has to wait, for the profiler
+        '''
+        if not self._streamed_commands:
+            return
+        last_streamed = self._streamed_commands[-1]
+        while self._streamed_commands:
+            self._read_streamed_response()
+        self._wait_for_motion(command or last_streamed)
+
+    def _update_sent_current(self, command: str):
+        current_command, _ = _split_current_command(command)
+        if current_command:
+            self._sent_current_command = current_command
+
     def _handle_return(self, ret_code: str, was_home: bool):
         # Smoothieware returns error state if a switch was hit while moving
         if (ERROR_KEYWORD in ret_code.lower()) or \
                 (ALARM_KEYWORD in ret_code.lower()):
+            # Smoothieware drops any commands streamed after the failed one
+            self._streamed_commands.clear()
+            self._sent_current_command = None
             self._reset_from_error()
             error_axis = ret_code.strip()[-1]
             if not was_home and error_axis in 'XYZABC':
@@ -1038,6 +1203,8 @@ class SmoothieDriver_3_0_0:
 
     def _setup(self):
         log.debug("_setup")
+        self._streamed_commands.clear()
+        self._sent_current_command = None
         try:
             self._wait_for_ack()
         except serial_communication.SerialNoResponse:
@@ -1466,6 +1633,7 @@ class SmoothieDriver_3_0_0:
         any other state needed for the driver.
         """
         log.debug("kill")
+        self._streamed_commands.clear()
         self._smoothie_hard_halt()
         self._reset_from_error()
         self._setup()
@@ -1,16 +1,9 @@
 import asyncio
 import logging
-import os
-import threading
-from queue import Queue
-try:
-    import select
-except ModuleNotFoundError:
-    select = None  # type: ignore
-from time import sleep
 from typing import Optional, Mapping
 from serial.serialutil import SerialException
-from opentrons.drivers import serial_communication, utils
+from opentrons.drivers import utils
+from opentrons.drivers.async_serial import AsyncSerial
 from opentrons.drivers.serial_communication import SerialNoResponse
 
 
@@ -61,155 +54,10 @@ class ThermocyclerError(Exception):
     pass
 
 
-class TCPoller(threading.Thread):
-    def __init__(self, port, interrupt_callback, status_callback):
-        if not select:
-            raise RuntimeError("Cannot connect to a Thermocycler from Windows")
-        self._port = port
-        self._connection = self._connect_to_port()
-        self._interrupt_callback = interrupt_callback
-        self._status_callback = status_callback
-        self._lock = threading.Lock()
-        self._command_queue = Queue()
-
-        # Note: the options and order of operations for opening file
-        # descriptors is very specific. For more info, see:
-        # http://pubs.opengroup.org/onlinepubs/007908799/xsh/open.html
-        self._send_path = '/var/run/tc_send_fifo_{}'.format(hash(self))
-        os.mkfifo(self._send_path)
-        send_read_fd = os.open(
-            self._send_path, flags=os.O_RDONLY | os.O_NONBLOCK)
-        self._send_read_file = os.fdopen(send_read_fd, 'rb')
-        self._send_write_fd = open(self._send_path, 'wb', buffering=0)
-
-        self._halt_path = '/var/run/tc_halt_fifo_{}'.format(hash(self))
-        os.mkfifo(self._halt_path)
-        halt_read_fd = os.open(
-            self._halt_path, flags=os.O_RDONLY | os.O_NONBLOCK)
-        self._halt_read_file = os.fdopen(halt_read_fd, 'rb')
-        self._halt_write_fd = open(self._halt_path, 'wb', buffering=0)
-
-        self._poller = select.poll()
-        self._poller.register(self._send_read_file, select.POLLIN)
-        self._poller.register(self._halt_read_file, select.POLLIN)
-        self._poller.register(self._connection, select.POLLIN)
-
-        serial_thread_name = 'tc_serial_poller_{}'.format(hash(self))
-        super().__init__(target=self._serial_poller, name=serial_thread_name)
-        log.info("Starting TC thread {}".format(serial_thread_name))
-        super().start()
-
-    @property
-    def port(self):
-        return self._port
-
-    def _serial_poller(self):
-        """ Priority-sorted list of checks
-
-        Highest priority is the 'halt' channel, which is used to kill the
-        thread and the serial communication channel and allow everything to be
-        cleaned up.
-
-        Second is the lid-open interrupt, which should trigger a callback
-        (typically to halt the robot).
-
-        Third is an enqueued command to send to the Thermocycler.
-
-        Fourth (if no other work is available) is to query the Thermocycler for
-        its current temp, target temp, and time remaining in its current cycle.
-        """
-        while True:
-            _next = dict(self._poller.poll(POLLING_FREQUENCY_MS))
-            if self._halt_read_file.fileno() in _next:
-                log.debug("Poller [{}]: halt".format(hash(self)))
-                self._halt_read_file.read()
-                # Note: this is discarded because we send a set message to halt
-                # the thread--don't currently need to parse it
-                break
-
-            elif self._connection.fileno() in _next:
-                # Lid-open interrupt
-                log.debug("Poller [{}]: interrupt".format(hash(self)))
-                res = self._connection.read_until(SERIAL_ACK)
-                self._interrupt_callback(res)
-
-            elif self._send_read_file.fileno() in _next:
-                self._send_read_file.read(1)
-                command, callback = self._command_queue.get()
-                log.debug("Poller [{}]: send {}".format(hash(self), command))
-                res = self._send_command(command)
-                callback(res)
-            else:
-                # Nothing else to do--update device status
-                log.debug("Poller [{}]: updating temp".format(hash(self)))
-                res = self._send_command(GCODES['GET_PLATE_TEMP'])
-                self._status_callback(res)
-        log.info("Exiting TC poller loop [{}]".format(hash(self)))
-
-    def _wait_for_ack(self):
-        """
-        This method writes a sequence of newline characters, which will
-        guarantee the device responds with 'ok\r\nok\r\n' within 1 second
-        """
-        self._send_command(SERIAL_ACK, timeout=DEFAULT_TC_TIMEOUT)
-
-    def _send_command(self, command, timeout=DEFAULT_TC_TIMEOUT):
-        command_line = command + ' ' + TC_COMMAND_TERMINATOR
-        ret_code = self._recursive_write_and_return(
-            command_line, timeout, DEFAULT_COMMAND_RETRIES)
-        if ERROR_KEYWORD in ret_code.lower():
-            log.error('Received error message from Thermocycler: {}'.format(
-                    ret_code))
-            raise ThermocyclerError(ret_code)
-        return ret_code.strip()
-
-    def _recursive_write_and_return(self, cmd, timeout, retries):
-        try:
-            return serial_communication.write_and_return(
-                cmd, TC_ACK, self._connection, timeout)
-        except SerialNoResponse as e:
-            retries -= 1
-            if retries <= 0:
-                raise e
-            sleep(DEFAULT_STABILIZE_DELAY)
-            if self._connection:
-                self._connection.close()
-                self._connection.open()
-            return self._recursive_write_and_return(
-                cmd, timeout, retries)
-
-    def _connect_to_port(self):
-        try:
-            return serial_communication.connect(port=self._port,
-                                                baudrate=TC_BAUDRATE)
-        except SerialException:
-            raise SerialException(
-                "Thermocycler device not found on {}".format(self._port))
-
-    def send(self, command, callback):
-        with self._lock:
-            self._command_queue.put((command, callback))
-            self._send_write_fd.write(b'c')
-
-    def close(self):
-        self._halt_write_fd.write(b'q')
-
-    def __del__(self):
-        """ Clean up thread fifos"""
-        try:
-            os.unlink(self._send_path)
-        except NameError:
-            pass
-        try:
-            os.unlink(self._halt_path)
-        except NameError:
-            pass
-
-
 class Thermocycler:
     def __init__(self, interrupt_callback):
-        self._poller = None
-        self._update_thread = None
+        self._connection: Optional[AsyncSerial] = None
+        self._poll_task: Optional[asyncio.Future] = None
         self._current_temp = None
         self._target_temp = None
         self._ramp_rate = None
@@ -219,8 +67,16 @@ class Thermocycler:
 
     async def connect(self, port: str) -> 'Thermocycler':
         self.disconnect()
-        self._poller = TCPoller(
-            port, self._interrupt_callback, self._temp_status_update_callback)
+        try:
+            # Anything the thermocycler sends without being asked is a
+            # lid-open interrupt
+            self._connection = await AsyncSerial.connect(
+                port, TC_ACK, TC_BAUDRATE,
+                unsolicited_callback=self._interrupt_callback)
+        except SerialException:
+            raise SerialException(
+                "Thermocycler device not found on {}".format(port))
+        self._poll_task = asyncio.ensure_future(self._poll_status())
 
         # Check initial device lid state
         _lid_status_res = await self._write_and_wait(GCODES['GET_LID_STATUS'])
@@ -230,19 +86,21 @@ class Thermocycler:
         return self
 
     def disconnect(self) -> 'Thermocycler':
-        if self.is_connected():
-            self._poller.close()
-            self._poller.join()
-        self._poller = None
+        if self._poll_task:
+            self._poll_task.cancel()
+        self._poll_task = None
+        if self._connection:
+            self._connection.close()
+        self._connection = None
         return self
 
     async def deactivate(self):
         await self._write_and_wait(GCODES['DEACTIVATE'])
 
     def is_connected(self) -> bool:
-        if not self._poller:
+        if not self._connection:
             return False
-        return self._poller.is_alive()
+        return self._connection.is_open()
 
     async def open(self):
         await self._write_and_wait(GCODES['OPEN_LID'])
@@ -314,9 +172,9 @@ class Thermocycler:
 
     @property
     def port(self) -> Optional[str]:
-        if not self._poller:
+        if not self._connection:
             return None
-        return self._poller.port
+        return self._connection.port
 
     @property
     def lid_status(self):
@@ -333,22 +191,42 @@ class Thermocycler:
         else:
             raise ThermocyclerError("Thermocycler did not return device info")
 
-    async def _write_and_wait(self, command):
-        ret = None
-
-        def cb(cmd):
-            nonlocal ret
-            ret = cmd
-
-        self._poller.send(command, cb)
+    async def _poll_status(self):
+        """ Query the thermocycler for its current temp, target temp, and
+        time remaining in its current cycle, until disconnected
+        """
+        while True:
+            try:
+                res = await self._write_and_wait(GCODES['GET_PLATE_TEMP'])
+            except (ThermocyclerError, SerialNoResponse):
+                log.exception('Failed to update Thermocycler status:')
+            else:
+                self._temp_status_update_callback(res)
+            await asyncio.sleep(POLLING_FREQUENCY_MS / 1000)
 
-        while None is ret:
-            await asyncio.sleep(0.05)
-            pass
-        return ret
+    async def _write_and_wait(self, command, timeout=DEFAULT_TC_TIMEOUT):
+        if not self._connection:
+            raise ThermocyclerError('Thermocycler is not connected')
+        command_line = command + ' ' + TC_COMMAND_TERMINATOR
+        retries = DEFAULT_COMMAND_RETRIES
+        while True:
+            try:
+                ret_code = await self._connection.write_and_return(
+                    command_line, timeout)
+                break
+            except SerialNoResponse:
+                retries -= 1
+                if retries <= 0:
+                    raise
+                await asyncio.sleep(DEFAULT_STABILIZE_DELAY)
+        if ERROR_KEYWORD in ret_code.lower():
+            log.error('Received error message from Thermocycler: {}'.format(
+                    ret_code))
+            raise ThermocyclerError(ret_code)
+        return ret_code.strip()
 
     def __del__(self):
         try:
-            self._poller.close()
+            self.disconnect()
         except Exception:
             log.exception('Exception while cleaning up Thermocycler:')
@@ -16,9 +16,13 @@ import contextlib
 import functools
 import logging
 from typing import Any, Dict, Union, List, Optional, Tuple
+import numpy as np
+from numpy.linalg import inv
 from opentrons import types as top_types
 from opentrons.util import linal
+from opentrons.util.profiler import profiler
 from .simulator import Simulator
+from .clock import ModeledClock
 from opentrons.config import robot_configs
 from opentrons.config.robot_configs import DEFAULT_STEPS_PER_MM
 from .pipette import Pipette
@@ -38,6 +42,9 @@ def _log_call(func):
     @functools.wraps(func)
     def _log_call_inner(*args, **kwargs):
         args[0]._log.debug(func.__name__)
+        if profiler.enabled and asyncio.iscoroutinefunction(func):
+            return profiler.async_span(
+                func(*args, **kwargs), func.__name__, 'hardware')
         return func(*args, **kwargs)
     return _log_call_inner
 
@@ -82,6 +89,12 @@ class API(HardwareAPILike):
         """
         self._log = self.CLS_LOG.getChild(str(id(self)))
         self._config = config or robot_configs.load()
+        # The gantry calibration, and its inverse, as arrays. These are
+        # recomputed only when the config's gantry calibration is replaced
+        # (see _gantry_transforms)
+        self._transformed_calibration: Any = None
+        self._gantry_transform: np.ndarray = np.identity(4)
+        self._inverse_gantry_transform: np.ndarray = np.identity(4)
         self._backend = backend
         if None is loop:
             self._loop = asyncio.get_event_loop()
@@ -151,6 +164,9 @@ class API(HardwareAPILike):
 
         if None is attached_modules:
             attached_modules = []
+
+        if None is config:
+            config = robot_configs.load()
         return cls(Simulator(attached_instruments,
                              attached_modules,
                              config, loop,
@@ -176,6 +192,15 @@ class API(HardwareAPILike):
         """ `True` if this is a simulator; `False` otherwise. """
         return isinstance(self._backend, Simulator)
 
+    @property
+    def clock(self) -> Optional[ModeledClock]:
+        """ The modeled clock of a simulator, which advances by how long each
+        simulated action would take on a robot; `None` if this is not a
+        simulator. """
+        if isinstance(self._backend, Simulator):
+            return self._backend.clock
+        return None
+
     async def register_callback(self, cb):
         """ Allows the caller to register a callback, and returns a closure
         that can be used to unregister the provided callback
@@ -392,6 +417,19 @@ class API(HardwareAPILike):
         await self.cache_instruments()
         await self.discover_modules()
 
+    async def _call_backend(self, func, *args, **kwargs):
+        """ Call a backend method that waits on the hardware.
+
+        A real backend blocks until the smoothie acknowledges a motion, so
+        the call is made on an executor thread and the event loop stays free
+        (to :py:meth:`halt`, for instance) while the robot moves. The
+        simulator does no I/O and is called directly.
+        """
+        if self.is_simulator:
+            return func(*args, **kwargs)
+        return await self._loop.run_in_executor(
+            None, functools.partial(func, *args, **kwargs))
+
     # Gantry/frame (i.e. not pipette) action API
     @_log_call
     async def home_z(self, mount: top_types.Mount = None):
@@ -433,9 +471,11 @@ class API(HardwareAPILike):
         smoothie_plungers = [ax.name.upper() for ax in plungers]
         async with self._motion_lock:
             if smoothie_gantry:
-                smoothie_pos.update(self._backend.home(smoothie_gantry))
+                smoothie_pos.update(await self._call_backend(
+                    self._backend.home, smoothie_gantry))
             if smoothie_plungers:
-                smoothie_pos.update(self._backend.home(smoothie_plungers))
+                smoothie_pos.update(await self._call_backend(
+                    self._backend.home, smoothie_plungers))
             self._current_position = self._deck_from_smoothie(smoothie_pos)
 
     def add_tip(
@@ -485,16 +525,10 @@ class API(HardwareAPILike):
                         if k not in Axis.gantry_axes()}
         right = (with_enum[Axis.X], with_enum[Axis.Y],
                  with_enum[Axis.by_mount(top_types.Mount.RIGHT)])
-        # Tell apply_transform to just do the change of base part of the
-        # transform rather than the full affine transform, because this is
-        # an offset
         left = (with_enum[Axis.X],
                 with_enum[Axis.Y],
                 with_enum[Axis.by_mount(top_types.Mount.LEFT)])
-        right_deck = linal.apply_reverse(self.config.gantry_calibration,
-                                         right)
-        left_deck = linal.apply_reverse(self.config.gantry_calibration,
-                                        left)
+        right_deck, left_deck = self.deck_points_from_smoothie([right, left])
         deck_pos = {Axis.X: right_deck[0],
                     Axis.Y: right_deck[1],
                     Axis.by_mount(top_types.Mount.RIGHT): right_deck[2],
@@ -502,6 +536,39 @@ class API(HardwareAPILike):
         deck_pos.update(plunger_axes)
         return deck_pos
 
+    def _gantry_transforms(self) -> Tuple[np.ndarray, np.ndarray]:
+        """ The gantry calibration transform (deck to smoothie) and its
+        inverse, recomputed only when the configured calibration changes
+        """
+        calibration = self._config.gantry_calibration
+        if calibration is not self._transformed_calibration:
+            self._gantry_transform = np.array(calibration, dtype=float)
+            self._inverse_gantry_transform = inv(self._gantry_transform)
+            self._transformed_calibration = calibration
+        return self._gantry_transform, self._inverse_gantry_transform
+
+    def smoothie_points_from_deck(
+            self, points: Union[np.ndarray,
+                                List[Tuple[float, float, float]]])\
+            -> np.ndarray:
+        """ Apply the gantry calibration to an Nx3 array of deck-absolute
+        points, returning the Nx3 array of the corresponding smoothie
+        coordinates
+        """
+        transform, _ = self._gantry_transforms()
+        return linal.apply_transform_to_points(transform, points)
+
+    def deck_points_from_smoothie(
+            self, points: Union[np.ndarray,
+                                List[Tuple[float, float, float]]])\
+            -> np.ndarray:
+        """ Apply the inverse gantry calibration to an Nx3 array of smoothie
+        coordinates, returning the Nx3 array of the corresponding
+        deck-absolute points
+        """
+        _, inverse = self._gantry_transforms()
+        return linal.apply_transform_to_points(inverse, points)
+
     async def current_position(
             self,
             mount: top_types.Mount,
@@ -703,7 +770,7 @@ class API(HardwareAPILike):
         # size; unfortunately, mypy can’t quite figure out the length check
         # above that makes this OK
         transformed = linal.apply_transform(  # type: ignore
-            self.config.gantry_calibration, to_transform)
+            self._gantry_transforms()[0], to_transform)
 
         # Since target_position is an OrderedDict with the axes ordered by
         # (x, y, z, a, b, c), and we’ll only have one of a or z (as checked
@@ -732,8 +799,11 @@ class API(HardwareAPILike):
                                 bounds[ax.name][0], bounds[ax.name][1]))
         async with self._motion_lock:
             try:
-                self._backend.move(smoothie_pos, speed=speed,
-                                   home_flagged_axes=home_flagged_axes)
+                with profiler.span('backend.move', 'hardware',
+                                   speed=speed):
+                    await self._call_backend(
+                        self._backend.move, smoothie_pos, speed=speed,
+                        home_flagged_axes=home_flagged_axes)
             except Exception:
                 self._log.exception('Move failed')
                 self._current_position.clear()
@@ -758,7 +828,8 @@ class API(HardwareAPILike):
         """
         smoothie_ax = Axis.by_mount(mount).name.upper()
         async with self._motion_lock:
-            smoothie_pos = self._backend.fast_home(smoothie_ax, margin)
+            smoothie_pos = await self._call_backend(
+                self._backend.fast_home, smoothie_ax, margin)
             self._current_position = self._deck_from_smoothie(smoothie_pos)
 
     def _critical_point_for(
@@ -810,7 +881,11 @@ class API(HardwareAPILike):
         self._config = self._config._replace(**kwargs)
 
     async def update_deck_calibration(self, new_transform):
-        pass
+        """ Replace the gantry calibration transform.
+
+        :param new_transform: The new 4x4 deck calibration matrix
+        """
+        self.update_config(gantry_calibration=new_transform)
 
     @_log_call
     async def head_speed(self, combined_speed=None,
@@ -855,7 +930,9 @@ class API(HardwareAPILike):
                 this_pipette,
                 this_pipette.current_volume + asp_vol,
                 'aspirate')
-        speed = this_pipette.config.aspirate_flow_rate * rate
+        speed = self._plunger_speed(
+            this_pipette, this_pipette.config.aspirate_flow_rate * rate,
+            'aspirate')
         try:
             await self._move_plunger(mount, dist, speed=speed)
         except Exception:
@@ -901,7 +978,9 @@ class API(HardwareAPILike):
                 this_pipette,
                 this_pipette.current_volume - disp_vol,
                 'dispense')
-        speed = this_pipette.config.dispense_flow_rate * rate
+        speed = self._plunger_speed(
+            this_pipette, this_pipette.config.dispense_flow_rate * rate,
+            'dispense')
         try:
             await self._move_plunger(mount, dist, speed)
         except Exception:
@@ -917,6 +996,12 @@ class API(HardwareAPILike):
         position = mm + instr.config.bottom
         return round(position, 6)
 
+    def _plunger_speed(self, instr: Pipette, ul_per_s: float,
+                       action: str) -> float:
+        """ Convert a flow rate (in uL/s) to a plunger speed (in mm/s) """
+        mm_per_s = ul_per_s / instr.ul_per_mm(instr.config.max_volume, action)
+        return round(mm_per_s, 6)
+
     @_log_call
     async def blow_out(self, mount):
         """
@@ -1033,7 +1118,8 @@ class API(HardwareAPILike):
         if home_after:
             safety_margin = abs(bottom-droptip)
             async with self._motion_lock:
-                smoothie_pos = self._backend.fast_home(
+                smoothie_pos = await self._call_backend(
+                    self._backend.fast_home,
                     plunger_ax.name.upper(), safety_margin)
                 self._current_position = self._deck_from_smoothie(smoothie_pos)
             await self._move_plunger(mount, safety_margin)
@@ -1194,7 +1280,8 @@ class API(HardwareAPILike):
             # Probe and retrieve the position afterwards
             async with self._motion_lock:
                 self._current_position = self._deck_from_smoothie(
-                    self._backend.probe(
+                    await self._call_backend(
+                        self._backend.probe,
                         to_probe.name.lower(), hs.probe_distance))
             xyz = await self.gantry_position(mount)
             # Store the upated position.
@@ -1,27 +1,21 @@
 """ Adapters for the :py:class:`.hardware_control.API` instances.
 """
+import abc
 import asyncio
 import copy
 import functools
 import threading
-from typing import List, Mapping
+from typing import Dict, List
 
 from . import API
 from .types import Axis, HardwareAPILike
 
 
-class SynchronousAdapter(HardwareAPILike, threading.Thread):
-    """ A wrapper to make every call into :py:class:`.hardware_control.API`
-    synchronous.
-
-    Example
-    -------
-    .. code-block::
-    >>> import opentrons.hardware_control as hc
-    >>> import opentrons.hardware_control.adapters as adapts
-    >>> api = hc.API.build_hardware_simulator()
-    >>> synch = adapts.SynchronousAdapter(api)
-    >>> synch.home()
+class _SynchronizingAdapter(HardwareAPILike, abc.ABC):
+    """ The common parts of adapters that make every call into
+    :py:class:`.hardware_control.API` synchronous. Subclasses decide how a
+    coroutine is run to completion by defining :py:meth:`call_coroutine_sync`
+    and how attached modules are wrapped by defining :py:meth:`_wrap_module`.
     """
 
     @classmethod
@@ -38,55 +32,31 @@ class SynchronousAdapter(HardwareAPILike, threading.Thread):
         args = [arg for arg in args
                 if not isinstance(arg, asyncio.AbstractEventLoop)]
         if asyncio.iscoroutinefunction(builder):
-            checked_loop = build_loop or asyncio.get_event_loop()
-            api = checked_loop.run_until_complete(builder(*args, **kwargs))
+            api = cls._run_builder(
+                loop, build_loop, builder, *args, **kwargs)
         else:
             api = builder(*args, **kwargs)
         return cls(api, loop)
 
+    @classmethod
+    @abc.abstractmethod
+    def _run_builder(cls, loop, build_loop, builder, *args, **kwargs):
+        """ Run a coroutine builder to completion before the adapter exists
+        """
+        pass
+
     def __init__(self,
                  api: API,
-                 loop: asyncio.AbstractEventLoop = None) -> None:
-        """ Build the SynchronousAdapter.
-
-        :param api: The API instance to wrap
-        :param loop: A specific event loop to use. This is for the use of
-                     :py:meth:`build` and should normally not be used; since
-                     this loop will be run in a worker thread it should not
-                     be run elsewhere. If not specified (which should be the
-                     normal use case) the adapter will start a new event loop
-                     for the worker thread.
-        """
-        checked_loop = loop or asyncio.new_event_loop()
-        api.loop = checked_loop
-        self._loop = checked_loop
+                 loop: asyncio.AbstractEventLoop) -> None:
+        api.loop = loop
+        self._loop = loop
         self._api = api
-        self._call_lock = threading.Lock()
-        self._cached_sync_mods: Mapping[str, SynchronousAdapter] = {}
-        super().__init__(
-            target=self._event_loop_in_thread,
-            name='SynchAdapter thread for {}'.format(repr(api)))
-        super().start()
-
-    def _event_loop_in_thread(self):
-        loop = object.__getattribute__(self, '_loop')
-        loop.run_forever()
-        loop.close()
+        self._cached_sync_mods: Dict[str, _SynchronizingAdapter] = {}
 
-    def join(self):
-        thread_loop = object.__getattribute__(self, '_loop')
-        if thread_loop.is_running():
-            thread_loop.call_soon_threadsafe(lambda: thread_loop.stop())
-        super().join()
-
-    def __del__(self):
-        try:
-            thread_loop = object.__getattribute__(self, '_loop')
-        except AttributeError:
-            pass
-        else:
-            if thread_loop.is_running():
-                thread_loop.call_soon_threadsafe(lambda: thread_loop.stop())
+    @abc.abstractmethod
+    def _wrap_module(self, module) -> '_SynchronizingAdapter':
+        """ Wrap a newly discovered module in an adapter of this type """
+        pass
 
     def discover_modules(self):
         loop = object.__getattribute__(self, '_loop')
@@ -103,14 +73,16 @@ class SynchronousAdapter(HardwareAPILike, threading.Thread):
             self._cached_sync_mods.pop(mod_port)
         for mod_port in new:
             self._cached_sync_mods[mod_port] \
-                = SynchronousAdapter(async_mods[mod_port])
+                = self._wrap_module(async_mods[mod_port])
 
         return list(self._cached_sync_mods.values())
 
     @staticmethod
+    @abc.abstractmethod
     def call_coroutine_sync(loop, to_call, *args, **kwargs):
-        fut = asyncio.run_coroutine_threadsafe(to_call(*args, **kwargs), loop)
-        return fut.result()
+        """ Run ``to_call(*args, **kwargs)`` to completion and return its
+        result """
+        pass
 
     def __getattribute__(self, attr_name):
         """ Retrieve attributes from our API and wrap coroutines """
@@ -138,6 +110,148 @@ class SynchronousAdapter(HardwareAPILike, threading.Thread):
         return attr
 
 
+class SynchronousAdapter(_SynchronizingAdapter, threading.Thread):
+    """ A wrapper to make every call into :py:class:`.hardware_control.API`
+    synchronous.
+
+    Example
+    -------
+    .. code-block::
+    >>> import opentrons.hardware_control as hc
+    >>> import opentrons.hardware_control.adapters as adapts
+    >>> api = hc.API.build_hardware_simulator()
+    >>> synch = adapts.SynchronousAdapter(api)
+    >>> synch.home()
+    """
+
+    @classmethod
+    def _run_builder(cls, loop, build_loop, builder, *args, **kwargs):
+        checked_loop = build_loop or asyncio.get_event_loop()
+        return checked_loop.run_until_complete(builder(*args, **kwargs))
+
+    def __init__(self,
+                 api: API,
+                 loop: asyncio.AbstractEventLoop = None) -> None:
+        """ Build the SynchronousAdapter.
+
+        :param api: The API instance to wrap
+        :param loop: A specific event loop to use. This is for the use of
+                     :py:meth:`build` and should normally not be used; since
+                     this loop will be run in a worker thread it should not
+                     be run elsewhere. If not specified (which should be the
+                     normal use case) the adapter will start a new event loop
+                     for the worker thread.
+        """
+        _SynchronizingAdapter.__init__(
+            self, api, loop or asyncio.new_event_loop())
+        self._call_lock = threading.Lock()
+        threading.Thread.__init__(
+            self,
+            target=self._event_loop_in_thread,
+            name='SynchAdapter thread for {}'.format(repr(api)))
+        threading.Thread.start(self)
+
+    def _event_loop_in_thread(self):
+        loop = object.__getattribute__(self, '_loop')
+        loop.run_forever()
+        loop.close()
+
+    def join(self):
+        thread_loop = object.__getattribute__(self, '_loop')
+        if thread_loop.is_running():
+            thread_loop.call_soon_threadsafe(lambda: thread_loop.stop())
+        threading.Thread.join(self)
+
+    def __del__(self):
+        try:
+            thread_loop = object.__getattribute__(self, '_loop')
+        except AttributeError:
+            pass
+        else:
+            if thread_loop.is_running():
+                thread_loop.call_soon_threadsafe(lambda: thread_loop.stop())
+
+    def _wrap_module(self, module) -> 'SynchronousAdapter':
+        return SynchronousAdapter(module)
+
+    @staticmethod
+    def call_coroutine_sync(loop, to_call, *args, **kwargs):
+        fut = asyncio.run_coroutine_threadsafe(to_call(*args, **kwargs), loop)
+        return fut.result()
+
+
+class InlineAdapter(_SynchronizingAdapter):
+    """ A wrapper to make every call into :py:class:`.hardware_control.API`
+    synchronous without leaving the calling thread.
+
+    Where :py:class:`SynchronousAdapter` hands each coroutine to an event loop
+    running in a worker thread and blocks on the result, this adapter steps
+    the coroutine directly in the caller's thread. Simulated hardware calls
+    almost never suspend, so this avoids a cross-thread handoff per call;
+    when a coroutine does wait on a future, the adapter's own event loop is
+    run until the future resolves.
+
+    This is intended for headless simulation (see
+    :py:func:`opentrons.simulate.simulate`). Because it never runs its event
+    loop in the background, anything scheduled on the loop (rather than
+    awaited) only progresses while a call is waiting, and a call that waits
+    cannot be made from a thread that is already running an event loop.
+    Coroutines must also use the loop they were given (as the hardware API
+    does) rather than :py:func:`asyncio.get_event_loop`.
+
+    Example
+    -------
+    .. code-block::
+    >>> import opentrons.hardware_control as hc
+    >>> import opentrons.hardware_control.adapters as adapts
+    >>> inline = adapts.InlineAdapter.build(hc.API.build_hardware_simulator)
+    >>> inline.home()
+    """
+
+    @classmethod
+    def _run_builder(cls, loop, build_loop, builder, *args, **kwargs):
+        return cls.call_coroutine_sync(loop, builder, *args, **kwargs)
+
+    def __init__(self,
+                 api: API,
+                 loop: asyncio.AbstractEventLoop = None) -> None:
+        """ Build the InlineAdapter.
+
+        :param api: The API instance to wrap
+        :param loop: A specific event loop to use while a call is waiting on a
+                     future. If not specified, the adapter will create a new
+                     event loop.
+        """
+        super().__init__(api, loop or asyncio.new_event_loop())
+
+    def join(self):
+        """ Close the event loop. Provided for symmetry with
+        :py:meth:`SynchronousAdapter.join`; calls that wait on a future
+        will fail after this """
+        loop = object.__getattribute__(self, '_loop')
+        if not loop.is_running():
+            loop.close()
+
+    def _wrap_module(self, module) -> 'InlineAdapter':
+        return InlineAdapter(module, object.__getattribute__(self, '_loop'))
+
+    @staticmethod
+    def call_coroutine_sync(loop, to_call, *args, **kwargs):
+        coro = to_call(*args, **kwargs)
+        while True:
+            try:
+                waiting_on = coro.send(None)
+            except StopIteration as done:
+                return done.value
+            if waiting_on is not None:
+                # This is the handshake asyncio.Task does with a future a
+                # coroutine awaits: the future's result (or exception) is
+                # delivered to the coroutine when it is next resumed
+                waiting_on._asyncio_future_blocking = False
+                loop.run_until_complete(
+                    asyncio.wait([waiting_on], loop=loop))
+
+
 class SingletonAdapter(HardwareAPILike):
     """ A wrapper to use as a global singleton to control hardware.
 
@@ -0,0 +1,119 @@
+"""
+A modeled clock for simulations.
+
+The hardware simulator does everything instantly, so on its own it says
+nothing about how long a protocol would take to run on a robot. A
+:py:class:`ModeledClock` keeps track of how long each thing the simulator
+does would have taken instead: moves are timed with a trapezoidal velocity
+profile for each axis (accelerating, cruising and decelerating, using the
+speeds and accelerations in the robot config), delays take as long as they
+ask for, and simulated modules report when their temperature ramps finish.
+
+These are estimates; they leave out things like the time spent talking to
+the motor controller, but are close enough to plan runs with.
+"""
+import math
+from typing import Dict, Mapping
+
+#: The temperature (in C) simulated modules start at
+AMBIENT_TEMPERATURE = 25.0
+
+
+def move_time(distance: float,
+              max_speed: float,
+              acceleration: float) -> float:
+    """ How long (in seconds) an axis takes to move a distance, starting and
+    ending at rest.
+
+    :param distance: The distance to move, in mm
+    :param max_speed: The fastest the axis may move, in mm/s
+    :param acceleration: The acceleration of the axis, in mm/s^2
+    """
+    distance = abs(distance)
+    if not distance:
+        return 0.0
+    # The distance covered speeding up to max_speed and slowing back down
+    ramps = max_speed ** 2 / acceleration
+    if distance >= ramps:
+        return distance / max_speed + max_speed / acceleration
+    # Too short to reach max_speed: accelerate half way, then decelerate
+    return 2 * math.sqrt(distance / acceleration)
+
+
+class ModeledClock:
+    """ A clock that is advanced by simulated actions """
+
+    def __init__(self,
+                 max_speeds: Mapping[str, float],
+                 acceleration: Mapping[str, float]) -> None:
+        """ Build the clock.
+
+        :param max_speeds: The maximum speed of each axis in mm/s, by axis
+                           name (``'X'``, ``'Y'``, ``'Z'``...)
+        :param acceleration: The acceleration of each axis in mm/s^2
+        """
+        self._max_speeds: Dict[str, float] = dict(max_speeds)
+        self._acceleration: Dict[str, float] = dict(acceleration)
+        self._elapsed = 0.0
+
+    @classmethod
+    def from_config(cls, config) -> 'ModeledClock':
+        """ Build a clock for the speeds and accelerations in a robot
+        config """
+        return cls(config.default_max_speed, config.acceleration)
+
+    @property
+    def elapsed(self) -> float:
+        """ The modeled time since the clock was built, in seconds """
+        return self._elapsed
+
+    def advance(self, seconds: float) -> float:
+        """ Move the clock forward.
+
+        :returns: The modeled time afterwards
+        """
+        self._elapsed += max(seconds, 0.0)
+        return self._elapsed
+
+    def advance_to(self, timestamp: float) -> float:
+        """ Move the clock forward to a modeled time, if it is not already
+        past it.
+
+        :returns: The modeled time afterwards
+        """
+        self._elapsed = max(self._elapsed, timestamp)
+        return self._elapsed
+
+    def move(self,
+             start: Mapping[str, float],
+             target: Mapping[str, float],
+             speed: float = None) -> float:
+        """ Advance the clock by the time a move takes. The axes move at the
+        same time, so the move takes as long as the slowest of them.
+
+        :param start: The position of each axis before the move
+        :param target: The position of each axis that moves
+        :param speed: A speed limit for the move, in mm/s, as passed to the
+                      hardware backend
+        :returns: How long the move takes, in seconds
+        """
+        duration = 0.0
+        for axis, position in target.items():
+            max_speed = self._max_speeds[axis]
+            if speed:
+                max_speed = min(max_speed, speed)
+            duration = max(duration, move_time(
+                position - start.get(axis, position),
+                max_speed, self._acceleration[axis]))
+        self.advance(duration)
+        return duration
+
+    def ramp(self, start: float, target: float, rate: float) -> float:
+        """ When a temperature ramp started now will finish.
+
+        :param start: The starting temperature, in C
+        :param target: The target temperature, in C
+        :param rate: How fast the temperature changes, in C/s
+        :returns: The modeled time the ramp finishes at
+        """
+        return self._elapsed + abs(target - start) / rate
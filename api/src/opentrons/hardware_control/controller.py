@@ -7,6 +7,7 @@ from typing import Any, Dict, List, Optional, Tuple
 from opentrons.drivers.smoothie_drivers import driver_3_0
 from opentrons.drivers.rpi_drivers import gpio
 import opentrons.config
+from opentrons.config import feature_flags as ff
 from opentrons.types import Mount
 
 from . import modules
@@ -179,6 +180,7 @@ class Controller:
 
     async def connect(self, port: str = None):
         self._smoothie_driver.connect(port)
+        self._smoothie_driver.set_streaming(ff.enable_gcode_streaming())
         await self.update_fw_version()
 
     @contextmanager
@@ -5,6 +5,7 @@ import re
 from typing import List, Optional, Tuple
 
 from opentrons.config import IS_ROBOT
+from ..clock import ModeledClock
 from .mod_abc import AbstractModule
 # Must import tempdeck and magdeck (and other modules going forward) so they
 # actually create the subclasses
@@ -33,9 +34,11 @@ async def build(
         port: str,
         which: str,
         simulating: bool,
-        interrupt_callback) -> AbstractModule:
+        interrupt_callback,
+        clock: ModeledClock = None) -> AbstractModule:
     return await MODULE_TYPES[which].build(
-        port, interrupt_callback=interrupt_callback, simulating=simulating)
+        port, interrupt_callback=interrupt_callback, simulating=simulating,
+        clock=clock)
 
 
 def discover() -> List[Tuple[str, str]]:
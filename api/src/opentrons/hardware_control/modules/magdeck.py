@@ -2,6 +2,7 @@ import asyncio
 from typing import Union
 from opentrons.drivers.mag_deck import MagDeck as MagDeckDriver
 from . import update, mod_abc
+from ..clock import ModeledClock
 
 LABWARE_ENGAGE_HEIGHT = {'biorad-hardshell-96-PCR': 18}    # mm
 MAX_ENGAGE_HEIGHT = 45  # mm from home position
@@ -53,10 +54,11 @@ class MagDeck(mod_abc.AbstractModule):
                     port,
                     interrupt_callback,
                     simulating=False,
-                    loop: asyncio.AbstractEventLoop = None):
+                    loop: asyncio.AbstractEventLoop = None,
+                    clock: ModeledClock = None):
         # MagDeck does not currently use interrupts, so the callback is not
         # passed on
-        mod = cls(port, simulating, loop)
+        mod = cls(port, simulating, loop, clock)
         await mod._connect()
         return mod
 
@@ -71,7 +73,10 @@ class MagDeck(mod_abc.AbstractModule):
     def __init__(self,
                  port,
                  simulating,
-                 loop: asyncio.AbstractEventLoop = None):
+                 loop: asyncio.AbstractEventLoop = None,
+                 clock: ModeledClock = None):
+        # Magnet moves are short, so a simulated MagDeck doesn't advance the
+        # modeled clock
         self._engaged = False
         self._port = port
         if simulating:
@@ -88,29 +93,29 @@ class MagDeck(mod_abc.AbstractModule):
 
         self._device_info = None
 
-    def calibrate(self):
+    async def calibrate(self):
         """
         Calibration involves probing for top plate to get the plate height
         """
-        self._driver.probe_plate()
+        await self._call_driver(self._driver.probe_plate)
         # return if successful or not?
         self._engaged = False
 
-    def engage(self, height):
+    async def engage(self, height):
         """
         Move the magnet to a specific height, in mm from home position
         """
         if height > MAX_ENGAGE_HEIGHT or height < 0:
             raise ValueError('Invalid engage height. Should be 0 to {}'.format(
                 MAX_ENGAGE_HEIGHT))
-        self._driver.move(height)
+        await self._call_driver(self._driver.move, height)
         self._engaged = True
 
-    def deactivate(self):
+    async def deactivate(self):
         """
         Home the magnet
         """
-        self._driver.home()
+        await self._call_driver(self._driver.home)
         self._engaged = False
 
     @property
@@ -160,8 +165,9 @@ class MagDeck(mod_abc.AbstractModule):
         """
         Connect to the serial port
         """
-        self._driver.connect(self._port)
-        self._device_info = self._driver.get_device_info()
+        await self._call_driver(self._driver.connect, self._port)
+        self._device_info = await self._call_driver(
+            self._driver.get_device_info)
 
     def _disconnect(self):
         """
@@ -1,6 +1,9 @@
 import abc
+import asyncio
 from typing import Dict, Callable
 
+from ..clock import ModeledClock
+
 
 class AbstractModule(abc.ABC):
     """ Defines the common methods of a module. """
@@ -10,11 +13,16 @@ class AbstractModule(abc.ABC):
     async def build(cls,
                     port: str,
                     interrupt_callback,
-                    simulating: bool = False) -> 'AbstractModule':
+                    simulating: bool = False,
+                    loop: asyncio.AbstractEventLoop = None,
+                    clock: ModeledClock = None) -> 'AbstractModule':
         """ Modules should always be created using this factory.
 
         This lets the (perhaps blocking) work of connecting to and initializing
         a module be in a place that can be async.
+
+        A simulating module may advance ``clock`` by how long its actions
+        would take.
         """
         pass
 
@@ -71,6 +79,23 @@ class AbstractModule(abc.ABC):
     def interrupt_callback(self) -> Callable[[str], None]:
         pass
 
+    @property
+    @abc.abstractmethod
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """ The event loop the module's coroutines run on. """
+        pass
+
+    async def _call_driver(self, func, *args):
+        """ Call a driver method that waits on the module's serial port.
+
+        A real driver blocks until the module responds, so the call is made
+        on an executor thread and the event loop stays free; a simulating
+        driver does no I/O and is called directly.
+        """
+        if self.is_simulated:
+            return func(*args)
+        return await self.loop.run_in_executor(None, func, *args)
+
     @classmethod
     @abc.abstractmethod
     def name(cls) -> str:
@@ -3,27 +3,48 @@ from threading import Thread, Event
 from typing import Union
 from opentrons.drivers.temp_deck import TempDeck as TempDeckDriver
 from . import update, mod_abc
+from ..clock import ModeledClock, AMBIENT_TEMPERATURE
 
 TEMP_POLL_INTERVAL_SECS = 1
 
+#: How fast (in C/s) a simulated module heats or cools, which is roughly
+#: how fast a real one does
+SIMULATED_RAMP_RATE = 0.1
+
 
 class MissingDevicePortError(Exception):
     pass
 
 
 class SimulatingDriver:
-    def __init__(self):
+    def __init__(self, clock: ModeledClock = None):
         self._target_temp = 0
         self._active = False
         self._port = None
+        self._clock = clock
+        # The temperature the modeled module is ramping to, and when
+        # (by the modeled clock) it gets there
+        self._modeled_temp = AMBIENT_TEMPERATURE
+        self._ready_at = 0.0
 
     def set_temperature(self, celsius):
         self._target_temp = celsius
         self._active = True
+        if self._clock:
+            self._ready_at = self._clock.ramp(
+                self._modeled_temp, celsius, SIMULATED_RAMP_RATE)
+            self._modeled_temp = celsius
 
     def deactivate(self):
         self._target_temp = 0
         self._active = False
+        # The module drifts back to ambient, which nothing waits for
+        self._modeled_temp = AMBIENT_TEMPERATURE
+
+    def wait_for_target(self):
+        """ Advance the modeled clock to when the target is reached """
+        if self._clock and self._active:
+            self._clock.advance_to(self._ready_at)
 
     def update_temperature(self):
         pass
@@ -80,12 +101,13 @@ class TempDeck(mod_abc.AbstractModule):
                     port,
                     interrupt_callback,
                     simulating=False,
-                    loop: asyncio.AbstractEventLoop = None):
+                    loop: asyncio.AbstractEventLoop = None,
+                    clock: ModeledClock = None):
 
         """ Build and connect to a TempDeck"""
         # TempDeck does not currently use interrupts, so the callback is not
         # passed on
-        mod = cls(port, simulating, loop)
+        mod = cls(port, simulating, loop, clock)
         await mod._connect()
         return mod
 
@@ -100,10 +122,11 @@ class TempDeck(mod_abc.AbstractModule):
     def __init__(self,
                  port,
                  simulating,
-                 loop: asyncio.AbstractEventLoop = None) -> None:
+                 loop: asyncio.AbstractEventLoop = None,
+                 clock: ModeledClock = None) -> None:
         if simulating:
             self._driver: Union['SimulatingDriver', 'TempDeckDriver'] \
-                = SimulatingDriver()
+                = SimulatingDriver(clock)
         else:
             self._driver: Union['SimulatingDriver', 'TempDeckDriver'] \
                 = TempDeckDriver()
@@ -117,7 +140,7 @@ class TempDeck(mod_abc.AbstractModule):
         self._device_info = None
         self._poller = None
 
-    def set_temperature(self, celsius):
+    async def set_temperature(self, celsius):
         """
         Set temperature in degree Celsius
         Range: 4 to 95 degree Celsius (QA tested).
@@ -125,16 +148,19 @@ class TempDeck(mod_abc.AbstractModule):
         temperature display. Any input outside of this range will be clipped
         to the nearest limit
         """
-        return self._driver.set_temperature(celsius)
+        return await self._call_driver(self._driver.set_temperature, celsius)
 
-    def deactivate(self):
+    async def deactivate(self):
         """ Stop heating/cooling and turn off the fan """
-        self._driver.deactivate()
+        await self._call_driver(self._driver.deactivate)
 
     async def wait_for_temp(self):
         """
         This method exits only if set temperature has reached.Subject to change
         """
+        if isinstance(self._driver, SimulatingDriver):
+            self._driver.wait_for_target()
+            return
         while self.status != 'holding at target':
             await asyncio.sleep(0.1)
 
@@ -192,8 +218,9 @@ class TempDeck(mod_abc.AbstractModule):
         """
         if self._poller:
             self._poller.join()
-        self._driver.connect(self._port)
-        self._device_info = self._driver.get_device_info()
+        await self._call_driver(self._driver.connect, self._port)
+        self._device_info = await self._call_driver(
+            self._driver.get_device_info)
         self._poller = Poller(self._driver)
         self._poller.start()
 
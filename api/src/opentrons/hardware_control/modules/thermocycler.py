@@ -1,18 +1,28 @@
 import asyncio
 from . import mod_abc
-from typing import Union
+from typing import Optional, Union
 from opentrons.drivers.thermocycler.driver import (
     Thermocycler as ThermocyclerDriver, ThermocyclerError)
+from ..clock import ModeledClock, AMBIENT_TEMPERATURE
+
+#: How fast (in C/s) a simulated block heats or cools when no ramp rate is
+#: given, which is roughly how fast a real one does on average
+SIMULATED_RAMP_RATE = 2.0
 
 
 class SimulatingDriver:
-    def __init__(self):
-        self._target_temp = None
-        self._ramp_rate = None
-        self._hold_time = None
+    def __init__(self, clock: ModeledClock = None):
+        self._target_temp: Optional[float] = None
+        self._ramp_rate: Optional[float] = None
+        self._hold_time: Optional[float] = None
         self._active = False
         self._port = None
         self._lid_status = 'open'
+        self._clock = clock
+        # The temperature the modeled block is ramping to, and when (by the
+        # modeled clock) it gets there
+        self._modeled_temp = AMBIENT_TEMPERATURE
+        self._ready_at = 0.0
 
     async def open(self):
         if self._active:
@@ -64,12 +74,22 @@ class SimulatingDriver:
         self._hold_time = hold_time
         self._ramp_rate = ramp_rate
         self._active = True
+        if self._clock:
+            self._ready_at = self._clock.ramp(
+                self._modeled_temp, temp, ramp_rate or SIMULATED_RAMP_RATE)
+            self._modeled_temp = temp
 
     async def deactivate(self):
         self._target_temp = None
         self._ramp_rate = None
         self._hold_time = None
         self._active = None
+        self._modeled_temp = AMBIENT_TEMPERATURE
+
+    def wait_for_target(self):
+        """ Advance the modeled clock to when the target is reached """
+        if self._clock and self._active:
+            self._clock.advance_to(self._ready_at)
 
     async def get_device_info(self):
         return {'serial': 'dummySerial',
@@ -86,11 +106,12 @@ class Thermocycler(mod_abc.AbstractModule):
                     port,
                     interrupt_callback,
                     simulating=False,
-                    loop: asyncio.AbstractEventLoop = None):
+                    loop: asyncio.AbstractEventLoop = None,
+                    clock: ModeledClock = None):
         """Build and connect to a Thermocycler
         """
 
-        mod = cls(port, interrupt_callback, simulating, loop)
+        mod = cls(port, interrupt_callback, simulating, loop, clock)
         await mod._connect()
         return mod
 
@@ -106,11 +127,12 @@ class Thermocycler(mod_abc.AbstractModule):
                  port,
                  interrupt_callback=None,
                  simulating=False,
-                 loop: asyncio.AbstractEventLoop = None) -> None:
+                 loop: asyncio.AbstractEventLoop = None,
+                 clock: ModeledClock = None) -> None:
         self._interrupt_cb = interrupt_callback
         if simulating:
             self._driver: Union['SimulatingDriver', 'ThermocyclerDriver'] \
-                = SimulatingDriver()
+                = SimulatingDriver(clock)
         else:
             self._driver: Union['SimulatingDriver', 'ThermocyclerDriver'] \
                 = ThermocyclerDriver(interrupt_callback)
@@ -146,6 +168,9 @@ class Thermocycler(mod_abc.AbstractModule):
 
         Subject to change without a version bump.
         """
+        if isinstance(self._driver, SimulatingDriver):
+            self._driver.wait_for_target()
+            return
         while self.status != 'holding at target':
             await asyncio.sleep(0.1)
 
@@ -199,7 +224,7 @@ class Thermocycler(mod_abc.AbstractModule):
     def interrupt_callback(self):
         """ Fetch the current interrupt callback
 
-        Exposes the interrupt callback used with the TCPoller, so it can be re-
+        Exposes the interrupt callback used by the driver, so it can be re-
         hooked in the new module instance after a firmware update.
         """
         return self._interrupt_cb
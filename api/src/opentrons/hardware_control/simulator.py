@@ -5,9 +5,11 @@ from threading import Event
 from typing import Dict, Optional, List, Tuple
 from contextlib import contextmanager
 from opentrons import types
+from opentrons.config import robot_configs
 from opentrons.config.pipette_config import config_models
 from opentrons.drivers.smoothie_drivers import SimulatingDriver
 from . import modules
+from .clock import ModeledClock
 
 
 MODULE_LOG = logging.getLogger(__name__)
@@ -32,6 +34,9 @@ class Simulator:
     """ This is a subclass of hardware_control that only simulates the
     hardware actions. It is suitable for use on a dev machine or on
     a robot with no smoothie connected.
+
+    Although every action completes instantly, the simulator keeps track of
+    how long each would take on a robot in :py:attr:`clock`.
     """
     def __init__(
             self,
@@ -90,12 +95,15 @@ class Simulator:
         self._run_flag = Event()
         self._log = MODULE_LOG.getChild(repr(self))
         self._strict_attached = bool(strict_attached_instruments)
+        #: The modeled time the simulated actions would take
+        self.clock = ModeledClock.from_config(config or robot_configs.load())
 
     def move(self, target_position: Dict[str, float],
              home_flagged_axes: bool = True, speed: float = None):
         if self._run_flag.is_set():
             self._log.warning("Move to {} would be blocked by pause"
                               .format(target_position))
+        self.clock.move(self._position, target_position, speed)
         self._position.update(target_position)
         self._engaged_axes.update({ax: True
                                    for ax in target_position})
@@ -105,6 +113,8 @@ class Simulator:
             self._log.warning("Home would be blocked by pause")
         # driver_3_0-> HOMED_POSITION
         checked_axes = axes or 'XYZABC'
+        self.clock.move(self._position,
+                        {ax: _HOME_POSITION[ax] for ax in checked_axes})
         self._position.update({ax: _HOME_POSITION[ax]
                                for ax in checked_axes})
         self._engaged_axes.update({ax: True
@@ -112,6 +122,7 @@ class Simulator:
         return self._position
 
     def fast_home(self, axis: str, margin: float) -> Dict[str, float]:
+        self.clock.move(self._position, {axis: _HOME_POSITION[axis]})
         self._position[axis] = _HOME_POSITION[axis]
         self._engaged_axes[axis] = True
         return self._position
@@ -190,7 +201,8 @@ class Simulator:
             port=port,
             which=model,
             simulating=True,
-            interrupt_callback=interrupt_callback)
+            interrupt_callback=interrupt_callback,
+            clock=self.clock)
 
     async def update_module(
             self, module: modules.AbstractModule,
@@ -249,4 +261,5 @@ class Simulator:
     async def delay(self, duration_s: int):
         """ Pause and unpause, but without the actual delay """
         self.pause()
+        self.clock.advance(duration_s)
         self.resume()
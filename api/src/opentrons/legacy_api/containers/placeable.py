@@ -87,8 +87,17 @@ class Placeable(object):
     * traverse
     * retrieve items by name
     * calculate coordinates in different reference systems
+
+    Children are also kept in a tuple, and the coordinates of every
+    :Placeable: cached for each reference they are requested for. The child
+    tuple is rebuilt after a child is added, and the coordinates after any
+    :Placeable: is added to another or given new coordinates.
     """
 
+    # Incremented whenever any :Placeable: moves, which invalidates the
+    # cached coordinates of every :Placeable:
+    _generation = 0
+
     def __init__(self, parent=None, properties=None):
         """
         Initiaize placeable.
@@ -102,6 +111,10 @@ class Placeable(object):
         # by name and by reference
         self.children_by_name = OrderedDict()
         self.children_by_reference = OrderedDict()
+        self._children_cache = None
+        self._child_indices = None
+        self._coordinates_cache = {}
+        self._cache_generation = -1
         self._coordinates = Vector(0, 0, 0)
 
         self.parent = parent
@@ -134,7 +147,7 @@ class Placeable(object):
         if isinstance(name, slice):
             return self.get_children_from_slice(name)
         elif isinstance(name, int):
-            return self.get_children_list()[name]
+            return self._children()[name]
         elif isinstance(name, str):
             return self.get_child_by_name(name)
         else:
@@ -158,10 +171,10 @@ class Placeable(object):
         )
 
     def __iter__(self):
-        return iter(self.get_children_list())
+        return iter(self._children())
 
     def __len__(self):
-        return len(self.get_children_list())
+        return len(self._children())
 
     def __bool__(self):
         return True
@@ -174,21 +187,33 @@ class Placeable(object):
         if not self.get_parent():
             raise Exception('Must have a parent')
 
-        children = self.parent.get_children_list()
-        my_loc = children.index(self)
+        children = self.parent._children()
+        my_loc = self.parent._index_of(self)
         return children[my_loc + 1]
 
+    @property
+    def _coordinates(self):
+        """
+        The :Vector: from the parent's origin to this :Placeable:'s
+        """
+        return self._relative_coordinates
+
+    @_coordinates.setter
+    def _coordinates(self, coordinates):
+        self._relative_coordinates = coordinates
+        Placeable._generation += 1
+
     def iter(self):
         """
         Returns an iterable built from this Placeable's children list
         """
-        return iter(self.get_children_list())
+        return iter(self._children())
 
     def cycle(self):
         """
         Returns an itertools.cycle from this Placeable's children list
         """
-        return itertools.cycle(self.get_children_list())
+        return itertools.cycle(self._children())
 
     def get_name(self):
         """
@@ -209,7 +234,29 @@ class Placeable(object):
         """
         Returns the list of children in the order they were added
         """
-        return list(self.children_by_reference.keys())
+        return list(self._children())
+
+    def _children(self):
+        """
+        Returns the tuple of children in the order they were added, cached
+        until a child is added
+        """
+        if self._children_cache is None:
+            self._children_cache = tuple(self.children_by_reference)
+            self._child_indices = {
+                child: index
+                for index, child in enumerate(self._children_cache)}
+        return self._children_cache
+
+    def _index_of(self, child):
+        """
+        Returns the index of :child: in the children list
+        """
+        self._children()
+        try:
+            return self._child_indices[child]
+        except KeyError:
+            raise ValueError('{} is not a child of {}'.format(child, self))
 
     def get_path(self, reference=None):
         """
@@ -241,8 +288,18 @@ class Placeable(object):
         """
         Returns the coordinates of a :Placeable: relative to :reference:
         """
-        coordinates = [i._coordinates for i in self.get_trace(reference)]
-        return functools.reduce(lambda a, b: a + b, coordinates)
+        if self._cache_generation != Placeable._generation:
+            self._coordinates_cache = {}
+            self._cache_generation = Placeable._generation
+        try:
+            return self._coordinates_cache[reference]
+        except KeyError:
+            pass
+        coordinates = functools.reduce(
+            lambda a, b: a + b,
+            [i._coordinates for i in self.get_trace(reference)])
+        self._coordinates_cache[reference] = coordinates
+        return coordinates
 
     def add(self, child, name=None, coordinates=None):
         """
@@ -264,6 +321,8 @@ class Placeable(object):
         child.parent = self
         self.children_by_name[name] = child
         self.children_by_reference[child] = name
+        self._children_cache = None
+        Placeable._generation += 1
 
     def get_deck(self):
         """
@@ -304,8 +363,7 @@ class Placeable(object):
         """
         Retrieves child's name by index
         """
-        return self.get_children_list().index(
-            self.get_child_by_name(name))
+        return self._index_of(self.get_child_by_name(name))
 
     def get_children_from_slice(self, s):
         """
@@ -317,7 +375,7 @@ class Placeable(object):
         if isinstance(s.stop, str):
             s = slice(
                 s.start, self.get_index_from_name(s.stop), s.step)
-        return WellSeries(self.get_children_list()[s])
+        return WellSeries(list(self._children()[s]))
 
     def has_children(self):
         """
@@ -364,7 +422,7 @@ class Placeable(object):
         """
         Returns all children recursively
         """
-        my_children = self.get_children_list()
+        my_children = self._children()
         children = []
         children.extend(my_children)
         for child in my_children:
@@ -670,12 +728,11 @@ class Container(Placeable):
         step = kwargs.get('step', 1)
         length = kwargs.get('length', 1)
 
-        wrapped_wells = [
-            w
-            for i in range(3)
-            for w in self.get_children_list()
-        ]
-        total_kids = len(self.get_children_list())
+        children = self._children()
+        total_kids = len(children)
+        # Indices into the children list repeated three times, so the
+        # selection can wrap around either end
+        wrapped_indices = range(total_kids * 3)
 
         if isinstance(start, str):
             start = self.get_index_from_name(start)
@@ -688,14 +745,16 @@ class Container(Placeable):
             elif stop < start:
                 stop -= 1
                 step = step * -1 if step > 0 else step
-            return WellSeries(
-                wrapped_wells[start + total_kids:stop + total_kids:step])
+            return WellSeries([
+                children[i % total_kids] for i in
+                wrapped_indices[start + total_kids:stop + total_kids:step]])
         else:
             if length < 0:
                 length *= -1
                 step = step * -1 if step > 0 else step
-            return WellSeries(
-                wrapped_wells[start + total_kids::step][:length])
+            return WellSeries([
+                children[i % total_kids] for i in
+                wrapped_indices[start + total_kids::step][:length]])
 
     def _parse_wells_x_y(self, *args, **kwargs):
         x = kwargs.get('x', None)
@@ -731,6 +790,7 @@ class WellSeries(Container):
             self.values = wells
         self.offset = 0
         self.name = name
+        self._value_indices = None
 
     def set_offset(self, offset):
         """
@@ -770,5 +830,21 @@ class WellSeries(Container):
     def get_children_list(self):
         return list(self.values)
 
+    def _children(self):
+        return self.values
+
+    def _index_of(self, child):
+        if self._value_indices is None:
+            self._value_indices = {}
+            for index, well in enumerate(self.values):
+                self._value_indices.setdefault(well, index)
+        try:
+            return self._value_indices[child]
+        except KeyError:
+            raise ValueError('{} is not in {}'.format(child, self))
+
+    def coordinates(self, reference=None):
+        return self.values[self.offset].coordinates(reference)
+
     def get_child_by_name(self, name):
         return self.items.get(name)
@@ -495,6 +495,7 @@ class Robot(CommandPublisher):
         """
 
         self._driver.connect(port=port)
+        self._driver.set_streaming(fflags.enable_gcode_streaming())
         self.fw_version = self._driver.get_fw_version()
 
         # the below call to `cache_instrument_models` is relied upon by
@@ -2,8 +2,9 @@ import asyncio
 import contextlib
 import logging
 from .labware import (Well, Labware, load, load_module, ModuleGeometry,
-                      quirks_from_any_parent, ThermocyclerGeometry)
-from typing import Any, Dict, List, Optional, Union, Tuple, Sequence
+                      quirks_from_any_parent, ThermocyclerGeometry,
+                      select_tiprack_from_list)
+from typing import Any, Dict, List, Optional, Union, Sequence
 from opentrons import types, hardware_control as hc, commands as cmds
 from opentrons.commands import CommandPublisher
 import opentrons.config.robot_configs as rc
@@ -48,7 +49,8 @@ class ProtocolContext(CommandPublisher):
                 self._is_orig = True
                 self._current = adapters.SynchronousAdapter.build(
                     hc.API.build_hardware_simulator)
-            elif isinstance(hardware, adapters.SynchronousAdapter):
+            elif isinstance(hardware, (adapters.SynchronousAdapter,
+                                       adapters.InlineAdapter)):
                 self._is_orig = False
                 self._current = hardware
             else:
@@ -63,7 +65,8 @@ class ProtocolContext(CommandPublisher):
             if self._is_orig:
                 self._is_orig = False
                 self._current.join()
-            if isinstance(hardware, adapters.SynchronousAdapter):
+            if isinstance(hardware, (adapters.SynchronousAdapter,
+                                     adapters.InlineAdapter)):
                 self._current = hardware
             elif isinstance(hardware, hc.HardwareAPILike):
                 self._current = adapters.SynchronousAdapter(hardware)
@@ -273,8 +276,12 @@ class ProtocolContext(CommandPublisher):
                 'magdeck': modules.magdeck.MagDeck,
                 'tempdeck': modules.tempdeck.TempDeck,
                 'thermocycler': modules.thermocycler.Thermocycler}[hc_mod_name]
-            hc_mod_instance = mod_type(
-                port='', simulating=True, loop=self._loop)
+            # Simulated modules are stepped inline, like the hardware in
+            # a simulation, so that their coroutines actually run
+            hc_mod_instance = adapters.InlineAdapter(
+                mod_type(port='', simulating=True, loop=self._loop,
+                         clock=hw.clock),
+                self._loop)
         if hc_mod_instance:
             mod_ctx = mod_class(self,
                                 hc_mod_instance,
@@ -920,17 +927,6 @@ class InstrumentContext(CommandPublisher):
         """
         num_channels = self.channels
 
-        def _select_tiprack_from_list(tip_racks) -> Tuple[Labware, Well]:
-            try:
-                tr = tip_racks[0]
-            except IndexError:
-                raise OutOfTipsError
-            next_tip = tr.next_tip(num_channels)
-            if next_tip:
-                return tr, next_tip
-            else:
-                return _select_tiprack_from_list(tip_racks[1:])
-
         if location and isinstance(location, types.Location):
             if isinstance(location.labware, Labware):
                 tiprack = location.labware
@@ -944,7 +940,10 @@ class InstrumentContext(CommandPublisher):
             tiprack = location.parent
             target = location
         elif not location:
-            tiprack, target = _select_tiprack_from_list(self.tip_racks)
+            selected = select_tiprack_from_list(self.tip_racks, num_channels)
+            if not selected:
+                raise OutOfTipsError
+            tiprack, target = selected
         else:
             raise TypeError(
                 "If specified, location should be an instance of "
@@ -1188,6 +1187,13 @@ class InstrumentContext(CommandPublisher):
               gradient is linear (lambda x: x), however a method can be passed
               with the `gradient` keyword argument to create a custom curve.
 
+            * *optimize_order* (``boolean``) --
+              (:py:meth:`distribute` and :py:meth:`consolidate` only) If
+              `True`, the destinations (or sources) may be visited in a
+              different order than they are given in, keeping the wells of
+              each labware together and the travel between them short. See
+              :py:attr:`.Transfer.optimize_order`. `False` by default.
+
         :returns: This instance
         """
         self._log.debug("Transfer {} from {} to {}".format(
@@ -1248,7 +1254,8 @@ class InstrumentContext(CommandPublisher):
             drop_tip_strategy=drop_tip,
             blow_out_strategy=blow_out or default_args.blow_out_strategy,
             touch_tip_strategy=(touch_tip or
-                                default_args.touch_tip_strategy)
+                                default_args.touch_tip_strategy),
+            optimize_order=bool(kwargs.get('optimize_order'))
         )
         transfer_options = transfers.TransferOptions(transfer=transfer_args,
                                                      mix=mix_opts)
@@ -1258,8 +1265,13 @@ class InstrumentContext(CommandPublisher):
         return self
 
     def _execute_transfer(self, plan: transfers.TransferPlan):
-        for cmd in plan:
-            getattr(self, cmd['method'])(*cmd['args'], **cmd['kwargs'])
+        methods: Dict[str, Any] = {}
+        for method, args, kwargs in plan.commands():
+            try:
+                call = methods[method]
+            except KeyError:
+                call = methods[method] = getattr(self, method)
+            call(*args, **kwargs)
 
     def delay(self):
         return self._ctx.delay()
@@ -1292,6 +1304,7 @@ class InstrumentContext(CommandPublisher):
         moves = geometry.plan_moves(from_loc, location, self._ctx.deck,
                                     force_direct=force_direct,
                                     minimum_z_height=minimum_z_height)
+        moves = geometry.optimize_moves(from_loc.point, cp_override, moves)
         self._log.debug("move_to: {}->{} via:\n\t{}"
                         .format(from_loc, location, moves))
         try:
@@ -1667,7 +1680,9 @@ class MagneticModuleContext(ModuleContext):
                 "Currently loaded labware {} does not have a known engage "
                 "height; please specify explicitly with the height param"
                 .format(self.labware))
-        self._module.engage(dist)
+        # The module is wrapped in an adapter that runs its coroutines to
+        # completion, so there is nothing to await here
+        self._module.engage(dist)  # type: ignore
 
     @cmds.publish.both(command=cmds.magdeck_disengage)
     def disengage(self):
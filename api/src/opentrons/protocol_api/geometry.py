@@ -1,7 +1,8 @@
 from collections import UserDict
 import functools
 import logging
-from typing import List, Optional, Tuple, Union
+import math
+from typing import Dict, List, Optional, Tuple, Union
 
 from opentrons import types
 from .labware import (Labware, Well, ModuleGeometry,
@@ -11,6 +12,16 @@ from opentrons.hardware_control.types import CriticalPoint
 
 MODULE_LOG = logging.getLogger(__name__)
 
+#: How far from the path of the critical point (in mm, in X and Y) a pipette
+#: may reach when deciding which slots a move passes over. Multichannel
+#: pipettes reach furthest, along Y
+PATH_CLEARANCE = types.Point(30.0, 70.0, 0.0)
+
+#: Moves shorter than this (in mm) are considered to go nowhere
+MOVE_TOLERANCE = 0.001
+
+Move = Tuple[types.Point, Optional[CriticalPoint]]
+
 
 def max_many(*args):
     return functools.reduce(max, args[1:], args[0])
@@ -24,8 +35,7 @@ def plan_moves(
         lw_z_margin: float = 20.0,
         force_direct: bool = False,
         minimum_z_height: float = None)\
-        -> List[Tuple[types.Point,
-                      Optional[CriticalPoint]]]:
+        -> List[Move]:
     """ Plan moves between one :py:class:`.Location` and another.
 
     Each :py:class:`.Location` instance might or might not have a specific
@@ -95,9 +105,10 @@ def plan_moves(
         else:
             from_safety = from_lw.highest_z + well_z_margin
     else:
-        # One of our labwares is invalid so we have to just go above
-        # deck.highest_z since we don’t know where we are
-        to_safety = deck.highest_z + lw_z_margin
+        # Moving between labware (or from or to somewhere unknown), so we
+        # have to go above everything on the slots the move passes over
+        to_safety = deck.highest_z_between(from_point, to_point)\
+            + lw_z_margin
         from_safety = 0.0  # (ignore since it’s in a max())
 
     safe = max_many(
@@ -114,6 +125,56 @@ def plan_moves(
             (to_point, dest_cp_override)]
 
 
+def _is_close(first: types.Point, second: types.Point) -> bool:
+    return all(math.isclose(a, b, abs_tol=MOVE_TOLERANCE)
+               for a, b in zip(first, second))
+
+
+def _continues(first: types.Point,
+               second: types.Point,
+               third: types.Point) -> bool:
+    """ Whether a move from second to third carries on in the same
+    direction as the move from first to second """
+    before = [b - a for a, b in zip(first, second)]
+    after = [b - a for a, b in zip(second, third)]
+    cross = (before[1] * after[2] - before[2] * after[1],
+             before[2] * after[0] - before[0] * after[2],
+             before[0] * after[1] - before[1] * after[0])
+    dot = sum(a * b for a, b in zip(before, after))
+    length = math.sqrt(sum(a * a for a in before))\
+        * math.sqrt(sum(a * a for a in after))
+    return dot > 0 and math.sqrt(sum(c * c for c in cross))\
+        <= MOVE_TOLERANCE * length
+
+
+def optimize_moves(start: types.Point,
+                   start_cp: Optional[CriticalPoint],
+                   moves: List[Move]) -> List[Move]:
+    """ Remove the moves in a plan that aren't needed.
+
+    Moves to where the critical point already is (for instance the
+    retraction of an arc that starts at or above its safe height, or the
+    descent of one that ends there) are dropped, and consecutive moves in the
+    same direction with the same critical point are merged into one.
+
+    :param start: Where the critical point is before the moves
+    :param start_cp: The critical point override ``start`` is measured with
+    :param moves: The moves to make, as returned by :py:func:`plan_moves`
+    :returns: The moves that need to be made, which may be none at all
+    """
+    path: List[Move] = [(start, start_cp)]
+    for point, cp in moves:
+        last_point, last_cp = path[-1]
+        if cp == last_cp and _is_close(point, last_point):
+            continue
+        if len(path) > 1 and cp == last_cp == path[-2][1]\
+                and _continues(path[-2][0], last_point, point):
+            path[-1] = (point, cp)
+        else:
+            path.append((point, cp))
+    return path[1:]
+
+
 DeckItem = Union[Labware, ModuleGeometry, ThermocyclerGeometry]
 
 
@@ -189,6 +250,61 @@ class Deck(UserDict):
         key_int = self._check_name(key)
         return types.Location(self._positions[key_int], str(key))
 
+    def _slot_bounds(self, key: int) -> Tuple[float, float, float, float]:
+        """ The area of the deck that belongs to a slot, as (min x, min y,
+        max x, max y), including the gaps to the next slots. The slots on the
+        edges of the deck extend indefinitely outwards, so every point is in
+        a slot """
+        col, row = (key - 1) % 3, (key - 1) // 3
+        width, depth = self._positions[2].x, self._positions[4].y
+        return (col * width if col else -math.inf,
+                row * depth if row else -math.inf,
+                (col + 1) * width if col < 2 else math.inf,
+                (row + 1) * depth if row < 3 else math.inf)
+
+    def _footprint(self, key: int, item: DeckItem) -> List[int]:
+        """ The slots an item placed in a slot covers """
+        if isinstance(item, ThermocyclerGeometry):
+            # The thermocycler covers its slot, the slot to its right and
+            # the two behind them
+            return [slot for slot in (key, key + 1, key + 3, key + 4)
+                    if slot in self.data]
+        return [key]
+
+    def height_map(self) -> Dict[int, float]:
+        """ Return the height of the tallest item over each slot """
+        heights = {key: 0.0 for key in self.data}
+        for key, item in self.data.items():
+            if not item:
+                continue
+            for slot in self._footprint(key, item):
+                heights[slot] = max(heights[slot], item.highest_z)
+        return heights
+
+    def highest_z_between(self,
+                          from_point: types.Point,
+                          to_point: types.Point) -> float:
+        """ Return the tallest known point on the slots a straight move
+        between two points passes over, allowing for
+        :py:data:`PATH_CLEARANCE` around the path.
+
+        This is never higher than :py:attr:`highest_z`, and is lower when the
+        tallest items on the deck are away from the move.
+        """
+        min_x = min(from_point.x, to_point.x) - PATH_CLEARANCE.x
+        max_x = max(from_point.x, to_point.x) + PATH_CLEARANCE.x
+        min_y = min(from_point.y, to_point.y) - PATH_CLEARANCE.y
+        max_y = max(from_point.y, to_point.y) + PATH_CLEARANCE.y
+        highest = 0.0
+        for key, height in self.height_map().items():
+            if height <= highest:
+                continue
+            left, front, right, back = self._slot_bounds(key)
+            if left <= max_x and min_x <= right\
+                    and front <= max_y and min_y <= back:
+                highest = height
+        return highest
+
     def recalculate_high_z(self):
         self._highest_z = 0.0
         for item in [lw for lw in self.data.values() if lw]:
@@ -1,17 +1,19 @@
 """This module will replace Placeable"""
+import copy
 import json
 import os
 import re
 import time
-import pkgutil
 from collections import defaultdict
 from enum import Enum, auto
-from itertools import takewhile, dropwhile
-from typing import List, Dict, Optional, Union
+from typing import Any, List, Dict, Optional, Tuple, Union
+
+import numpy as np
 
 from opentrons.types import Location
 from opentrons.types import Point
 from opentrons.config import CONFIG
+from opentrons.util import definition_cache
 
 
 class WellShape(Enum):
@@ -24,6 +26,9 @@ well_shapes = {
     'circular': WellShape.CIRCULAR
 }
 
+# Splits a well name like 'A1' into its row ('A') and column ('1')
+WELL_NAME_PATTERN = re.compile(r'^([A-Z]+)([1-9][0-9]*)$', re.X)
+
 
 class Well:
     """
@@ -61,6 +66,8 @@ class Well:
             raise ValueError("Wells must have a parent")
         self._parent = parent.labware
         self._has_tip = has_tip
+        self._tips: Optional[TipTracker] = None
+        self._index: Optional[int] = None
         self._shape = well_shapes.get(well_props['shape'])
         if self._shape is WellShape.RECTANGULAR:
             self._length = well_props['xDimension']
@@ -77,17 +84,57 @@ class Well:
 
         self._depth = well_props['depth']
 
+    @classmethod
+    def _from_geometry(cls,
+                       geometry: 'WellGeometry',
+                       index: int,
+                       top: Tuple[float, float, float],
+                       parent: 'Labware',
+                       display_name: str,
+                       tips: 'TipTracker') -> 'Well':
+        """
+        Create a well from a row of a :py:class:`WellGeometry` rather than
+        from its definition.
+
+        :param top: The absolute position of the top-center of the well
+        :param tips: The tip tracker of the parent labware, which tracks
+                     whether this well has a tip
+        """
+        well = cls.__new__(cls)
+        well._display_name = display_name
+        well._position = Point(*top)
+        well._parent = parent
+        well._has_tip = False
+        well._tips = tips
+        well._index = index
+        well._shape = geometry.shapes[index]
+        if well._shape is WellShape.RECTANGULAR:
+            well._length = float(geometry.lengths[index])
+            well._width = float(geometry.widths[index])
+            well._diameter = None
+        else:
+            well._length = None
+            well._width = None
+            well._diameter = float(geometry.diameters[index])
+        well._depth = float(geometry.depths[index])
+        return well
+
     @property
     def parent(self) -> 'Labware':
         return self._parent  # type: ignore
 
     @property
     def has_tip(self) -> bool:
+        if self._tips:
+            return self._tips.has_tip(self._index)  # type: ignore
         return self._has_tip
 
     @has_tip.setter
     def has_tip(self, value: bool):
-        self._has_tip = value
+        if self._tips:
+            self._tips.set_has_tip(self._index, value)  # type: ignore
+        else:
+            self._has_tip = value
 
     def top(self, z: float = 0.0) -> Location:
         """
@@ -172,6 +219,194 @@ class Well:
         return hash(self.top().point)
 
 
+class WellGeometry:
+    """
+    The geometry of every well in a labware definition, stored as arrays
+    indexed in the order the definition lists its wells.
+
+    These tables are built once per definition by :py:func:`well_geometry_for`
+    and shared by every :py:class:`Labware` loaded from it, so they are
+    read-only. Positions are relative to the labware's offset; a labware
+    applies its calibrated offset to all of them at once.
+    """
+    def __init__(self, definition: dict) -> None:
+        self._source = definition['wells']
+        #: Well names in definition order (down each column, then across)
+        self.names: List[str] = [well
+                                 for col in definition['ordering']
+                                 for well in col]
+        #: The index of each well name
+        self.indices: Dict[str, int] = {
+            name: idx for idx, name in enumerate(self.names)}
+        rows: Dict[str, List[int]] = defaultdict(list)
+        columns: Dict[str, List[int]] = defaultdict(list)
+        for idx, name in enumerate(self.names):
+            match = WELL_NAME_PATTERN.match(name)
+            if match:
+                rows[match.group(1)].append(idx)
+                columns[match.group(2)].append(idx)
+        #: The well indices in each row, keyed by row name, in row order
+        self.rows: Dict[str, List[int]] = {
+            key: rows[key] for key in sorted(rows)}
+        #: The well indices in each column, keyed by column name, in column
+        #: order
+        self.columns: Dict[str, List[int]] = {
+            key: columns[key] for key in sorted(columns, key=int)}
+        props = [self._source[name] for name in self.names]
+        self.shapes: List[WellShape] = []
+        for prop in props:
+            shape = well_shapes.get(prop['shape'])
+            if not shape:
+                raise ValueError(
+                    'Shape "{}" is not a supported well shape'.format(
+                        prop['shape']))
+            self.shapes.append(shape)
+        circular = [shape is WellShape.CIRCULAR for shape in self.shapes]
+        #: Nx3 positions of the top-center of each well
+        self.tops = np.array(
+            [(prop['x'], prop['y'], prop['z'] + prop['depth'])
+             for prop in props], dtype=float).reshape(-1, 3)
+        self.depths = np.array([prop['depth'] for prop in props], dtype=float)
+        # Dimensions that do not apply to a well's shape are NaN
+        self.diameters = np.array(
+            [prop['diameter'] if circ else np.nan
+             for prop, circ in zip(props, circular)], dtype=float)
+        self.lengths = np.array(
+            [np.nan if circ else prop['xDimension']
+             for prop, circ in zip(props, circular)], dtype=float)
+        self.widths = np.array(
+            [np.nan if circ else prop['yDimension']
+             for prop, circ in zip(props, circular)], dtype=float)
+        for array in (self.tops, self.depths, self.diameters,
+                      self.lengths, self.widths):
+            array.flags.writeable = False
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def matches(self, definition: dict) -> bool:
+        """ Whether this table was built from an equivalent definition """
+        wells = definition['wells']
+        return (wells is self._source or wells == self._source)\
+            and self.names == [well
+                               for col in definition['ordering']
+                               for well in col]
+
+
+_well_geometries: Dict[Tuple[Any, ...], WellGeometry] = {}
+
+
+class TipTracker:
+    """
+    Tracks which wells of a labware hold tips.
+
+    The state of each column is kept as a bitmask (bit ``n`` is set if the
+    ``n``-th well from the back of the column has a tip), so finding the next
+    run of tips, using tips and checking a well are all a few integer
+    operations per column rather than a walk over every well.
+
+    The state can be saved with :py:meth:`snapshot` and put back with
+    :py:meth:`restore`, for instance to resume a run partway through.
+    """
+    def __init__(self, columns: List[List[int]], full: bool) -> None:
+        """
+        :param columns: The indices of the wells in each column, in order.
+        :param full: Whether to start with a tip in every well.
+        """
+        self._columns = columns
+        self._position: Dict[int, Tuple[int, int]] = {
+            idx: (col, row)
+            for col, indices in enumerate(columns)
+            for row, idx in enumerate(indices)}
+        self._full = [(1 << len(indices)) - 1 for indices in columns]
+        self._masks = list(self._full) if full else [0] * len(columns)
+        # Every column before this one is known to be empty
+        self._first_column = 0
+
+    def has_tip(self, idx: int) -> bool:
+        """ Whether the well at index `idx` has a tip """
+        col, row = self._position[idx]
+        return bool(self._masks[col] >> row & 1)
+
+    def set_has_tip(self, idx: int, has_tip: bool):
+        """ Record whether the well at index `idx` has a tip """
+        col, row = self._position[idx]
+        if has_tip:
+            self._masks[col] |= 1 << row
+            self._first_column = min(self._first_column, col)
+        else:
+            self._masks[col] &= ~(1 << row)
+
+    def next_tip(self, num_tips: int = 1) -> Optional[int]:
+        """
+        Find the index of the first well that starts a run of at least
+        `num_tips` tips down a column.
+
+        As with :py:meth:`Labware.next_tip`, only the first run of tips in
+        each column is considered.
+
+        :return: The index of the well, or ``None`` if there is no such run
+        """
+        masks = self._masks
+        while self._first_column < len(masks)\
+                and not masks[self._first_column]:
+            self._first_column += 1
+        for col in range(self._first_column, len(masks)):
+            mask = masks[col]
+            if not mask:
+                continue
+            start = (mask & -mask).bit_length() - 1
+            shifted = mask >> start
+            run = (~shifted & (shifted + 1)).bit_length() - 1
+            if run >= num_tips:
+                return self._columns[col][start]
+        return None
+
+    def use_tips(self, idx: int, num_tips: int = 1) -> bool:
+        """
+        Remove the tips from `num_tips` wells down the column starting at the
+        well at index `idx`, or as many as there are to the end of the column.
+
+        :return: ``False`` (and remove no tips) if any of those wells is
+                 already empty; otherwise ``True``
+        """
+        col, row = self._position[idx]
+        count = min(len(self._columns[col]) - row, num_tips)
+        used = ((1 << count) - 1) << row
+        if self._masks[col] & used != used:
+            return False
+        self._masks[col] &= ~used
+        return True
+
+    def snapshot(self) -> Tuple[int, ...]:
+        """ Get the current state, which can be passed to :py:meth:`restore`
+        """
+        return tuple(self._masks)
+
+    def restore(self, snapshot: Tuple[int, ...]):
+        """ Put back a state from :py:meth:`snapshot` """
+        if len(snapshot) != len(self._masks)\
+                or any(mask & ~full
+                       for mask, full in zip(snapshot, self._full)):
+            raise ValueError('Snapshot does not match this labware')
+        self._masks = list(snapshot)
+        self._first_column = 0
+
+
+def well_geometry_for(definition: dict) -> WellGeometry:
+    """
+    Get the (shared) :py:class:`WellGeometry` for a labware definition,
+    building it if no equivalent definition has been seen before.
+    """
+    key = (definition['otId'],
+           tuple(tuple(col) for col in definition['ordering']))
+    geometry = _well_geometries.get(key)
+    if not geometry or not geometry.matches(definition):
+        geometry = WellGeometry(definition)
+        _well_geometries[key] = geometry
+    return geometry
+
+
 class Labware:
     """
     This class represents a labware, such as a PCR plate, a tube rack, trough,
@@ -202,24 +437,32 @@ class Labware:
             dn = definition['metadata']['displayName']
         self._display_name = "{} on {}".format(dn, str(parent.labware))
         self._calibrated_offset: Point = Point(0, 0, 0)
-        self._wells: List[Well] = []
+        # Wells are created from the geometry table when first accessed
+        self._geometry = well_geometry_for(definition)
+        self._well_tops: np.ndarray = self._geometry.tops
+        self._materialized: List[Optional[Well]] = []
+        self._tips: Optional[TipTracker] = None
+        # Accessor results, built when first needed and dropped whenever the
+        # wells are rebuilt
+        self._wells_by_name: Optional[Dict[str, Well]] = None
+        self._rows_by_name: Optional[Dict[str, List[Well]]] = None
+        self._columns_by_name: Optional[Dict[str, List[Well]]] = None
         # Directly from definition
         self._well_definition = definition['wells']
         self._id = definition['otId']
-        self._parameters = definition['parameters']
+        # Copied because tip length calibration modifies it
+        self._parameters = dict(definition['parameters'])
         offset = definition['cornerOffsetFromSlot']
         self._dimensions = definition['dimensions']
         # Inferred from definition
-        self._ordering = [well
-                          for col in definition['ordering']
-                          for well in col]
+        self._ordering = self._geometry.names
         self._offset\
             = Point(offset['x'], offset['y'], offset['z']) + parent.point
         self._parent = parent.labware
         # Applied properties
         self.set_calibration(self._calibrated_offset)
 
-        self._pattern = re.compile(r'^([A-Z]+)([1-9][0-9]*)$', re.X)
+        self._pattern = WELL_NAME_PATTERN
         self._definition = definition
 
     @property
@@ -250,19 +493,48 @@ class Labware:
         else:
             return self._parameters['magneticModuleEngageHeight']
 
-    def _build_wells(self) -> List[Well]:
+    def _build_wells(self) -> List[Optional[Well]]:
+        """
+        This function is used to reset the wells used by all accessor
+        functions when a new offset needs to be applied. Wells are created
+        from the geometry table as they are accessed (see :py:meth:`_well`).
+        """
+        self._well_tops = self._geometry.tops + np.array(
+            [self._calibrated_offset.x,
+             self._calibrated_offset.y,
+             self._calibrated_offset.z])
+        # New wells start with a fresh tip state, as they always have
+        self._tips = None
+        return [None] * len(self._geometry)
+
+    @property
+    def tip_tracker(self) -> TipTracker:
         """
-        This function is used to create one instance of wells to be used by all
-        accessor functions. It is only called again if a new offset needs
-        to be applied.
+        The tracker of which wells hold tips. This is replaced (and all the
+        tips of a tip rack put back) when the labware's calibration changes.
         """
-        return [
-            Well(
-                self._well_definition[well],
-                Location(self._calibrated_offset, self),
-                "{} of {}".format(well, self._display_name),
-                self.is_tiprack)
-            for well in self._ordering]
+        if self._tips is None:
+            self._tips = TipTracker(
+                list(self._geometry.columns.values()), self.is_tiprack)
+        return self._tips
+
+    def _well(self, idx: int) -> Well:
+        """ Get the well at index `idx` in definition order, creating it if
+        this is the first time it was accessed """
+        well = self._materialized[idx]
+        if well is None:
+            name = self._ordering[idx]
+            well = Well._from_geometry(
+                self._geometry, idx, tuple(self._well_tops[idx].tolist()),
+                self, "{} of {}".format(name, self._display_name),
+                self.tip_tracker)
+            self._materialized[idx] = well
+        return well
+
+    @property
+    def _wells(self) -> List[Well]:
+        """ All the wells of the labware in definition order """
+        return list(self._create_indexed_dictionary().values())
 
     def _create_indexed_dictionary(self, group=0):
         """
@@ -272,11 +544,30 @@ class Labware:
         and therefore are considered to be in the same row. If group is 2, it
         will collect wells that have the same numeric postfix and therefore
         are considered to be in the same column.
+
+        The result is cached until the wells are rebuilt, so it must not be
+        modified; the public accessors return copies.
         """
-        dict_list = defaultdict(list)
-        for index, well_obj in zip(self._ordering, self._wells):
-            dict_list[self._pattern.match(index).group(group)].append(well_obj)
-        return dict_list
+        if group == 1:
+            if self._rows_by_name is None:
+                self._rows_by_name = self._group_wells(self._geometry.rows)
+            return self._rows_by_name
+        elif group == 2:
+            if self._columns_by_name is None:
+                self._columns_by_name = self._group_wells(
+                    self._geometry.columns)
+            return self._columns_by_name
+        else:
+            if self._wells_by_name is None:
+                self._wells_by_name = {
+                    name: self._well(idx)
+                    for idx, name in enumerate(self._ordering)}
+            return self._wells_by_name
+
+    def _group_wells(
+            self, groups: Dict[str, List[int]]) -> Dict[str, List[Well]]:
+        return {key: [self._well(idx) for idx in indices]
+                for key, indices in groups.items()}
 
     def set_calibration(self, delta: Point):
         """
@@ -285,7 +576,10 @@ class Labware:
         self._calibrated_offset = Point(x=self._offset.x + delta.x,
                                         y=self._offset.y + delta.y,
                                         z=self._offset.z + delta.z)
-        self._wells = self._build_wells()
+        self._materialized = self._build_wells()
+        self._wells_by_name = None
+        self._rows_by_name = None
+        self._columns_by_name = None
 
     @property
     def calibrated_offset(self) -> Point:
@@ -294,9 +588,9 @@ class Labware:
     def well(self, idx) -> Well:
         """Deprecated---use result of `wells` or `wells_by_index`"""
         if isinstance(idx, int):
-            res = self._wells[idx]
+            res = self._well(range(len(self._materialized))[idx])
         elif isinstance(idx, str):
-            res = self.wells_by_index()[idx]
+            res = self._well(self._geometry.indices[idx])
         else:
             res = NotImplemented
         return res
@@ -321,9 +615,10 @@ class Labware:
         if not args:
             res = self._wells
         elif isinstance(args[0], int):
-            res = [self._wells[idx] for idx in args]
+            indices = range(len(self._materialized))
+            res = [self._well(indices[idx]) for idx in args]
         elif isinstance(args[0], str):
-            res = [self.wells_by_index()[idx] for idx in args]
+            res = [self._well(self._geometry.indices[idx]) for idx in args]
         else:
             raise TypeError
         return res
@@ -338,8 +633,7 @@ class Labware:
 
         :return: Dictionary of well objects keyed by well name
         """
-        return {well: wellObj
-                for well, wellObj in zip(self._ordering, self._wells)}
+        return dict(self._create_indexed_dictionary())
 
     def rows(self, *args) -> List[List[Well]]:
         """
@@ -358,14 +652,14 @@ class Labware:
         :return: A list of row lists
         """
         row_dict = self._create_indexed_dictionary(group=1)
-        keys = sorted(row_dict)
+        keys = list(row_dict)
 
         if not args:
-            res = [row_dict[key] for key in keys]
+            res = [list(row_dict[key]) for key in keys]
         elif isinstance(args[0], int):
-            res = [row_dict[keys[idx]] for idx in args]
+            res = [list(row_dict[keys[idx]]) for idx in args]
         elif isinstance(args[0], str):
-            res = [row_dict[idx] for idx in args]
+            res = [list(row_dict.get(idx, [])) for idx in args]
         else:
             raise TypeError
         return res
@@ -381,7 +675,8 @@ class Labware:
         :return: Dictionary of Well lists keyed by row name
         """
         row_dict = self._create_indexed_dictionary(group=1)
-        return row_dict
+        return defaultdict(
+            list, {key: list(wells) for key, wells in row_dict.items()})
 
     def columns(self, *args) -> List[List[Well]]:
         """
@@ -401,14 +696,14 @@ class Labware:
         :return: A list of column lists
         """
         col_dict = self._create_indexed_dictionary(group=2)
-        keys = sorted(col_dict, key=lambda x: int(x))
+        keys = list(col_dict)
 
         if not args:
-            res = [col_dict[key] for key in keys]
+            res = [list(col_dict[key]) for key in keys]
         elif isinstance(args[0], int):
-            res = [col_dict[keys[idx]] for idx in args]
+            res = [list(col_dict[keys[idx]]) for idx in args]
         elif isinstance(args[0], str):
-            res = [col_dict[idx] for idx in args]
+            res = [list(col_dict.get(idx, [])) for idx in args]
         else:
             raise TypeError
         return res
@@ -425,7 +720,8 @@ class Labware:
         :return: Dictionary of Well lists keyed by column name
         """
         col_dict = self._create_indexed_dictionary(group=2)
-        return col_dict
+        return defaultdict(
+            list, {key: list(wells) for key, wells in col_dict.items()})
 
     @property
     def highest_z(self) -> float:
@@ -463,23 +759,10 @@ class Labware:
         """
         assert num_tips > 0
 
-        columns: List[List[Well]] = self.columns()
-        drop_leading_empties = [
-            list(dropwhile(lambda x: not x.has_tip, column))
-            for column in columns]
-        drop_at_first_gap = [
-            list(takewhile(lambda x: x.has_tip, column))
-            for column in drop_leading_empties]
-        long_enough = [
-            column for column in drop_at_first_gap if len(column) >= num_tips]
-
-        try:
-            first_long_enough = long_enough[0]
-            result: Optional[Well] = first_long_enough[0]
-        except IndexError:
-            result = None
-
-        return result
+        idx = self.tip_tracker.next_tip(num_tips)
+        if idx is None:
+            return None
+        return self._well(idx)
 
     def use_tips(self, start_well: Well, num_channels: int = 1):
         """
@@ -502,29 +785,43 @@ class Labware:
         :type num_channels: int
         """
         assert num_channels > 0, 'Bad call to use_tips: num_channels==0'
-        # Select the column of the labware that contains the target well
-        target_column: List[Well] = [
-            col for col in self.columns() if start_well in col][0]
-
-        well_idx = target_column.index(start_well)
+        tips = self.tip_tracker
+        if start_well._tips is tips:
+            well_idx = start_well._index
+        else:
+            # A well that is not one of ours (for instance, from before a
+            # calibration): find ours in the same place
+            well_idx = [idx for idx, well in enumerate(self._wells)
+                        if well == start_well][0]
         # Number of tips to pick up is the lesser of (1) the number of tips
         # from the starting well to the end of the column, and (2) the number
         # of channels of the pipette (so a 4-channel pipette would pick up a
         # max of 4 tips, and picking up from the 2nd-to-bottom well in a
         # column would get a maximum of 2 tips)
-        num_tips = min(len(target_column) - well_idx, num_channels)
-        target_wells = target_column[well_idx: well_idx + num_tips]
-
-        assert all([well.has_tip for well in target_wells]),\
-            '{} is out of tips'.format(str(self))
-
-        for well in target_wells:
-            well.has_tip = False
+        used = tips.use_tips(well_idx, num_channels)  # type: ignore
+        assert used, '{} is out of tips'.format(str(self))
 
     def __repr__(self):
         return self._display_name
 
 
+def select_tiprack_from_list(
+        tip_racks: List[Labware],
+        num_channels: int) -> Optional[Tuple[Labware, Well]]:
+    """
+    Find the first tip rack, in order, with `num_channels` tips in a column
+    (see :py:meth:`Labware.next_tip`).
+
+    :return: The tip rack and the well to pick up from, or ``None`` if every
+             rack is out of tips
+    """
+    for tip_rack in tip_racks:
+        next_tip = tip_rack.next_tip(num_channels)
+        if next_tip:
+            return tip_rack, next_tip
+    return None
+
+
 class ModuleGeometry:
     """
     This class represents an active peripheral, such as an Opentrons MagBead
@@ -631,7 +928,7 @@ class ThermocyclerGeometry(ModuleGeometry):
 
     def labware_accessor(self, labware: Labware) -> Labware:
         # Block first three columns from being accessed
-        definition = labware._definition
+        definition = dict(labware._definition)
         definition['ordering'] = definition['ordering'][3::]
         return Labware(definition, super().location)
 
@@ -734,6 +1031,14 @@ def _read_file(filepath: str) -> dict:
     return calibration_data
 
 
+def _load_shared_definition(name: str) -> dict:
+    """ Look up a definition by name, as :py:func:`load_definition_by_name`
+    does, but return the cached definition itself, which is shared and cannot
+    be modified (see :py:mod:`opentrons.util.definition_cache`) """
+    return definition_cache.load_shared_data(
+        'definitions2/{}.json'.format(name.lower()))
+
+
 def load_definition_by_name(name: str) -> dict:
     """
     Look up and return a definition by name (name is expected to correspond to
@@ -744,9 +1049,7 @@ def load_definition_by_name(name: str) -> dict:
         saved to disc. The definition file must have been saved in a known
         location with the filename '${name}.json'
     """
-    def_path = 'shared_data/definitions2/{}.json'.format(name.lower())
-    labware_def = json.loads(pkgutil.get_data('opentrons', def_path))  # type: ignore # NOQA
-    return labware_def
+    return copy.deepcopy(_load_shared_definition(name))
 
 
 def load(name: str, parent: Location, label: str = None) -> Labware:
@@ -764,7 +1067,7 @@ def load(name: str, parent: Location, label: str = None) -> Labware:
     :param str label: An optional label that will override the labware's
                       display name from its definition
     """
-    definition = load_definition_by_name(name)
+    definition = _load_shared_definition(name)
     return load_from_definition(definition, parent, label)
 
 
@@ -838,9 +1141,8 @@ def load_module(name: str, parent: Location) -> ModuleGeometry:
                    the front and left most point of the outside of the module
                    is (often the front-left corner of a slot on the deck).
     """
-    def_path = 'shared_data/robot-data/moduleSpecs.json'
-    module_def = json.loads(  # type: ignore
-        pkgutil.get_data('opentrons', def_path))
+    module_def = definition_cache.load_shared_data(
+        'robot-data/moduleSpecs.json')
     return load_module_from_definition(module_def[name], parent)
 
 
@@ -1,12 +1,20 @@
 import enum
-from typing import (Any, List, Optional, Union, NamedTuple,
-                    Callable, TYPE_CHECKING)
+import logging
+from typing import (Any, Dict, Iterator, List, Optional, Tuple, Union,
+                    NamedTuple, Callable, TYPE_CHECKING)
+import numpy as np
 from .labware import Well
 from opentrons import types
+from opentrons.config.pipette_config import DISTANCE_BETWEEN_NOZZLES
 
 if TYPE_CHECKING:
     from .contexts import InstrumentContext  #noqa (F501)
 
+log = logging.getLogger(__name__)
+
+#: The number of channels of a multichannel pipette
+MULTICHANNEL_CHANNELS = 8
+
 
 class MixStrategy(enum.Enum):
     BOTH = enum.auto()
@@ -53,6 +61,7 @@ class Transfer(NamedTuple):
     drop_tip_strategy: DropTipStrategy = DropTipStrategy.TRASH
     blow_out_strategy: BlowOutStrategy = BlowOutStrategy.NONE
     touch_tip_strategy: TouchTipStrategy = TouchTipStrategy.NEVER
+    optimize_order: bool = False
 
 
 Transfer.new_tip.__doc__ = """
@@ -179,6 +188,18 @@ Transfer.touch_tip_strategy.__doc__ = """
     :py:attr:`.TransferOptions.touch_tip`.
     """
 
+Transfer.optimize_order.__doc__ = """
+    Whether a distribute or consolidate may visit its wells in a different
+    order than they were given in, to cut down on gantry travel.
+
+    The wells of each labware are visited together, in a path that goes to
+    the nearest well not yet visited next, starting from the source (for a
+    distribute) or destination (for a consolidate). As many of them are
+    handled per aspirate as the pipette holds, so each trip covers a short
+    stretch of the path. This has no effect on transfers, whose sources and
+    destinations are paired up.
+    """
+
 
 class PickUpTipOpts(NamedTuple):
     """
@@ -344,14 +365,74 @@ TransferOptions.dispense.__doc__ = """
     """
 
 
+class Compaction(NamedTuple):
+    """ How much a transfer plan was compacted by handling several wells
+    with each operation of a multichannel pipette """
+    wells: int
+    operations: int
+
+
+Compaction.wells.__doc__ = 'The number of wells (or pairs of wells) given'
+Compaction.operations.__doc__ = 'The number of operations that handle them'
+
+
+class StepOp(enum.IntEnum):
+    """ The operations in a :py:attr:`TransferPlan.steps` array.
+
+    Each corresponds to a call of an :py:class:`.InstrumentContext` method.
+    The ``*_IF_EMPTY`` operations are only performed if the pipette is empty
+    when the plan reaches them.
+    """
+    PICK_UP_TIP = enum.auto()
+    DROP_TIP = enum.auto()
+    RETURN_TIP = enum.auto()
+    ASPIRATE = enum.auto()
+    DISPENSE = enum.auto()
+    AIR_GAP = enum.auto()
+    DISPENSE_AIR_GAP = enum.auto()
+    TOUCH_TIP = enum.auto()
+    MIX_BEFORE_IF_EMPTY = enum.auto()
+    MIX_AFTER_IF_EMPTY = enum.auto()
+    BLOW_OUT_IF_EMPTY = enum.auto()
+    BLOW_OUT_TRASH = enum.auto()
+    BLOW_OUT_CUSTOM = enum.auto()
+
+
+_IF_EMPTY_OPS = frozenset((StepOp.MIX_BEFORE_IF_EMPTY,
+                           StepOp.MIX_AFTER_IF_EMPTY,
+                           StepOp.BLOW_OUT_IF_EMPTY))
+
+#: The type of the steps of a transfer plan: the operation, the volume it
+#: moves (for aspirates and dispenses) and the index of its location in
+#: :py:attr:`TransferPlan.locations` (or -1 if it has none)
+STEP_DTYPE = np.dtype([('op', np.uint8),
+                       ('volume', np.float64),
+                       ('location', np.int32)])
+
+
+class _Event(enum.IntEnum):
+    """ The units a plan is built from, each of which expands to a fixed
+    sequence of steps for a given set of transfer options """
+    PICK_UP = 0
+    DROP = 1
+    ASPIRATE = 2
+    DISPENSE = 3
+    # A dispense that is followed by another without aspirating in between
+    DISPENSE_NEXT = 4
+
+
 class TransferPlan:
     """ Calculate and carry state for an arbitrary transfer
 
     This class encapsulates the logic around planning an M:N transfer.
 
     It handles calculations based on pipette channels, tip management, and all
-    the various little commands that can be involved in a transfer. It can be
-    iterated to resolve methods to call to execute the plan.
+    the various little commands that can be involved in a transfer. The plan
+    is computed up front, with numpy, as an array of :py:data:`STEP_DTYPE`
+    steps (see :py:attr:`steps`). It can be iterated to resolve methods to
+    call to execute the plan; the dicts describing each call are only built
+    by iterating it, and :py:meth:`commands` resolves the same calls without
+    building them.
     """
     def __init__(self,
                  volume,
@@ -376,22 +457,16 @@ class TransferPlan:
         # ii. if using single channel pipettes, flatten a multi-dimensional
         # list of Wells into a 1 dimensional list of Wells
         if self._instr.hw_pipette['channels'] > 1:
-            sources, dests = self._multichannel_transfer(sources, dests)
+            sources, dests, volume = self._multichannel_transfer(
+                sources, dests, volume)
         else:
-            if isinstance(sources, List) and isinstance(sources[0], List):
-                # Source is a List[List[Well]]
-                sources = [well for well_list in sources for well in well_list]
-            elif isinstance(sources, Well):
-                sources = [sources]
-            if isinstance(dests, List) and isinstance(dests[0], List):
-                # Dest is a List[List[Well]]
-                dests = [well for well_list in dests for well in well_list]
-            elif isinstance(dests, Well):
-                dests = [dests]
+            sources = self._flatten_wells(sources)
+            dests = self._flatten_wells(dests)
 
         total_xfers = max(len(sources), len(dests))
+        if self._instr.hw_pipette['channels'] == 1:
+            self.compaction = Compaction(total_xfers, total_xfers)
 
-        self._volumes = self._create_volume_list(volume, total_xfers)
         self._sources = sources
         self._dests = dests
         self._options = options or TransferOptions()
@@ -401,6 +476,7 @@ class TransferPlan:
         self._touch_tip_opts = self._options.touch_tip
         self._mix_before_opts = self._options.mix.mix_before
         self._mix_after_opts = self._options.mix.mix_after
+        self._volumes = self._create_volume_list(volume, total_xfers)
 
         if not mode:
             if len(sources) < len(dests):
@@ -412,19 +488,113 @@ class TransferPlan:
         else:
             self._mode = TransferMode[mode.upper()]
 
+        #: The wells the plan's steps refer to by index
+        self.locations = list(sources) + list(dests)
+        self._steps: Optional[np.ndarray] = None
+
+    @property
+    def steps(self) -> np.ndarray:
+        """ The steps of the plan, as an array of :py:data:`STEP_DTYPE` """
+        if self._steps is None:
+            self._steps = self._expand(*self._plan())
+        return self._steps
+
+    def __len__(self) -> int:
+        """ The number of steps in the plan, including any that will be
+        skipped because the pipette is not empty when they are reached """
+        return len(self.steps)
+
     def __iter__(self):
+        for method, args, kwargs in self.commands():
+            yield {'method': method, 'args': args, 'kwargs': dict(kwargs)}
+
+    def commands(self) -> Iterator[Tuple[str, List, Dict[str, Any]]]:
+        """ Resolve the plan into the method, positional arguments and keyword
+        arguments of each :py:class:`.InstrumentContext` call it makes.
+
+        Like iterating the plan, this checks whether the pipette is empty for
+        the steps that depend on it as it reaches them, so each command should
+        be executed before the next is resolved. The keyword argument dicts
+        are shared between commands and must not be modified.
+        """
+        calls = self._step_calls()
+        for op, volume, location in self.steps.tolist():
+            if op in _IF_EMPTY_OPS and self._instr.current_volume != 0:
+                continue
+            method, build_args, kwargs = calls[op]
+            yield method, build_args(volume, location), kwargs
+
+    def _step_calls(self) -> Dict[int, Tuple[
+            str, Callable[[float, int], List], Dict[str, Any]]]:
+        """ The method each :py:class:`StepOp` calls, a function building
+        its positional arguments from the step's volume and location index,
+        and its keyword arguments """
+        locations = self.locations
+        asp_rate = self._options.aspirate.rate
+        disp_rate = self._options.dispense.rate
+        air_gap = self._strategy.air_gap
+        no_kwargs: Dict[str, Any] = {}
+
+        def no_args(volume, location):
+            return []
+
+        return {
+            StepOp.ASPIRATE: (
+                'aspirate',
+                lambda volume, location: [
+                    volume, locations[location], asp_rate],
+                no_kwargs),
+            StepOp.DISPENSE: (
+                'dispense',
+                lambda volume, location: [
+                    volume, locations[location], disp_rate],
+                no_kwargs),
+            StepOp.AIR_GAP: (
+                'air_gap', lambda volume, location: [air_gap], no_kwargs),
+            StepOp.DISPENSE_AIR_GAP: (
+                'dispense', lambda volume, location: [air_gap], no_kwargs),
+            StepOp.TOUCH_TIP: (
+                'touch_tip', no_args, self._kwargs(self._touch_tip_opts)),
+            StepOp.PICK_UP_TIP: (
+                'pick_up_tip', no_args, self._kwargs(self._tip_opts)),
+            StepOp.DROP_TIP: ('drop_tip', no_args, no_kwargs),
+            StepOp.RETURN_TIP: ('return_tip', no_args, no_kwargs),
+            StepOp.BLOW_OUT_TRASH: (
+                'blow_out',
+                lambda volume, location: [
+                    self._instr.trash_container.wells()[0]],
+                no_kwargs),
+            StepOp.BLOW_OUT_CUSTOM: (
+                'blow_out', no_args, self._kwargs(self._blow_opts)),
+            StepOp.MIX_BEFORE_IF_EMPTY: (
+                'mix', no_args, self._kwargs(self._mix_before_opts)),
+            StepOp.MIX_AFTER_IF_EMPTY: (
+                'mix', no_args, self._kwargs(self._mix_after_opts)),
+            StepOp.BLOW_OUT_IF_EMPTY: (
+                'blow_out',
+                lambda volume, location: [locations[location]],
+                no_kwargs),
+        }
+
+    @staticmethod
+    def _kwargs(opts: Any) -> Dict[str, Any]:
+        return {key: val for key, val in opts._asdict().items() if val}
+
+    def _plan(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """ Plan the transfer as arrays of the kind, volume and location
+        index of each event, including picking up and dropping tips once if
+        the tip policy says to """
+        kinds, volumes, locations = {
+            TransferMode.CONSOLIDATE: self._plan_consolidate,
+            TransferMode.DISTRIBUTE: self._plan_distribute,
+            TransferMode.TRANSFER: self._plan_transfer}[self._mode]()
         if self._strategy.new_tip == types.TransferTipPolicy.ONCE:
-            yield self._format_dict('pick_up_tip', kwargs=self._tip_opts)
-        yield from {TransferMode.CONSOLIDATE: self._plan_consolidate,
-                    TransferMode.DISTRIBUTE: self._plan_distribute,
-                    TransferMode.TRANSFER: self._plan_transfer}[self._mode]()
-        if self._strategy.new_tip == types.TransferTipPolicy.ONCE:
-            if self._strategy.drop_tip_strategy == DropTipStrategy.RETURN:
-                yield self._format_dict('return_tip')
-            else:
-                yield self._format_dict('drop_tip')
+            kinds = np.concatenate(([_Event.PICK_UP], kinds, [_Event.DROP]))
+            volumes = np.concatenate(([0], volumes, [0]))
+            locations = np.concatenate(([-1], locations, [-1]))
+        return kinds, volumes, locations
 
-    def _plan_transfer(self):
+    def _plan_transfer(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
         """
         * **Source/ Dest:** Multiple sources to multiple destinations.
                             Src & dest should be equal length
@@ -455,23 +625,44 @@ class TransferPlan:
             -> Touch tip -> Dispense air gap -> Dispense -> Mix if empty ->
             -> Blow out -> Touch tip -> Drop tip*
         """
-        plan_iter = zip(self._volumes, self._sources, self._dests)
-        for step_vol, src, dest in plan_iter:
-            if self._strategy.new_tip == types.TransferTipPolicy.ALWAYS:
-                yield self._format_dict('pick_up_tip', kwargs=self._tip_opts)
-            max_vol = self._instr.max_volume - \
-                self._strategy.disposal_volume - self._strategy.air_gap
-            xferred_vol = 0
-            while xferred_vol < step_vol:
-                # TODO: account for unequal length sources, dests
-                # TODO: ensure last transfer is > min_vol
-                vol = min(max_vol, step_vol - xferred_vol)
-                yield from self._aspirate_actions(vol, src)
-                yield from self._dispense_actions(vol, dest)
-                xferred_vol += vol
-            yield from self._new_tip_action()
-
-    def _plan_distribute(self):
+        count = min(len(self._volumes), len(self._sources), len(self._dests))
+        vols = self._volumes[:count]
+        max_vol = self._instr.max_volume - \
+            (self._strategy.disposal_volume or 0) - self._strategy.air_gap
+        if max_vol <= 0:
+            raise ValueError(
+                'The disposal volume and air gap leave no room for liquid '
+                'in the pipette')
+        always = int(self._strategy.new_tip == types.TransferTipPolicy.ALWAYS)
+        # Volumes larger than the pipette holds are split into chunks of
+        # max_vol, with whatever is left over last
+        # TODO: ensure last transfer is > min_vol
+        chunks = np.where(vols > 0, np.ceil(vols / max_vol), 0).astype(int)
+        per_step = 2 * chunks + 2 * always
+        step_starts = np.cumsum(per_step) - per_step
+        chunk_step = np.repeat(np.arange(count), chunks)
+        chunk_index = np.arange(len(chunk_step)) \
+            - np.repeat(np.cumsum(chunks) - chunks, chunks)
+
+        total = int(per_step.sum())
+        kinds = np.empty(total, np.uint8)
+        volumes = np.zeros(total)
+        locations = np.full(total, -1, np.int32)
+        if always:
+            kinds[step_starts] = _Event.PICK_UP
+            kinds[step_starts + per_step - 1] = _Event.DROP
+        aspirates = step_starts[chunk_step] + always + 2 * chunk_index
+        dispenses = aspirates + 1
+        chunk_vols = np.minimum(
+            max_vol, vols[chunk_step] - chunk_index * max_vol)
+        kinds[aspirates] = _Event.ASPIRATE
+        kinds[dispenses] = _Event.DISPENSE
+        volumes[aspirates] = volumes[dispenses] = chunk_vols
+        locations[aspirates] = chunk_step
+        locations[dispenses] = chunk_step + len(self._sources)
+        return kinds, volumes, locations
+
+    def _plan_distribute(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
         """
         * **Source/ Dest:** One source to many destinations
         * **Volume:** Single volume or List of volumes is acceptable. This list
@@ -513,32 +704,41 @@ class TransferPlan:
         # recommend users to specify a disposal vol when using distribute.
         # First method keeps distribute consistent with current behavior while
         # the other maintains consistency in default behaviors of all functions
-        plan_iter = zip(self._volumes, self._dests)
-
-        done = False
-        current_xfer = next(plan_iter)
-        if self._strategy.new_tip == types.TransferTipPolicy.ALWAYS:
-            yield self._format_dict('pick_up_tip', kwargs=self._tip_opts)
-        while not done:
-            asp_grouped = []
-            try:
-                while (sum(a[0] for a in asp_grouped) +
-                       self._strategy.disposal_volume +
-                       self._strategy.air_gap +
-                       current_xfer[0]) < self._instr.max_volume:
-                    asp_grouped.append(current_xfer)
-                    current_xfer = next(plan_iter)
-            except StopIteration:
-                done = True
-            yield from self._aspirate_actions(sum(a[0] for a in asp_grouped) +
-                                              self._strategy.disposal_volume,
-                                              self._sources[0])
-            for step in asp_grouped:
-                yield from self._dispense_actions(step[0], step[1],
-                                                  step is not asp_grouped[-1])
-        yield from self._new_tip_action()
-
-    def _plan_consolidate(self):
+        count = min(len(self._volumes), len(self._dests))
+        vols = self._volumes[:count]
+        dests = np.arange(count)
+        if self._strategy.optimize_order and count:
+            dests = self._travel_order(self._dests[:count], self._sources[0])
+            vols = vols[dests]
+        disposal = self._strategy.disposal_volume or 0
+        # Each aspirate holds as many dispenses as fit alongside the disposal
+        # volume and air gap. A volume that does not fit on its own gets an
+        # aspirate to itself, which the pipette will refuse
+        starts, ends = self._group(
+            vols, self._instr.max_volume - disposal - self._strategy.air_gap,
+            at_least_one=True)
+        always = int(self._strategy.new_tip == types.TransferTipPolicy.ALWAYS)
+        total = len(starts) + ends + 2 * always
+        kinds = np.full(total, _Event.DISPENSE_NEXT, np.uint8)
+        volumes = np.zeros(total)
+        locations = np.full(total, -1, np.int32)
+        if always:
+            kinds[0] = _Event.PICK_UP
+            kinds[-1] = _Event.DROP
+        group_of = np.repeat(np.arange(len(starts)), np.diff(
+            np.append(starts, ends)))
+        aspirates = always + starts + np.arange(len(starts))
+        dispenses = always + 1 + np.arange(ends) + group_of
+        kinds[aspirates] = _Event.ASPIRATE
+        volumes[aspirates] = np.add.reduceat(vols[:ends], starts) + disposal
+        locations[aspirates] = 0
+        volumes[dispenses] = vols[:ends]
+        locations[dispenses] = dests[:ends] + len(self._sources)
+        # The last dispense of each aspirate
+        kinds[dispenses[np.append(starts[1:], ends) - 1]] = _Event.DISPENSE
+        return kinds, volumes, locations
+
+    def _plan_consolidate(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
         """
         * **Source/ Dest:** Many sources to one destination
         * **Volume:** Single volume or List of volumes is acceptable. This list
@@ -575,107 +775,164 @@ class TransferPlan:
                *.. Aspirate -> Air gap -> Touch tip ->..
                .. Aspirate -> .....*
         """
-        plan_iter = zip(self._volumes, self._sources)
-        current_xfer = next(plan_iter)
-        if self._strategy.new_tip == types.TransferTipPolicy.ALWAYS:
-            yield self._format_dict('pick_up_tip', kwargs=self._tip_opts)
-        done = False
-        while not done:
-            asp_grouped = []
-            try:
-                while (sum([a[0] for a in asp_grouped]) +
-                       self._strategy.disposal_volume +
-                       self._strategy.air_gap * len(asp_grouped) +
-                       current_xfer[0]) < self._instr.max_volume:
-                    asp_grouped.append(current_xfer)
-                    current_xfer = next(plan_iter)
-            except StopIteration:
-                done = True
-            if not asp_grouped:
-                break
-            # Q: What accounts as disposal volume in a consolidate action?
-            # yield self._format_dict('aspirate',
-            #                         self._strategy.disposal_volume, loc)
-            for step in asp_grouped:
-                yield from self._aspirate_actions(step[0], step[1])
-            yield from self._dispense_actions(
-                sum([a[0] + self._strategy.air_gap for a in asp_grouped])
-                - self._strategy.air_gap,
-                self._dests[0])
-        yield from self._new_tip_action()
-
-    def _aspirate_actions(self, vol, loc):
-        yield from self._before_aspirate()
-        yield self._format_dict('aspirate',
-                                [vol, loc, self._options.aspirate.rate])
-        yield from self._after_aspirate()
-
-    def _dispense_actions(self, vol, loc, is_disp_next=False):
-        yield from self._before_dispense()
-        yield self._format_dict('dispense',
-                                [vol, loc, self._options.dispense.rate])
-        yield from self._after_dispense(loc, is_disp_next)
-
-    def _before_aspirate(self):
-        if self._strategy.mix_strategy == MixStrategy.BEFORE or \
-                self._strategy.mix_strategy == MixStrategy.BOTH:
-            if self._instr.current_volume == 0:
-                yield self._format_dict('mix', kwargs=self._mix_before_opts)
-
-    def _after_aspirate(self):
-        if self._strategy.air_gap:
-            yield self._format_dict('air_gap', [self._strategy.air_gap])
-        if self._strategy.touch_tip_strategy == TouchTipStrategy.ALWAYS:
-            yield self._format_dict('touch_tip', kwargs=self._touch_tip_opts)
-
-    def _before_dispense(self):
-        if self._strategy.air_gap:
-            yield self._format_dict('dispense', [self._strategy.air_gap])
-
-    def _after_dispense(self, loc, is_disp_next=False):
+        count = min(len(self._volumes), len(self._sources))
+        vols = self._volumes[:count]
+        sources = np.arange(count)
+        if self._strategy.optimize_order and count:
+            sources = self._travel_order(
+                self._sources[:count], self._dests[0])
+            vols = vols[sources]
+        air_gap = self._strategy.air_gap
+        # Each aspirate is followed by an air gap, except that the last one's
+        # is dispensed separately.
+        # Q: What accounts as disposal volume in a consolidate action?
+        starts, ends = self._group(
+            vols + air_gap,
+            self._instr.max_volume - (self._strategy.disposal_volume or 0)
+            + air_gap,
+            at_least_one=False)
+        always = int(self._strategy.new_tip == types.TransferTipPolicy.ALWAYS)
+        total = len(starts) + ends + 2 * always
+        kinds = np.full(total, _Event.ASPIRATE, np.uint8)
+        volumes = np.zeros(total)
+        locations = np.full(total, -1, np.int32)
+        if always:
+            kinds[0] = _Event.PICK_UP
+            kinds[-1] = _Event.DROP
+        group_ends = np.append(starts[1:], ends)
+        group_of = np.repeat(np.arange(len(starts)), group_ends - starts)
+        aspirates = always + np.arange(ends) + group_of
+        dispenses = always + group_ends + np.arange(len(starts))
+        volumes[aspirates] = vols[:ends]
+        locations[aspirates] = sources[:ends]
+        kinds[dispenses] = _Event.DISPENSE
+        volumes[dispenses] = np.add.reduceat(
+            vols[:ends] + air_gap, starts) - air_gap
+        locations[dispenses] = len(self._sources)
+        return kinds, volumes, locations
+
+    @staticmethod
+    def _group(volumes: np.ndarray, limit: float,
+               at_least_one: bool) -> Tuple[np.ndarray, int]:
+        """ Greedily split volumes into consecutive groups whose totals are
+        each less than a limit.
+
+        :param at_least_one: What to do with a volume that is not less than
+                             the limit on its own: if true, it is put in a
+                             group by itself; if false, grouping stops there
+        :returns: The index at which each group starts and the index of the
+                  end of the last group
+        """
+        totals = np.cumsum(volumes)
+        starts: List[int] = []
+        start = 0
+        done = 0.0
+        while start < len(volumes):
+            end = int(np.searchsorted(totals, done + limit, side='left'))
+            if end <= start:
+                if not at_least_one:
+                    break
+                end = start + 1
+            starts.append(start)
+            start = end
+            done = totals[end - 1]
+        return np.array(starts, dtype=int), start
+
+    @staticmethod
+    def _travel_order(wells: List[Well], start: Well) -> np.ndarray:
+        """ An order to visit wells in that keeps gantry travel short.
+
+        The wells of each labware are kept together, in the order the labware
+        first appear in. Within each, the path goes to the nearest (in x and
+        y) well not yet visited next, beginning with the one nearest to
+        ``start`` or to the end of the path through the previous labware.
+
+        :returns: The indices of the wells, in the order to visit them
+        """
+        points = np.array([well.top().point[:2] for well in wells])
+        labware: Dict[int, int] = {}
+        groups = np.array([labware.setdefault(id(well.parent), len(labware))
+                           for well in wells])
+        position = np.array(start.top().point[:2])
+        order: List[int] = []
+        for group in range(len(labware)):
+            remaining = np.flatnonzero(groups == group)
+            while remaining.size:
+                offsets = points[remaining] - position
+                nearest = int(np.argmin(np.einsum('ij,ij->i',
+                                                  offsets, offsets)))
+                order.append(remaining[nearest])
+                position = points[remaining[nearest]]
+                remaining = np.delete(remaining, nearest)
+        return np.array(order, dtype=int)
+
+    def _templates(self) -> List[List[StepOp]]:
+        """ The steps each kind of :py:class:`_Event` expands to with this
+        plan's options """
+        strategy = self._strategy
+        mix_before = strategy.mix_strategy in (
+            MixStrategy.BEFORE, MixStrategy.BOTH)
+        mix_after = strategy.mix_strategy in (
+            MixStrategy.AFTER, MixStrategy.BOTH)
+        touch_tip = strategy.touch_tip_strategy == TouchTipStrategy.ALWAYS
+        air_gap = bool(strategy.air_gap)
+
+        aspirate = [StepOp.MIX_BEFORE_IF_EMPTY] if mix_before else []
+        aspirate.append(StepOp.ASPIRATE)
+        dispense = [StepOp.DISPENSE_AIR_GAP] if air_gap else []
+        dispense.append(StepOp.DISPENSE)
+        dispense_next = list(dispense)
+        if air_gap:
+            aspirate.append(StepOp.AIR_GAP)
+            dispense_next.append(StepOp.AIR_GAP)
+        if touch_tip:
+            aspirate.append(StepOp.TOUCH_TIP)
         # This sequence of actions is subject to change
-        if not is_disp_next:
-            if self._instr.current_volume == 0:
-                if self._strategy.mix_strategy == MixStrategy.AFTER or \
-                        self._strategy.mix_strategy == MixStrategy.BOTH:
-                    yield self._format_dict('mix', kwargs=self._mix_after_opts)
-                if self._strategy.blow_out_strategy \
-                   == BlowOutStrategy.DEST_IF_EMPTY:
-                    yield self._format_dict('blow_out', [loc])
-            if self._strategy.blow_out_strategy == BlowOutStrategy.TRASH:
-                yield self._format_dict('blow_out', [
-                    self._instr.trash_container.wells()[0]])
-            elif self._strategy.blow_out_strategy == \
-                    BlowOutStrategy.CUSTOM_LOCATION:
-                yield self._format_dict('blow_out', kwargs=self._blow_opts)
-
+        if mix_after:
+            dispense.append(StepOp.MIX_AFTER_IF_EMPTY)
+        if strategy.blow_out_strategy == BlowOutStrategy.DEST_IF_EMPTY:
+            dispense.append(StepOp.BLOW_OUT_IF_EMPTY)
+        elif strategy.blow_out_strategy == BlowOutStrategy.TRASH:
+            dispense.append(StepOp.BLOW_OUT_TRASH)
+        elif strategy.blow_out_strategy == BlowOutStrategy.CUSTOM_LOCATION:
+            dispense.append(StepOp.BLOW_OUT_CUSTOM)
+        if touch_tip:
+            dispense.append(StepOp.TOUCH_TIP)
+            dispense_next.append(StepOp.TOUCH_TIP)
+
+        if strategy.drop_tip_strategy == DropTipStrategy.RETURN:
+            drop = [StepOp.RETURN_TIP]
         else:
-            # Used by distribute
-            if self._strategy.air_gap:
-                yield self._format_dict('air_gap', [self._strategy.air_gap])
-        if self._strategy.touch_tip_strategy == TouchTipStrategy.ALWAYS:
-            yield self._format_dict('touch_tip', kwargs=self._touch_tip_opts)
-
-    def _new_tip_action(self):
-        if self._strategy.new_tip == types.TransferTipPolicy.ALWAYS:
-            if self._strategy.drop_tip_strategy == DropTipStrategy.RETURN:
-                yield self._format_dict('return_tip')
-            else:
-                yield self._format_dict('drop_tip')
-
-    def _format_dict(self, method: str,
-                     args: List = None, kwargs: Any = None):
-        if kwargs:
-            params = {key: val for key, val in kwargs._asdict().items() if val}
-        else:
-            params = {}
-        if not args:
-            args = []
-        return {'method': method, 'args': args, 'kwargs': params}
-
-    def _create_volume_list(self, volume, total_xfers):
+            drop = [StepOp.DROP_TIP]
+        templates = {
+            _Event.PICK_UP: [StepOp.PICK_UP_TIP],
+            _Event.DROP: drop,
+            _Event.ASPIRATE: aspirate,
+            _Event.DISPENSE: dispense,
+            _Event.DISPENSE_NEXT: dispense_next}
+        return [templates[event] for event in _Event]
+
+    def _expand(self, kinds: np.ndarray, volumes: np.ndarray,
+                locations: np.ndarray) -> np.ndarray:
+        """ Expand planned events into steps """
+        templates = self._templates()
+        lengths = np.array([len(template) for template in templates])
+        table = np.zeros((len(templates), lengths.max()), np.uint8)
+        for index, template in enumerate(templates):
+            table[index, :len(template)] = template
+        used = np.arange(lengths.max()) < lengths[:, np.newaxis]
+
+        kinds = kinds.astype(int)
+        counts = lengths[kinds]
+        steps = np.empty(int(counts.sum()), STEP_DTYPE)
+        steps['op'] = table[kinds][used[kinds]]
+        steps['volume'] = np.repeat(volumes, counts)
+        steps['location'] = np.repeat(locations, counts)
+        return steps
+
+    def _create_volume_list(self, volume, total_xfers) -> np.ndarray:
         if isinstance(volume, (float, int)):
-            return [volume] * total_xfers
+            return np.full(total_xfers, volume, dtype=float)
         elif isinstance(volume, tuple):
             return self._create_volume_gradient(
                 volume[0], volume[-1], total_xfers,
@@ -687,21 +944,36 @@ class TransferPlan:
             elif not len(volume) == total_xfers:
                 raise RuntimeError("List of volumes should be equal to number "
                                    "of transfers")
-            return volume
-
-    def _create_volume_gradient(self, min_v, max_v, total, gradient=None):
-
-        diff_vol = max_v - min_v
-
-        def _map_volume(i):
-            nonlocal diff_vol, total
-            rel_x = i / (total - 1)
-            rel_y = gradient(rel_x) if gradient else rel_x
-            return (rel_y * diff_vol) + min_v
-
-        return [_map_volume(i) for i in range(total)]
-
-    def _multichannel_transfer(self, s, d):
+            return np.array(volume, dtype=float)
+
+    def _create_volume_gradient(self, min_v, max_v, total,
+                                gradient=None) -> np.ndarray:
+        rel_x = np.arange(total) / max(total - 1, 1)
+        if gradient:
+            # The gradient function takes and returns one float at a time
+            rel_y = np.fromiter(map(gradient, rel_x), float, total)
+        else:
+            rel_y = rel_x
+        return rel_y * (max_v - min_v) + min_v
+
+    def _multichannel_transfer(self, s, d, volume):
+        """ Collapse the wells of a multichannel transfer into the fewest
+        operations of the pipette.
+
+        Each well is mapped to the position of the pipette that reaches it
+        (the well its first channel goes to) and the channel that does.
+        Wells that one position of the pipette reaches with different
+        channels are handled by a single operation: for a transfer, that is
+        pairs of wells whose source and destination positions are the same
+        and which use the same channel at both; for a distribute or
+        consolidate, the wells of the list with more of them. A list of
+        volumes for every well is reduced to one for every operation.
+
+        :returns: The sources, destinations and volume to plan with
+        :raises ValueError: If a source and destination would be reached by
+                            different channels, or the wells of an operation
+                            were given different volumes
+        """
         # TODO: add a check for container being multi-channel compatible?
         # Helper function for multi-channel use-case
         assert isinstance(s, Well) or \
@@ -713,32 +985,152 @@ class TransferPlan:
             (isinstance(d, List) and isinstance(d[0], List)), \
             'Target should be a Well or List[Well] but is {}'.format(d)
 
-        # TODO: Account for cases where a src/dest list has a non-first-row
-        # well (eg, 'B1') and would expect the robot/pipette to
-        # understand that it is referring to the whole first column
-        if isinstance(s, List) and isinstance(s[0], List):
-            # s is a List[List]]; flatten to 1D list
-            s = [well for list_elem in s for well in list_elem]
-        elif isinstance(s, Well):
-            s = [s]
-        new_src = []
-        for well in s:
-            if self._is_first_row(well):
-                # For now, just use wells that are in first row
-                new_src.append(well)
-
-        if isinstance(d, List) and isinstance(d[0], List):
-            # s is a List[List]]; flatten to 1D list
-            d = [well for list_elem in d for well in list_elem]
-        elif isinstance(d, Well):
-            d = [d]
-        new_dst = []
-        for well in d:
-            if self._is_first_row(well):
-                # For now, just use wells that are in first row
-                new_dst.append(well)
-
-        return new_src, new_dst
-
-    def _is_first_row(self, well: Well):
-        return well in well.parent.rows()[0]
+        s = self._flatten_wells(s)
+        d = self._flatten_wells(d)
+
+        reached: Dict[int, Dict[int, Tuple[Well, Optional[int]]]] = {}
+        src = [self._channel_position(well, reached) for well in s]
+        dst = [self._channel_position(well, reached) for well in d]
+        if len(src) == len(dst):
+            new_src, new_dst, operations = self._pair_operations(
+                src, dst, s, d)
+        else:
+            src_ops = self._group_by_position(
+                [(pos,) for pos, _ in src], [chan for _, chan in src])
+            dst_ops = self._group_by_position(
+                [(pos,) for pos, _ in dst], [chan for _, chan in dst])
+            new_src = [src[members[0]][0] for members in src_ops]
+            new_dst = [dst[members[0]][0] for members in dst_ops]
+            operations = src_ops if len(s) > len(d) else dst_ops
+
+        wells = max(len(s), len(d))
+        if isinstance(volume, List) and len(volume) == wells\
+           and len(operations) != wells:
+            volume = self._pool_volumes(
+                volume, operations, s if len(s) == wells else d)
+
+        self.compaction = Compaction(wells, len(operations))
+        if len(operations) < wells:
+            log.info('Collapsed a multichannel transfer of {} wells into {} '
+                     'operations'.format(wells, len(operations)))
+        return new_src, new_dst, volume
+
+    @staticmethod
+    def _flatten_wells(wells):
+        """ Flatten a list of lists of wells into a list of wells, and make a
+        single well a list of one """
+        if isinstance(wells, List) and isinstance(wells[0], List):
+            return [well for well_list in wells for well in well_list]
+        elif isinstance(wells, Well):
+            return [wells]
+        return wells
+
+    @classmethod
+    def _pair_operations(
+            cls,
+            src: List[Tuple[Well, Optional[int]]],
+            dst: List[Tuple[Well, Optional[int]]],
+            s: List[Well],
+            d: List[Well])\
+            -> Tuple[List[Well], List[Well], List[List[int]]]:
+        """ Group the source and destination pairs of a transfer into
+        operations, given the position and channel of each well.
+
+        :returns: The source and destination of each operation, and the
+                  indices of the pairs each handles
+        :raises ValueError: If a source and destination would be reached by
+                            different channels
+        """
+        for (src_pos, src_chan), (dst_pos, dst_chan), sw, dw in zip(
+                src, dst, s, d):
+            if src_chan is not None and dst_chan is not None\
+               and src_chan != dst_chan:
+                raise ValueError(
+                    '{} and {} are not reached by the same channel of '
+                    'the pipette'.format(sw, dw))
+        operations = cls._group_by_position(
+            [(src_pos, dst_pos) for (src_pos, _), (dst_pos, _)
+             in zip(src, dst)],
+            [dst_chan if dst_chan is not None else src_chan
+             for (_, src_chan), (_, dst_chan) in zip(src, dst)])
+        return ([src[members[0]][0] for members in operations],
+                [dst[members[0]][0] for members in operations],
+                operations)
+
+    @staticmethod
+    def _pool_volumes(volume: List[float], operations: List[List[int]],
+                      wells: List[Well]) -> List[float]:
+        """ Reduce a volume for every well to one for every operation.
+
+        :raises ValueError: If the wells of an operation were given different
+                            volumes
+        """
+        pooled = []
+        for members in operations:
+            volumes = {volume[idx] for idx in members}
+            if len(volumes) > 1:
+                raise ValueError(
+                    'Wells handled by one operation of the pipette must '
+                    'get the same volume, but {} get {}'.format(
+                        ', '.join(str(wells[idx]) for idx in members),
+                        sorted(volumes)))
+            pooled.append(volumes.pop())
+        return pooled
+
+    @staticmethod
+    def _channel_position(
+            well: Well,
+            reached: Dict[int, Dict[int, Tuple[Well, Optional[int]]]])\
+            -> Tuple[Well, Optional[int]]:
+        """ The well the first channel of a multichannel pipette goes to to
+        reach a well, and the channel that reaches it (``None`` if the well
+        is in labware with a single row, which all channels reach together).
+
+        :param reached: A cache of the positions of the wells of each labware
+                        already looked up
+        """
+        labware = well.parent
+        try:
+            return reached[id(labware)][id(well)]
+        except KeyError:
+            pass
+        rows = labware.rows()
+        positions: Dict[int, Tuple[Well, Optional[int]]] = {}
+        if len(rows) == 1:
+            for row_well in rows[0]:
+                positions[id(row_well)] = (row_well, None)
+        else:
+            pitch = abs(rows[1][0].top().point.y - rows[0][0].top().point.y)
+            # How many rows apart neighboring channels are
+            step = max(1, round(DISTANCE_BETWEEN_NOZZLES / pitch))
+            span = step * MULTICHANNEL_CHANNELS
+            for row_idx, row in enumerate(rows):
+                first = row_idx - row_idx % span + row_idx % step
+                channel = (row_idx % span) // step
+                for col_idx, row_well in enumerate(row):
+                    positions[id(row_well)] = (rows[first][col_idx], channel)
+        reached[id(labware)] = positions
+        return positions[id(well)]
+
+    @staticmethod
+    def _group_by_position(keys: List[Tuple[Well, ...]],
+                           channels: List[Optional[int]]) -> List[List[int]]:
+        """ Group the indices of wells that one operation of the pipette can
+        handle: those with the same positions, in order of first appearance,
+        as long as no channel would be used twice.
+
+        :returns: The indices of the wells in each operation
+        """
+        operations: List[List[int]] = []
+        current: Dict[Tuple[int, ...], int] = {}
+        used: List[set] = []
+        for idx, (key, channel) in enumerate(zip(keys, channels)):
+            ids = tuple(id(pos) for pos in key)
+            op = current.get(ids)
+            if op is None or channel is None or channel in used[op]:
+                op = current[ids] = len(operations)
+                operations.append([])
+                used.append(set())
+            operations[op].append(idx)
+            used[op].add(channel)
+        return operations
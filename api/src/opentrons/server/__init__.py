@@ -6,9 +6,12 @@ from typing import TYPE_CHECKING
 from aiohttp import web
 
 from opentrons.config import CONFIG
+from . import serialize
 from .rpc import RPCServer
 from .http import HTTPServer
+from opentrons.api import models
 from opentrons.api.routers import MainRouter
+from opentrons.api.session import Session
 import opentrons
 
 if TYPE_CHECKING:
@@ -16,6 +19,18 @@ if TYPE_CHECKING:
 
 log = logging.getLogger(__name__)
 
+# The attributes of the API objects that are sent to clients
+serialize.register_schema(Session, (
+    'name', 'protocol_text', 'state', 'command_count', 'command_log',
+    'errors', 'instruments', 'containers', 'modules', 'metadata',
+    'startTime'))
+serialize.register_schema(
+    models.Container, ('id', 'name', 'type', 'slot', 'instruments'))
+serialize.register_schema(
+    models.Instrument,
+    ('id', 'name', 'channels', 'mount', 'containers', 'tip_racks'))
+serialize.register_schema(models.Module, ('id', 'name', 'slot'))
+
 
 @web.middleware
 async def error_middleware(request, handler):
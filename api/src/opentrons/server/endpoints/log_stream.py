@@ -0,0 +1,236 @@
+"""
+Push log records to clients as they are logged.
+
+Clients subscribe with a GET request and get the records as server-sent
+events (``text/event-stream``) until they disconnect, which lets them follow
+the logs instead of polling ``GET /logs/:syslog_identifier``.
+
+Each client has its own queue of records waiting to be sent. Records are sent
+as fast as the client reads them; if it falls more than :py:data:`MAX_QUEUED`
+records behind, the oldest are dropped and the client is sent a ``dropped``
+event with how many were lost instead.
+"""
+import asyncio
+import contextlib
+import datetime
+import json
+import logging
+import syslog
+from collections import deque
+from typing import Any, Deque, Dict, Iterator, List, Mapping, Set, Tuple
+
+from aiohttp import web
+
+#: The most records to keep for a client that isn't keeping up
+MAX_QUEUED = 1000
+
+#: Seconds without records after which a keepalive comment is sent
+KEEPALIVE_INTERVAL = 15
+
+# The most severe syslog priority a record can have to pass each level
+_LEVEL_TO_SYSLOG_PRIORITY = {
+    'debug': syslog.LOG_DEBUG,
+    'info': syslog.LOG_INFO,
+    'warning': syslog.LOG_WARNING,
+    'error': syslog.LOG_ERR,
+    'critical': syslog.LOG_CRIT
+}
+
+_LOGGING_TO_SYSLOG = [
+    (logging.CRITICAL, syslog.LOG_CRIT, 'critical'),
+    (logging.ERROR, syslog.LOG_ERR, 'error'),
+    (logging.WARNING, syslog.LOG_WARNING, 'warning'),
+    (logging.INFO, syslog.LOG_INFO, 'info'),
+]
+
+
+class Subscriber:
+    """ The records waiting to be sent to a client """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop,
+                 max_priority: int = syslog.LOG_DEBUG,
+                 max_queued: int = MAX_QUEUED) -> None:
+        """
+        :param max_priority: The syslog priority of the least severe records
+                             to send
+        """
+        self._loop = loop
+        self._max_priority = max_priority
+        self._records: Deque[Dict[str, Any]] = deque(maxlen=max_queued)
+        self._dropped = 0
+        self._ready = asyncio.Event()
+
+    def put(self, record: Dict[str, Any]):
+        """ Queue a record formatted like a json log record, if it passes
+        the subscriber's level. Must be called from the subscriber's loop """
+        level = record.get('level')
+        if level is not None and level > self._max_priority:
+            return
+        if len(self._records) == self._records.maxlen:
+            self._dropped += 1
+        self._records.append(record)
+        self._ready.set()
+
+    def put_threadsafe(self, record: Dict[str, Any]):
+        """ Queue a record from any thread """
+        try:
+            self._loop.call_soon_threadsafe(self.put, record)
+        except RuntimeError:
+            # The loop is closed, so nobody is reading
+            pass
+
+    async def get(self, timeout: float = None)\
+            -> Tuple[List[Dict[str, Any]], int]:
+        """ Wait (up to ``timeout`` seconds) for records and take them.
+
+        :returns: The records, oldest first, and how many were dropped
+                  before them
+        """
+        if not self._records:
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        self._ready.clear()
+        records, dropped = list(self._records), self._dropped
+        self._records.clear()
+        self._dropped = 0
+        return records, dropped
+
+
+class _LogBroadcaster(logging.Handler):
+    """ Sends the records of the ``opentrons`` logger to each subscriber.
+
+    The handler is only attached to the logger while there are subscribers.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._subscribers: Set[Subscriber] = set()
+
+    @contextlib.contextmanager
+    def subscribe(self, subscriber: Subscriber) -> Iterator[None]:
+        logger = logging.getLogger('opentrons')
+        if not self._subscribers:
+            logger.addHandler(self)
+        self._subscribers.add(subscriber)
+        try:
+            yield
+        finally:
+            self._subscribers.discard(subscriber)
+            if not self._subscribers:
+                logger.removeHandler(self)
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            formatted = _format_log_record(record, self.format(record))
+        except Exception:
+            self.handleError(record)
+            return
+        for subscriber in list(self._subscribers):
+            subscriber.put_threadsafe(formatted)
+
+
+_broadcaster = _LogBroadcaster()
+
+
+def _format_log_record(record: logging.LogRecord,
+                       message: str) -> Dict[str, Any]:
+    """ Format a python log record like a json journal record """
+    for level, priority, name in _LOGGING_TO_SYSLOG:
+        if record.levelno >= level:
+            break
+    else:
+        priority, name = syslog.LOG_DEBUG, 'debug'
+    return {
+        'logger': record.name,
+        'level': priority,
+        'level_name': name,
+        'file': record.pathname,
+        'line': record.lineno,
+        'func': record.funcName,
+        'time': datetime.datetime.fromtimestamp(record.created).isoformat(),
+        'message': message
+    }
+
+
+def _format_record_text(record: Dict[str, Any]) -> str:
+    return f'{record["time"]} {record["logger"]} '\
+        f'[{record["level_name"]}]: {record["message"]}'
+
+
+def _event(data: str, event: str = None) -> str:
+    """ Format a server-sent event """
+    lines = [f'event: {event}'] if event else []
+    lines.extend(f'data: {line}' for line in data.split('\n'))
+    return '\n'.join(lines) + '\n\n'
+
+
+def get_stream_options(params: Mapping[str, str]) -> Dict[str, Any]:
+    """ Parse the options of a stream request.
+
+    :raises ValueError: If an option is invalid
+    """
+    record_format = params.get('format', 'json')
+    if record_format not in ('json', 'text'):
+        raise ValueError(f'format must be json or text, not {record_format}')
+    level = params.get('level', 'debug').lower()
+    if level not in _LEVEL_TO_SYSLOG_PRIORITY:
+        raise ValueError(f'invalid log level {level}')
+    return {
+        'format': record_format,
+        'max_priority': _LEVEL_TO_SYSLOG_PRIORITY[level]
+    }
+
+
+async def send_events(request: web.Request, subscriber: Subscriber,
+                      record_format: str) -> web.StreamResponse:
+    """ Send the records queued for a subscriber as server-sent events until
+    the client disconnects """
+    response = web.StreamResponse(headers={'Cache-Control': 'no-cache'})
+    response.content_type = 'text/event-stream'
+    response.enable_chunked_encoding()
+    await response.prepare(request)
+    # Let the client know the subscription started
+    await response.write(b': subscribed\n\n')
+    while True:
+        records, dropped = await subscriber.get(KEEPALIVE_INTERVAL)
+        chunk = []
+        if dropped:
+            chunk.append(_event(json.dumps({'dropped': dropped}), 'dropped'))
+        for record in records:
+            if record_format == 'text':
+                chunk.append(_event(_format_record_text(record)))
+            else:
+                chunk.append(_event(json.dumps(record)))
+        if not chunk:
+            chunk.append(': keepalive\n\n')
+        # Waits for a client that isn't keeping up to catch up, while
+        # records for it keep being queued (or dropped)
+        await response.write(''.join(chunk).encode())
+
+
+async def stream_logs(request: web.Request) -> web.StreamResponse:
+    """ Follow the logs of the ``opentrons`` logger.
+
+    GET /logs/stream -> 200 OK, server-sent events
+
+    Each record logged after the request is sent as an event, with the record
+    as its data. This endpoint accepts the following (optional) query
+    parameters:
+    - ``format``: ``json`` or ``text`` (default: json). The format of each
+      record, as in ``GET /logs/:syslog_identifier``.
+    - ``level``: ``debug``, ``info``, ``warning``, ``error`` or ``critical``
+      (default: debug). The least severe records to send. Records less severe
+      than the level of the logger are never logged.
+
+    If the client falls too far behind, a ``dropped`` event with data
+    ``{"dropped": int}`` is sent in place of the records it missed.
+    """
+    try:
+        opts = get_stream_options(request.query)
+    except ValueError as e:
+        return web.json_response({'message': str(e)}, status=400)
+    subscriber = Subscriber(request.app.loop, opts['max_priority'])
+    with _broadcaster.subscribe(subscriber):
+        return await send_events(request, subscriber, opts['format'])
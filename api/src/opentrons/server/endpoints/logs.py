@@ -4,16 +4,62 @@ import datetime
 import json
 import logging
 import syslog
-from typing import Any, Deque, Dict, List, Mapping
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Mapping
 
 from aiohttp import web
 import systemd.journal as journal
 
+from . import log_stream
+
 
 LOG = logging.getLogger(__name__)
 
 MAX_RECORDS = 1000000
 
+# How many records to format into each chunk of a response
+CHUNK_RECORDS = 100
+
+_CONTENT_TYPES = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+    'text': 'text/plain'
+}
+
+
+def _parse_time(since: str) -> datetime.datetime:
+    """ Parse a time either as seconds since the epoch or in the format of
+    the ``time`` of a json record (an ISO 8601 local time) """
+    try:
+        return datetime.datetime.fromtimestamp(float(since))
+    except ValueError:
+        pass
+    for fmt in ('%Y-%m-%dT%H:%M:%S.%f', '%Y-%m-%dT%H:%M:%S'):
+        try:
+            return datetime.datetime.strptime(since, fmt)
+        except ValueError:
+            pass
+    raise ValueError(since)
+
+
+def _parse_format(record_format: str) -> str:
+    if record_format not in _CONTENT_TYPES:
+        raise ValueError(record_format)
+    return record_format
+
+
+def _parse_records(records: str) -> int:
+    count = int(records)
+    if count <= 0 or count > MAX_RECORDS:
+        raise ValueError(count)
+    return count
+
+
+# The options parsed from each query parameter, in order
+_OPTION_PARSERS = (
+    ('format', _parse_format),
+    ('records', _parse_records),
+    ('since', _parse_time))
+
 
 def _get_options(params: Mapping[str, str],
                  default_length: int) -> Dict[str, Any]:
@@ -22,42 +68,65 @@ def _get_options(params: Mapping[str, str],
     :py:meth:`aiohttp.web.Request.json`. Will not fail; malformed
     requests will just use defaults.
     """
-    response = {
+    response: Dict[str, Any] = {
         'format': 'json',
-        'records': default_length
+        'records': default_length,
+        'before': None,
+        'since': None
     }
 
-    print({k: v for k, v in params.items()})
-
-    if 'format' in params:
-        if params['format'] not in ('text', 'json'):
-            LOG.error(f"Bad log format requested: {params['format']}")
-        else:
-            response['format'] = params['format']
-
-    if 'records' in params:
+    for name, parse in _OPTION_PARSERS:
+        if name not in params:
+            continue
         try:
-            records = int(params['records'])
-            if records <= 0 or records > MAX_RECORDS:
-                raise ValueError(records)
-        except (ValueError, TypeError):
-            LOG.exception(f"Bad records count requested: {params['records']}")
-        else:
-            response['records'] = records
+            response[name] = parse(params[name])
+        except (ValueError, TypeError, OverflowError, OSError):
+            LOG.exception(f"Bad log {name} requested: {params[name]}")
+
+    if params.get('before'):
+        response['before'] = params['before']
     return response
 
 
-async def _get_records(syslog_selector: str, record_count: int)\
+async def _get_records(syslog_selector: str, record_count: int,
+                       before: str = None,
+                       since: datetime.datetime = None)\
           -> Deque[Dict[str, Any]]:
-    """ Get log records up to record count.
+    """ Get the last log records up to record count, oldest first.
+
+    The journal is read backwards from its end, or from the record at the
+    cursor ``before`` (which is not included), and reading stops at the
+    first record from before ``since``.
+
+    The records are only in the right order to send once they have all been
+    read, so they are all kept in memory: memory use grows with the number
+    of records requested, up to :py:data:`MAX_RECORDS`. Clients that need
+    many records can fetch them a page at a time with ``before`` instead.
+
+    :raises ValueError: If ``before`` is not a journal cursor
     """
     loop = asyncio.get_event_loop()
-    log_deque: Deque[Dict[str, Any]] = collections.deque(maxlen=record_count)
+    log_deque: Deque[Dict[str, Any]] = collections.deque()
     with journal.Reader(journal.SYSTEM_ONLY) as r:
         r.add_match(SYSLOG_IDENTIFIER=syslog_selector)
+        if before:
+            try:
+                r.seek_cursor(before)
+            except OSError:
+                raise ValueError(f'Bad log cursor: {before}')
+            # Reading back from a cursor starts at its own record, unless
+            # that record is gone
+            if r.get_previous() and not r.test_cursor(before):
+                r.get_next()
+        else:
+            r.seek_tail()
         last_time = loop.time()
-        for record in r:
-            log_deque.append(record)
+        while len(log_deque) < record_count:
+            record = r.get_previous()
+            if not record or (
+                    since and record['__REALTIME_TIMESTAMP'] < since):
+                break
+            log_deque.appendleft(record)
             now = loop.time()
             if (now-last_time) > 0.1:
                 last_time = now
@@ -71,8 +140,30 @@ def _format_record_text(record: Dict[str, Any]) -> str:
         f'[{dict_rec["level_name"]}]: {dict_rec["message"]}'
 
 
-def _format_text(records: Deque[Dict[str, Any]]) -> str:
-    return '\n'.join([_format_record_text(record) for record in records])
+def _format_chunks(records: Iterable[Dict[str, Any]],
+                   record_format: str) -> Iterator[str]:
+    """ Format records a chunk at a time. The chunks of the json format
+    together make up a json list, and the other formats have a line for each
+    record. """
+    chunk: List[str] = []
+    if record_format == 'json':
+        yield '['
+    for index, record in enumerate(records):
+        if record_format == 'text':
+            chunk.append(_format_record_text(record) + '\n')
+        else:
+            formatted = json.dumps(_format_record_dict(record))
+            if record_format == 'ndjson':
+                chunk.append(formatted + '\n')
+            else:
+                chunk.append(formatted if index == 0 else ',' + formatted)
+        if len(chunk) == CHUNK_RECORDS:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
+    if record_format == 'json':
+        yield ']'
 
 
 _SYSLOG_PRIORITY_TO_NAME = {
@@ -100,32 +191,84 @@ def _format_record_dict(record: Dict[str, Any]) -> Dict[str, Any]:
             '__REALTIME_TIMESTAMP',
             datetime.datetime.fromtimestamp(0)).isoformat(),
         'boot': str(record.get('_BOOT_ID', '<unknown>')),
-        'message': record.get('MESSAGE', '<unknown>')
+        'message': record.get('MESSAGE', '<unknown>'),
+        'cursor': record.get('__CURSOR')
     }
 
 
-def _prep_for_json(records: Deque[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    return [_format_record_dict(rec) for rec in records]
+async def _get_log_response(request: web.Request, syslog_selector: str,
+                            opts: Dict[str, Any]) -> web.StreamResponse:
+    try:
+        records = await _get_records(
+            syslog_selector, opts['records'], opts['before'], opts['since'])
+    except ValueError as e:
+        return web.json_response({'message': str(e)}, status=400)
+    response = web.StreamResponse()
+    response.content_type = _CONTENT_TYPES[opts['format']]
+    response.charset = 'utf-8'
+    if records and records[0].get('__CURSOR'):
+        response.headers['X-Log-Cursor'] = records[0]['__CURSOR']
+    response.enable_chunked_encoding()
+    await response.prepare(request)
+    for chunk in _format_chunks(records, opts['format']):
+        await response.write(chunk.encode())
+    await response.write_eof()
+    return response
 
 
-async def _get_log_response(syslog_selector: str, record_count: int,
-                            record_format: str) -> web.Response:
-    records = await _get_records(syslog_selector, record_count)
-    if record_format == 'json':
-        return web.json_response(data=_prep_for_json(records))
-    else:
-        return web.Response(text=_format_text(records))
+def _identifier(request: web.Request) -> str:
+    ident = request.match_info['syslog_identifier']
+    if ident == 'api.log':
+        ident = 'opentrons-api'
+    elif ident == 'serial.log':
+        ident = 'opentrons-api-serial'
+    return ident
 
 
-async def get_logs_by_id(request: web.Request) -> web.Response:
+async def _follow_journal(syslog_selector: str,
+                          subscriber: log_stream.Subscriber):
+    """ Queue each record logged to the journal for a subscriber """
+    loop = asyncio.get_event_loop()
+    changed = asyncio.Event()
+    with journal.Reader(journal.SYSTEM_ONLY) as r:
+        r.add_match(SYSLOG_IDENTIFIER=syslog_selector)
+        r.seek_tail()
+        # Move to the last record, so that reading on gets new records
+        r.get_previous()
+        loop.add_reader(r.fileno(), changed.set)
+        try:
+            while True:
+                await changed.wait()
+                changed.clear()
+                if r.process() == journal.NOP:
+                    continue
+                record = r.get_next()
+                while record:
+                    subscriber.put(_format_record_dict(record))
+                    record = r.get_next()
+        finally:
+            loop.remove_reader(r.fileno())
+
+
+async def get_logs_by_id(request: web.Request) -> web.StreamResponse:
     """ Get logs from the robot.
 
     GET /logs/:syslog_identifier -> 200 OK, log contents in body
 
     This endpoint accepts the following (optional) query parameters:
-    - ``format``: ``json`` or ``text`` (default: text). Controls log format.
+    - ``format``: ``json``, ``ndjson`` (a json record on each line) or
+      ``text`` (default: json). Controls log format.
     - ``records``: int. Count of records to limit the dump to. Default: 15000.
       Limit: 1000000
+    - ``before``: A record's ``cursor``. Only records logged before it are
+      sent. A malformed cursor is a 400 Bad Request.
+    - ``since``: A time, in seconds since the epoch or in the format of a
+      record's ``time``. Only records logged at or after it are sent.
+
+    The most recent records are sent, oldest first, and the response is sent
+    as it is formatted. The ``X-Log-Cursor`` header of the response is the
+    cursor of the oldest record sent, so the records before a response can be
+    fetched by passing it as ``before``.
 
     The syslog identifier is an a string that something has logged to as the
     syslog id. It may not be blank (i.e. GET /logs/ is not allowed). The
@@ -140,14 +283,31 @@ async def get_logs_by_id(request: web.Request) -> web.Response:
     For instance, ``GET /logs/api.log?format=json`` gives the API logs in json
     format.
     """
-    ident = request.match_info['syslog_identifier']
-    if ident == 'api.log':
-        ident = 'opentrons-api'
-    elif ident == 'serial.log':
-        ident = 'opentrons-api-serial'
     opts = _get_options(request.query, 15000)
-    return await _get_log_response(
-        ident, opts['records'], opts['format'])
+    return await _get_log_response(request, _identifier(request), opts)
+
+
+async def stream_logs_by_id(request: web.Request) -> web.StreamResponse:
+    """ Follow logs from the robot.
+
+    GET /logs/:syslog_identifier/stream -> 200 OK, server-sent events
+
+    Each record logged to the syslog identifier (which is interpreted as in
+    ``GET /logs/:syslog_identifier``) after the request is sent as an event.
+    The query parameters and events are those of ``GET /logs/stream``.
+    """
+    try:
+        opts = log_stream.get_stream_options(request.query)
+    except ValueError as e:
+        return web.json_response({'message': str(e)}, status=400)
+    subscriber = log_stream.Subscriber(request.app.loop, opts['max_priority'])
+    follower = request.app.loop.create_task(
+        _follow_journal(_identifier(request), subscriber))
+    try:
+        return await log_stream.send_events(
+            request, subscriber, opts['format'])
+    finally:
+        follower.cancel()
 
 
 async def set_syslog_level(request: web.Request) -> web.Response:
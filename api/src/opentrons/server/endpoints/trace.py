@@ -0,0 +1,58 @@
+import json
+import logging
+from aiohttp import web
+
+from opentrons.util.profiler import profiler
+
+log = logging.getLogger(__name__)
+
+
+def _status() -> dict:
+    return {'enabled': profiler.enabled, 'events': len(profiler)}
+
+
+async def get_trace(request: web.Request) -> web.Response:
+    """ Get the spans the profiler has recorded.
+
+    GET /logs/trace -> 200 OK, Chrome trace event JSON in body
+
+    The body can be saved to a file and opened with ``chrome://tracing`` or
+    https://ui.perfetto.dev. It is empty unless profiling was turned on with
+    ``POST /logs/trace``.
+    """
+    return web.json_response(
+        profiler.export(),
+        headers={'Content-Disposition': 'attachment; filename="trace.json"'})
+
+
+async def set_trace(request: web.Request) -> web.Response:
+    """ Turn the profiler on or off.
+
+    POST /logs/trace {"enabled": bool, "clear": bool} -> 200 OK,
+        {"enabled": bool, "events": int}
+
+    ``enabled`` turns recording on or off. ``clear`` (default: true when
+    turning recording on, false otherwise) forgets any recorded spans. Both
+    are optional, so an empty body returns the state of the profiler.
+    """
+    try:
+        body = await request.json()
+    except json.JSONDecodeError:
+        body = {}
+    if not isinstance(body, dict):
+        return web.json_response(
+            {'message': 'body must be a json object'}, status=400)
+    enabled = body.get('enabled')
+    if enabled not in (True, False, None):
+        return web.json_response(
+            {'message': f'"enabled" must be true or false, got {enabled}'},
+            status=400)
+    if body.get('clear', enabled is True):
+        profiler.clear()
+    if enabled is True:
+        profiler.enable(clear=False)
+        log.info('Profiling enabled')
+    elif enabled is False:
+        profiler.disable()
+        log.info('Profiling disabled')
+    return web.json_response(_status())
@@ -1,7 +1,8 @@
 import logging
 from . import endpoints as endp
 from opentrons import config
-from .endpoints import (networking, control, settings, update)
+from .endpoints import (
+    networking, control, settings, update, trace, log_stream)
 from opentrons.deck_calibration import endpoints as dc_endp
 
 
@@ -50,10 +51,19 @@ class HTTPServer(object):
         self.app.router.add_post(
             '/update/ignore', endpoints.set_ignore_version)
 
+        # Before the other /logs routes, which would otherwise match them
+        self.app.router.add_get(
+            '/logs/trace', trace.get_trace)
+        self.app.router.add_post(
+            '/logs/trace', trace.set_trace)
+        self.app.router.add_get(
+            '/logs/stream', log_stream.stream_logs)
         if config.ARCHITECTURE == config.SystemArchitecture.BUILDROOT:
             from .endpoints import logs
             self.app.router.add_get('/logs/{syslog_identifier}',
                                     logs.get_logs_by_id)
+            self.app.router.add_get('/logs/{syslog_identifier}/stream',
+                                    logs.stream_logs_by_id)
         else:
             self.app.router.add_static(
                 '/logs', self.log_file_path, show_index=True)
@@ -3,11 +3,15 @@ import aiohttp
 import functools
 import json
 import logging
+import threading
 import traceback
+import weakref
+from collections import OrderedDict
 
 from aiohttp import web
 from aiohttp import WSCloseCode
 from asyncio import Queue
+from opentrons.broker import RELEASE_TOPIC
 from opentrons.server import serialize
 from opentrons.protocol_api.execute import ExceptionInProtocolError
 from concurrent.futures import ThreadPoolExecutor
@@ -26,14 +30,113 @@ CONTROL_MESSAGE = 3
 CALL_NACK_MESSAGE = 4
 PONG_MESSAGE = 5
 
+# The most objects from the current generation the registry holds on to;
+# beyond this the least recently serialized are only weakly referenced
+MAX_RETAINED_OBJECTS = 10000
+
+
+class ObjectRegistry(object):
+    """
+    The objects clients can refer to by id.
+
+    Objects serialized since the registry's current generation started are
+    held on to, so that clients can call methods on them even if nothing
+    else refers to them. When a new generation starts (see
+    :py:meth:`release`), or when more than `max_retained` objects are held,
+    older objects are only weakly referenced: they can still be found by id
+    while they are alive elsewhere, and are removed once they are not, so an
+    id recycled onto a new object can never resolve to the old one. Objects
+    that cannot be weakly referenced are dropped instead.
+
+    Pinned objects (like the :py:class:`SystemCalls` object) are always
+    held on to.
+    """
+    def __init__(self, max_retained=MAX_RETAINED_OBJECTS):
+        self._max_retained = max_retained
+        self._lock = threading.RLock()
+        self._pinned = {}
+        self._retained = OrderedDict()
+        self._weak = {}
+        self.generation = 0
+        self.dropped = 0
+
+    def _forget(self, _id, ref):
+        with self._lock:
+            if self._weak.get(_id) is ref:
+                del self._weak[_id]
+
+    def _demote(self, _id, obj):
+        try:
+            ref = weakref.ref(
+                obj, lambda ref, _id=_id: self._forget(_id, ref))
+        except TypeError:
+            self.dropped += 1
+        else:
+            self._weak[_id] = ref
+
+    def pin(self, obj):
+        with self._lock:
+            self._pinned[id(obj)] = obj
+
+    def update(self, refs):
+        """ Register objects serialized for a client, keyed by their id """
+        with self._lock:
+            for _id, obj in refs.items():
+                self._weak.pop(_id, None)
+                self._retained[_id] = obj
+                self._retained.move_to_end(_id)
+            while len(self._retained) > self._max_retained:
+                self._demote(*self._retained.popitem(last=False))
+
+    def release(self):
+        """ Start a new generation, no longer holding on to objects
+        serialized before now """
+        with self._lock:
+            while self._retained:
+                self._demote(*self._retained.popitem(last=False))
+            self.generation += 1
+
+    def __getitem__(self, _id):
+        with self._lock:
+            for objects in (self._pinned, self._retained):
+                if _id in objects:
+                    return objects[_id]
+            obj = self._weak[_id]()
+            if obj is None:
+                raise KeyError(_id)
+            return obj
+
+    def __contains__(self, _id):
+        try:
+            self[_id]
+        except KeyError:
+            return False
+        return True
+
+    def __len__(self):
+        with self._lock:
+            return len(self._pinned) + len(self._retained) + len(self._weak)
+
+    def stats(self):
+        """ The number of objects in the registry, by how they are held """
+        with self._lock:
+            return {
+                'generation': self.generation,
+                'pinned': len(self._pinned),
+                'retained': len(self._retained),
+                'weak': len(self._weak),
+                'dropped': self.dropped
+            }
+
 
 class RPCServer(object):
     def __init__(self, app, root=None):
         self.monitor_events_task = None
         self.app = app
         self.loop = app.loop or asyncio.get_event_loop()
-        self.objects = {}
+        self.objects = ObjectRegistry()
         self.system = SystemCalls(self.objects)
+        self._unsubscribe_release = None
 
         self.root = root
 
@@ -43,6 +146,13 @@ class RPCServer(object):
         self.clients = {}
         self.tasks = []
 
+        # Clients that asked for notifications as patches, with the keys of
+        # the notifications they have a full copy of
+        self._patching = {}
+        # The sequence number and serialized data of the last notification
+        # with each key
+        self._notifications = {}
+
         self.app.router.add_get('/', self.handler)
         self.app.on_shutdown.append(self.on_shutdown)
 
@@ -56,8 +166,21 @@ class RPCServer(object):
             self.monitor_events_task.cancel()
         self.monitor_events_task = \
             self.loop.create_task(self.monitor_events(value))
+        if self._unsubscribe_release:
+            self._unsubscribe_release()
+            self._unsubscribe_release = None
+        # If the root has a broker, it announces when the objects it
+        # handed out (for instance, a session) are no longer needed
+        broker = getattr(value, 'broker', None)
+        if broker is not None:
+            self._unsubscribe_release = broker.subscribe(
+                RELEASE_TOPIC, self._on_release)
         self._root = value
 
+    def _on_release(self, message):
+        self.objects.release()
+        log.debug('Released RPC objects: {}'.format(self.objects.stats()))
+
     def start(self, host, port):
         # This call will block while server is running
         # run_app is capable of catching SIGINT and shutting down
@@ -67,6 +190,9 @@ class RPCServer(object):
     def shutdown(self):
         [task.cancel() for task, _ in self.clients.values()]
         self.monitor_events_task.cancel()
+        if self._unsubscribe_release:
+            self._unsubscribe_release()
+            self._unsubscribe_release = None
 
     async def on_shutdown(self, app):
         """
@@ -117,11 +243,7 @@ class RPCServer(object):
                 # during serialization to avoid flooding comms
                 data = self.call_and_serialize(
                     lambda: event)
-                self.send(
-                    {
-                        '$': {'type': NOTIFICATION_MESSAGE},
-                        'data': data
-                    })
+                self.send_notification(data, _is_update(event))
             except Exception:
                 log.exception('While processing event {0}:'.format(event))
 
@@ -163,9 +285,11 @@ class RPCServer(object):
 
         try:
             self.clients[client] = self.send_worker(client)
+            if request.query.get('patches') in ('1', 'true'):
+                self._patching[client] = set()
             # Async receive client data until websocket is closed
             async for msg in client:
-                task = self.loop.create_task(self.process(msg))
+                task = self.loop.create_task(self.process(msg, client))
                 task.add_done_callback(task_done)
                 self.tasks += [task]
         except Exception:
@@ -174,6 +298,7 @@ class RPCServer(object):
             log.info('Closing WebSocket {0}'.format(id(client)))
             await client.close()
             del self.clients[client]
+            self._patching.pop(client, None)
 
         return client
 
@@ -224,35 +349,10 @@ class RPCServer(object):
 
         return [resolve(a) for a in args]
 
-    async def process(self, message):
+    async def process(self, message, client=None):
         try:
             if message.type == aiohttp.WSMsgType.TEXT:
-                data = json.loads(message.data)
-                meta = data.get('$', {})
-                token = meta.get('token')
-                _id = data.get('id')
-
-                if meta.get('ping'):
-                    return self.send_pong()
-
-                # if id is missing from payload or explicitely set to null,
-                # use the system object
-                if _id is None:
-                    _id = id(self.system)
-
-                try:
-                    func = self.build_call(
-                        _id=_id,
-                        name=data.get('name'),
-                        args=data.get('args', []))
-                    self.send_ack(token)
-                except Exception as e:
-                    log.exception("Exception during rpc.Server.process:")
-                    error = '{0}: {1}'.format(e.__class__.__name__, e)
-                    self.send_error(error, token)
-                else:
-                    response = await self.make_call(func, token)
-                    self.send(response)
+                await self._process_request(json.loads(message.data), client)
             elif message.type == aiohttp.WSMsgType.ERROR:
                 log.error(
                     'WebSocket connection closed unexpectedly: {0}'.format(
@@ -262,6 +362,36 @@ class RPCServer(object):
         except Exception:
             log.exception('Error while processing request')
 
+    async def _process_request(self, data, client=None):
+        meta = data.get('$', {})
+        token = meta.get('token')
+        _id = data.get('id')
+
+        if meta.get('ping'):
+            return self.send_pong()
+
+        if meta.get('resync'):
+            return self.resync(client)
+
+        # if id is missing from payload or explicitely set to null,
+        # use the system object
+        if _id is None:
+            _id = id(self.system)
+
+        try:
+            func = self.build_call(
+                _id=_id,
+                name=data.get('name'),
+                args=data.get('args', []))
+            self.send_ack(token)
+        except Exception as e:
+            log.exception("Exception during rpc.Server.process:")
+            error = '{0}: {1}'.format(e.__class__.__name__, e)
+            self.send_error(error, token)
+        else:
+            response = await self.make_call(func, token)
+            self.send(response)
+
     def call_and_serialize(self, func, max_depth=0):
         # XXXX: This should really only be called in a new thread (as in
         #       the normal case where it is called in a threadpool)
@@ -335,13 +465,103 @@ class RPCServer(object):
     def send(self, payload):
         for socket, value in self.clients.items():
             task, queue = value
-            asyncio.run_coroutine_threadsafe(queue.put(payload), self.loop)
+            self._send_to(queue, payload)
+
+    def _send_to(self, queue, payload):
+        asyncio.run_coroutine_threadsafe(queue.put(payload), self.loop)
+
+    def send_notification(self, data, update=False):
+        """
+        Send a serialized notification to every client.
+
+        Clients that connected with the ``patches`` query parameter set get
+        the first notification with each key (see :py:func:`_notification_key`)
+        in full. After that, updates (see :py:func:`_is_update`) go to them
+        as a JSON patch of the fields that changed since the previous
+        notification with the same key, and other notifications in full
+        again. Both have the key and a sequence number in
+        their metadata, and patches are marked with ``patch``; a client that
+        misses one can ask for everything in full again with a ``resync``
+        message. Other clients always get the full notification.
+        """
+        key = _notification_key(data)
+        full = {'$': {'type': NOTIFICATION_MESSAGE}, 'data': data}
+        if key is None:
+            return self.send(full)
+
+        previous = self._notifications.get(key)
+        seq = previous[0] + 1 if previous else 0
+        self._notifications[key] = (seq, data)
+        patch = None
+        for socket, (task, queue) in self.clients.items():
+            synced = self._patching.get(socket)
+            if synced is None:
+                self._send_to(queue, full)
+            elif update and key in synced:
+                if patch is None:
+                    patch = _update_patch(previous[1], data)
+                self._send_to(queue, {
+                    '$': {'type': NOTIFICATION_MESSAGE,
+                          'key': key, 'seq': seq, 'patch': True},
+                    'data': patch})
+            else:
+                synced.add(key)
+                self._send_to(queue, {
+                    '$': {'type': NOTIFICATION_MESSAGE,
+                          'key': key, 'seq': seq},
+                    'data': data})
+
+    def resync(self, client):
+        """ Send the last notification with each key in full to a client
+        that receives patches """
+        synced = self._patching.get(client)
+        if synced is None:
+            return
+        task, queue = self.clients[client]
+        synced.clear()
+        for key, (seq, data) in self._notifications.items():
+            synced.add(key)
+            self._send_to(queue, {
+                '$': {'type': NOTIFICATION_MESSAGE, 'key': key, 'seq': seq},
+                'data': data})
+
+
+def _is_update(event):
+    """ Whether an event only has the fields of something that changed, as
+    a dict payload (like the session's updates while it runs), rather than
+    a whole object (like a session snapshot) that is always sent in full """
+    return isinstance(event, dict) and isinstance(event.get('payload'), dict)
+
+
+def _update_patch(previous, data):
+    """ The patch from the previous notification with the same key to an
+    update: the fields of the event itself and of its payload that are not
+    the same as before """
+    return serialize.make_field_patch(previous, data, skip=('payload',))\
+        + serialize.make_field_patch(
+            previous['v']['payload'], data['v']['payload'], '/v/payload')
+
+
+def _notification_key(data):
+    """ The key that notifications are patched against each other by: the
+    topic of the notification and the type of its payload, so that for
+    instance full session snapshots and the short updates sent while
+    running are patched separately. Notifications without a topic and
+    payload have no key and are always sent in full. """
+    try:
+        value = data['v']
+        return '{}:{}'.format(value['topic'], value['payload']['t'])
+    except (KeyError, TypeError):
+        return None
 
 
 class SystemCalls(object):
     def __init__(self, objects):
         self.objects = objects
-        objects[id(self)] = self
+        objects.pin(self)
 
     def get_object_by_id(self, id):
         return self.objects[id]
+
+    def get_registry_stats(self):
+        return self.objects.stats()
@@ -1,63 +1,214 @@
-import functools
+"""
+Serialization of object trees for the RPC server.
 
+An object is serialized as ``{'i': id, 't': type id, 'v': value}``, where the
+value holds its public attributes (and, for iterable objects, its items keyed
+by index). Lists and tuples become lists, and primitives are left as they are.
+Every object and type that appears is also returned by id, so that clients
+can refer to them later.
 
-def _get_object_tree(max_depth, path, refs, depth, obj):  # noqa C901
+Each object appears in full only once in a tree: anywhere else it appears
+(including where it refers back to itself) it is serialized with a value of
+``None``, and clients find it by its id.
 
-    def object_container(value):
-        # Save id of instance of object's type as a reference too
-        # We will need it to keep track of types the same we are
-        # tracking objects
-        t = type(obj)
-        refs[id(t)] = t
-        return {'i': id(obj), 't': id(t), 'v': value}
+Types can be registered with :py:func:`register_schema` to serialize only a
+declared list of attributes.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
-    # TODO: what's the better way to detect primitive types?
-    if isinstance(obj, (str, int, bool, float, complex)) or obj is None:
-        return obj
+_PRIMITIVES = (str, int, bool, float, complex)
+_CONTAINERS = (dict, list, tuple)
 
-    # If we have ourself in path, it's a circular reference
-    # we are terminating it with a valid id but a value of None
-    if hasattr(obj, '__dict__') and id(obj) in path:
-        return object_container(None)
+_schemas: Dict[type, Tuple[str, ...]] = {}
+_schema_cache: Dict[type, Optional[Tuple[str, ...]]] = {}
 
-    # Shorthand for calling ourselves recursively
-    object_tree = functools.partial(
-        _get_object_tree, max_depth, path, refs, depth + 1)
 
-    path += [id(obj)]
+def register_schema(cls: type, fields: Iterable[str]):
+    """ Serialize instances of a type (and its subclasses) with only the
+    given attributes, in the given order """
+    _schemas[cls] = tuple(fields)
+    _schema_cache.clear()
 
-    # Cut-off at max_depth
-    # If max_depth == 0 (evaluates to False) — keep going
-    if max_depth and (depth >= max_depth):
-        return {}
 
-    if isinstance(obj, (list, tuple)):
-        return [object_tree(o) for o in obj]
+def _schema_for(cls: type) -> Optional[Tuple[str, ...]]:
+    try:
+        return _schema_cache[cls]
+    except KeyError:
+        schema = next(
+            (_schemas[klass] for klass in cls.__mro__ if klass in _schemas),
+            None)
+        _schema_cache[cls] = schema
+        return schema
+
+
+def get_object_tree(obj, max_depth=0) -> Tuple[Any, Dict[int, Any]]:
+    """
+    Serialize an object.
+
+    :param obj: The object to serialize
+    :param max_depth: If not 0, anything nested deeper than this (other than
+                      primitives) is serialized as ``{}``
+    :returns: The serialized tree, and a dict of the objects and types in it
+              by id
+    """
+    refs: Dict[int, Any] = {}
+    if obj is None or isinstance(obj, _PRIMITIVES):
+        return obj, refs
+    seen = set()
+    root: List[Any] = [None]
+    # The tree is walked depth first with a stack rather than by recursion.
+    # Each entry is an object to serialize, its depth, and the container and
+    # key to put the serialized object in. Primitives are never pushed
+    stack: List[Tuple[Any, int, Any, Any]] = [(obj, 0, root, 0)]
+
+    while stack:
+        obj, depth, parent, key = stack.pop()
+        obj_type = type(obj)
+        has_dict = obj_type not in _CONTAINERS and hasattr(obj, '__dict__')
+        if has_dict:
+            if id(obj) in seen:
+                refs[id(obj_type)] = obj_type
+                parent[key] = {'i': id(obj), 't': id(obj_type), 'v': None}
+                continue
+            seen.add(id(obj))
+
+        if max_depth and depth >= max_depth:
+            parent[key] = {}
+            continue
 
-    def iterate(kv): return {str(k): object_tree(v) for k, v in kv.items()}
+        serialized, value, children = _serialize_node(
+            obj, obj_type, has_dict, refs)
+        parent[key] = serialized
+        if children is None:
+            continue
 
+        # Primitives are filled in straight away, and everything else is
+        # serialized in order, so pushed onto the stack in reverse
+        pending = []
+        for child_key, child in children:
+            if child is None or isinstance(child, _PRIMITIVES):
+                value[child_key] = child
+            else:
+                value[child_key] = None
+                pending.append((child, depth + 1, value, child_key))
+        pending.reverse()
+        stack.extend(pending)
+
+    return root[0], refs
+
+
+def _serialize_node(
+        obj, obj_type: type, has_dict: bool, refs: Dict[int, Any])\
+        -> Tuple[Any, Any, Optional[Iterable[Tuple[Any, Any]]]]:
+    """ Serialize one object, without its children.
+
+    :returns: The serialized object, the container its children go in, and
+              the children with their keys (``None`` if it has none)
+    """
+    obj_type_id = id(obj_type)
+    if isinstance(obj, (list, tuple)):
+        value: Any = list(obj)
+        return value, value, enumerate(obj)
+    refs[obj_type_id] = obj_type
     if isinstance(obj, dict):
-        return object_container(iterate(obj))
-    elif hasattr(obj, '__dict__'):
-        refs[id(obj)] = obj
+        value = {}
+        return ({'i': id(obj), 't': obj_type_id, 'v': value}, value,
+                ((str(k), v) for k, v in obj.items()))
+    if not has_dict:
+        return {'i': id(obj), 't': obj_type_id, 'v': {}}, None, None
+    refs[id(obj)] = obj
+    items, attributes = _fields(obj, obj_type)
+    value = {str(k): None for k, _ in attributes}
+    # Items are visited before attributes, as they always have been, so that
+    # the same occurrence of a repeated object is the one serialized in full
+    return ({'i': id(obj), 't': obj_type_id, 'v': value}, value,
+            list(enumerate(items)) + [(str(k), v) for k, v in attributes])
+
+
+def _fields(obj, obj_type: type) -> Tuple[List[Any], List[Tuple[str, Any]]]:
+    """ The items and attributes of an object to serialize. If its type is
+    iterable, its items are serialized too, with numeric keys after the
+    attributes """
+    try:
+        items = list(obj)
+    except TypeError:
         items = []
-        # If Type is iterable we will iterate generating numeric keys and
-        # and merge with the output
-        try:
-            items = [object_tree(o) for o in obj]
-        except TypeError:
-            pass
-        tail = {i: v for i, v in enumerate(items)}
-
-        # Filter out private attributes
-        attributes = {
-            k: v for k, v in obj.__dict__.items() if not k.startswith('_')}
-        return object_container({**iterate(attributes), **tail})
+    fields = _schema_for(obj_type)
+    if fields is None:
+        attributes = [
+            (k, v) for k, v in obj.__dict__.items() if not k.startswith('_')]
     else:
-        return object_container({})
+        attributes = [
+            (k, getattr(obj, k)) for k in fields if hasattr(obj, k)]
+    return items, attributes
+
+
+def _escape(key):
+    return str(key).replace('~', '~0').replace('/', '~1')
+
+
+def _unescape(token):
+    return token.replace('~1', '/').replace('~0', '~')
+
+
+def _key(target, token):
+    # Numeric keys (like those of iterable objects) are strings once sent
+    # as JSON, but may still be ints in a tree that never was
+    if isinstance(target, list):
+        return int(token)
+    if token not in target and token.isdigit() and int(token) in target:
+        return int(token)
+    return token
+
+
+def make_field_patch(old, new, path='', skip=()):
+    """
+    Build a JSON patch (RFC 6902) that turns one serialized object into
+    another field by field, using only the ``add``, ``remove`` and
+    ``replace`` operations. Fields that differ are sent whole, without
+    looking inside them, so this is meant for objects of a few small fields
+    (like the updates a session publishes while it runs) rather than for
+    whole object trees. ``path`` is where the object is in the tree the
+    patch is applied to, and fields in ``skip`` are left out.
+    """
+    ops = []
+    if old['i'] != new['i']:
+        ops.append({'op': 'replace', 'path': path + '/i', 'value': new['i']})
+    old_fields, new_fields = old['v'], new['v']
+    for key in old_fields.keys() - new_fields.keys() - set(skip):
+        ops.append({'op': 'remove', 'path': path + '/v/' + _escape(key)})
+    for key, value in new_fields.items():
+        if key in skip:
+            continue
+        if key not in old_fields:
+            ops.append({'op': 'add', 'path': path + '/v/' + _escape(key),
+                        'value': value})
+        elif old_fields[key] != value:
+            ops.append({'op': 'replace', 'path': path + '/v/' + _escape(key),
+                        'value': value})
+    return ops
 
 
-def get_object_tree(obj, max_depth=0):
-    refs = {}
-    tree = _get_object_tree(max_depth, [], refs, 0, obj)
-    return (tree, refs)
+def apply_patch(tree, patch):
+    """
+    Apply a patch from :py:func:`make_field_patch` to a serialized object
+    tree. The tree is modified in place, and the new tree is returned (it is
+    only a different object if the root was replaced). Additions to lists
+    are always appended.
+    """
+    for op in patch:
+        if not op['path']:
+            tree = op['value']
+            continue
+        *parents, last = [_unescape(token)
+                          for token in op['path'].split('/')[1:]]
+        target = tree
+        for token in parents:
+            target = target[_key(target, token)]
+        if isinstance(target, list) and op['op'] == 'add':
+            target.append(op['value'])
+        elif op['op'] == 'remove':
+            del target[_key(target, last)]
+        else:
+            target[_key(target, last)] = op['value']
+    return tree
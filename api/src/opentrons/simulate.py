@@ -3,16 +3,34 @@ An easy entrypoint for simulating a protocol offline.
 """
 
 import argparse
+import datetime
+import functools
+import glob
 import json
+import multiprocessing
+import os
 import sys
 import logging
 import queue
-from typing import Any, List, Mapping
+import time
+import traceback
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence
+
+try:
+    import resource
+except ImportError:
+    # Not available on windows, where peak memory is not reported
+    resource = None  # type: ignore
 
 import opentrons
 import opentrons.protocols
 import opentrons.commands
 import opentrons.broker
+from opentrons import hardware_control
+from opentrons.hardware_control import adapters
+from opentrons.hardware_control.clock import ModeledClock
+from opentrons.commands.run_log import RunLog
+from opentrons.util.profiler import profiler
 
 
 class AccumulatingHandler(logging.Handler):
@@ -39,35 +57,57 @@ class CommandScraper:
     The :py:attr:`commands` property contains the list of commands
     and log messages integrated together. Each element of the list is
     a dict following the pattern in the docs of :py:meth:`simulate`.
+
+    If a :py:class:`opentrons.commands.run_log.RunLog` is given, each
+    top-level command (and the commands nested in it) is written to it once
+    it is complete rather than being kept in memory, and :py:attr:`commands`
+    is the run log.
+
+    If a :py:class:`opentrons.hardware_control.clock.ModeledClock` is given,
+    each command also records when it started and how long it took by that
+    clock.
     """
     def __init__(self,
                  logger: logging.Logger,
                  level: str,
-                 broker: opentrons.broker.Broker) -> None:
+                 broker: opentrons.broker.Broker,
+                 run_log: RunLog = None,
+                 clock: ModeledClock = None) -> None:
         """ Build the scraper.
 
         :param logger: The :py:class:`logging.logger` to scrape
         :param level: The log level to scrape
         :param broker: Which broker to subscribe to
+        :param run_log: A run log to stream commands to, if any
+        :param clock: The clock to time commands with, if any
         """
         self._logger = logger
         self._broker = broker
         self._queue = queue.Queue()  # type: ignore
         level = getattr(logging, level.upper(), logging.WARNING)
         self._logger.setLevel(level)
-        logger.addHandler(
-            AccumulatingHandler(
-                level,
-                self._queue))
+        self._handler = AccumulatingHandler(level, self._queue)
+        logger.addHandler(self._handler)
         self._depth = 0
         self._commands: List[Mapping[str, Mapping[str, Any]]] = []
+        self._run_log = run_log
+        self._clock = clock
+        # The command that log messages are added to
+        self._last: Optional[Dict[str, Any]] = None
+        # The commands that have started but not finished, innermost last
+        self._open: List[Dict[str, Any]] = []
+        # When streaming, the commands not yet written to the run log
+        self._pending: List[Dict[str, Any]] = []
         self._unsub = self._broker.subscribe(
             opentrons.commands.command_types.COMMAND,
             self._command_callback)
 
     @property
-    def commands(self) -> List[Mapping[str, Mapping[str, Any]]]:
+    def commands(self) -> Sequence[Mapping[str, Any]]:
         """ The list of commands. See :py:meth:`simulate` """
+        if self._run_log is not None:
+            self._flush()
+            return self._run_log
         return self._commands
 
     def __del__(self):
@@ -76,23 +116,49 @@ class CommandScraper:
         if hasattr(self, '_unsub'):
             self._unsub()
 
+    def _flush(self):
+        """ Write the pending commands to the run log """
+        for command in self._pending:
+            command['logs'] = [
+                {'levelname': record.levelname,
+                 'module': record.module,
+                 'msg': record.getMessage()}
+                for record in command['logs']]
+            self._run_log.append(command)
+        self._pending.clear()
+
     def _command_callback(self, message):
         """ The callback subscribed to the broker """
         payload = message['payload']
         if message['$'] == 'before':
-            self._commands.append({'level': self._depth,
-                                   'payload': payload,
-                                   'logs': []})
+            self._last = {'level': self._depth,
+                          'payload': payload,
+                          'logs': []}
+            if self._clock:
+                self._last['start'] = self._clock.elapsed
+            if self._run_log is None:
+                self._commands.append(self._last)
+            else:
+                self._pending.append(self._last)
+            self._open.append(self._last)
             self._depth += 1
         else:
             while not self._queue.empty():
-                self._commands[-1]['logs'].append(self._queue.get())
+                self._last['logs'].append(self._queue.get())
+            if self._open:
+                command = self._open.pop()
+                if self._clock:
+                    command['duration']\
+                        = self._clock.elapsed - command['start']
             self._depth = max(self._depth-1, 0)
+            if self._run_log is not None and not self._open:
+                self._flush()
 
 
 def simulate(protocol_file,
              propagate_logs=False,
-             log_level='warning') -> List[Mapping[str, Any]]:
+             log_level='warning',
+             run_log: RunLog = None) -> Sequence[Mapping[str, Any]]:
     """
     Simulate the protocol itself.
 
@@ -121,6 +187,21 @@ def simulate(protocol_file,
         - ``logs``: Any log messages that occurred during execution of this
                     command, as a logging.LogRecord
 
+    Protocols written for version 2 of the API are simulated with a modeled
+    clock (see :py:mod:`opentrons.hardware_control.clock`), and their
+    commands also have the keys:
+
+        - ``start``: When the command would start on a robot, in seconds
+                     from the start of the run
+        - ``duration``: How long the command (including the commands nested
+                        in it) would take on a robot, in seconds
+
+    For long protocols, the run log can instead be streamed to disk by
+    passing a :py:class:`opentrons.commands.run_log.RunLog`, which is then
+    returned. Commands read back from it have the same keys, but anything in
+    the payload that JSON cannot represent is a string, and each log
+    message is a dict with ``levelname``, ``module`` and ``msg`` keys.
+
     :param file-like protocol_file: The protocol file to simulate.
     :param propagate_logs: Whether this function should allow logs from the
                            Opentrons stack to propagate up to the root handler.
@@ -131,6 +212,7 @@ def simulate(protocol_file,
     :type propagate_logs: bool
     :param log_level: The level of logs to capture in the runlog
     :type log_level: 'debug', 'info', 'warning', or 'error'
+    :param run_log: A run log to stream the commands to, if any
     :returns List[Dict[str, Dict[str, Any]]]: A run log for user output.
     """
     stack_logger = logging.getLogger('opentrons')
@@ -143,12 +225,24 @@ def simulate(protocol_file,
             execute_args = {'protocol_json': json.loads(contents)}
         except json.JSONDecodeError:
             execute_args = {'protocol_code': contents}
-        context = opentrons.protocol_api.contexts.ProtocolContext()
-        context.home()
-        scraper = CommandScraper(stack_logger, log_level, context.broker)
-        execute_args.update({'simulate': True,
-                             'context': context})
-        opentrons.protocol_api.execute.run_protocol(**execute_args)
+        # Simulated hardware calls are run in this thread rather than
+        # handed to a worker thread, which is much faster for protocols
+        # with many commands
+        hardware = adapters.InlineAdapter.build(
+            hardware_control.API.build_hardware_simulator)
+        try:
+            context = opentrons.protocol_api.contexts.ProtocolContext(
+                loop=hardware.loop, hardware=hardware)
+            context.home()
+            scraper = CommandScraper(
+                stack_logger, log_level, context.broker, run_log,
+                hardware.clock)
+            execute_args.update({'simulate': True,
+                                 'context': context})
+            opentrons.protocol_api.execute.run_protocol(**execute_args)
+        finally:
+            # Close the adapter's event loop
+            hardware.join()
     else:
         try:
             proto = json.loads(contents)
@@ -156,7 +250,7 @@ def simulate(protocol_file,
             proto = contents
         opentrons.robot.disconnect()
         scraper = CommandScraper(stack_logger, log_level,
-                                 opentrons.robot.broker)
+                                 opentrons.robot.broker, run_log)
         if isinstance(proto, dict):
             opentrons.protocols.execute_protocol(proto)
         else:
@@ -164,7 +258,37 @@ def simulate(protocol_file,
     return scraper.commands
 
 
-def format_runlog(runlog: List[Mapping[str, Any]]) -> str:
+def _format_log(record) -> str:
+    if isinstance(record, logging.LogRecord):
+        return f'{record.levelname} ({record.module}): {record.getMessage()}'
+    return f"{record['levelname']} ({record['module']}): {record['msg']}"
+
+
+def format_duration(seconds: float) -> str:
+    """ Format a duration in seconds for people to read """
+    if seconds < 60:
+        return f'{seconds:.1f}s'
+    return str(datetime.timedelta(seconds=round(seconds)))
+
+
+def estimate_duration(runlog: Sequence[Mapping[str, Any]])\
+        -> Optional[float]:
+    """
+    Estimate how long a simulated protocol would take to run on a robot, from
+    the start of the run to the end of its last command.
+
+    :param runlog: The output of a call to :py:func:`simulate`
+    :returns: The estimate in seconds, or ``None`` if the commands were not
+              timed
+    """
+    end = None
+    for command in runlog:
+        if 'duration' in command:
+            end = max(end or 0.0, command['start'] + command['duration'])
+    return end
+
+
+def format_runlog(runlog: Sequence[Mapping[str, Any]]) -> str:
     """
     Format a run log (return value of :py:meth:`simulate``) into a
     human-readable string
@@ -173,18 +297,130 @@ def format_runlog(runlog: List[Mapping[str, Any]]) -> str:
     """
     to_ret = []
     for command in runlog:
-        to_ret.append(
-            '\t' * command['level']
-            + command['payload'].get('text', '').format(**command['payload']))
+        text = command['payload'].get('text', '').format(**command['payload'])
+        if 'duration' in command:
+            text += ' [{}]'.format(format_duration(command['duration']))
+        to_ret.append('\t' * command['level'] + text)
         if command['logs']:
             to_ret.append('\t' * command['level'] + 'Logs from this command:')
             to_ret.extend(
-                ['\t' * command['level']
-                 + f'{l.levelname} ({l.module}): {l.msg}' % l.args
+                ['\t' * command['level'] + _format_log(l)
                  for l in command['logs']])
     return '\n'.join(to_ret)
 
 
+def _protocol_paths(paths: List[str]) -> List[str]:
+    """ Expand a list of files, directories and globs into a sorted list of
+    protocol files. Directories are searched recursively for .py and .json
+    files. """
+    found: List[str] = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                found.extend(os.path.join(root, name)
+                             for name in files
+                             if os.path.splitext(name)[1] in ('.py', '.json'))
+        elif glob.has_magic(path):
+            found.extend(glob.glob(path, recursive=True))
+        else:
+            found.append(path)
+    return sorted(set(found))
+
+
+def _peak_memory_kb() -> Any:
+    if not resource:
+        return None
+    # ru_maxrss is in kilobytes on linux but bytes on macos
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def _simulate_file(path: str, log_level: str) -> Dict[str, Any]:
+    """ Simulate one protocol file and summarize the result. This runs in a
+    batch worker process """
+    start = time.perf_counter()
+    result: Dict[str, Any] = {'protocol': path, 'errors': []}
+    try:
+        # Only the length of the run log and its duration are reported, so
+        # stream it to disk rather than letting it take up memory
+        with open(path) as protocol_file, RunLog(window=0) as run_log:
+            runlog = simulate(
+                protocol_file, log_level=log_level, run_log=run_log)
+            result['runlog_length'] = len(runlog)
+            result['estimated_duration'] = estimate_duration(runlog)
+    except Exception as e:
+        result['runlog_length'] = None
+        result['estimated_duration'] = None
+        result['errors'] = [
+            line.strip()
+            for line in traceback.format_exception_only(type(e), e)]
+    result['ok'] = not result['errors']
+    result['wall_time'] = time.perf_counter() - start
+    result['peak_memory_kb'] = _peak_memory_kb()
+    return result
+
+
+def simulate_batch(paths: List[str],
+                   jobs: int = 1,
+                   log_level: str = 'warning') -> Iterator[Dict[str, Any]]:
+    """
+    Simulate many protocols in parallel.
+
+    Each protocol is simulated by :py:meth:`simulate` in a fresh worker
+    process, so that global state (like the robot singleton used by
+    protocols written for the first version of the API) cannot leak from
+    one protocol to the next.
+
+    The return value is an iterator over one dict per protocol, in the order
+    of the protocol paths, with the keys:
+
+        - ``protocol``: The path of the protocol file
+        - ``ok``: Whether the protocol simulated without errors
+        - ``runlog_length``: The number of commands in the run log, or
+                             ``None`` if the simulation failed
+        - ``estimated_duration``: How long the protocol would take to run on
+                                  a robot, in seconds, or ``None`` if the
+                                  simulation failed or the protocol was not
+                                  timed (see :py:meth:`simulate`)
+        - ``errors``: A list of strings describing any errors
+        - ``wall_time``: How long the simulation took, in seconds
+        - ``peak_memory_kb``: The peak resident memory of the worker process
+                              in kilobytes, or ``None`` on platforms where
+                              this is not available
+
+    :param paths: Protocol files, directories to search recursively for
+                  ``.py`` and ``.json`` protocols, or globs
+    :param jobs: The number of protocols to simulate at once
+    :param log_level: The level of logs to capture in each run log
+    """
+    if jobs < 1:
+        raise ValueError('jobs must be at least 1, not {}'.format(jobs))
+    protocols = _protocol_paths(paths)
+    worker = functools.partial(_simulate_file, log_level=log_level)
+    with multiprocessing.Pool(jobs, maxtasksperchild=1) as pool:
+        yield from pool.imap(worker, protocols)
+
+
+def _simulate_one(protocol_file, args) -> int:
+    """ Simulate a single protocol for :py:func:`main`, printing its run log
+    and profiling it if asked to """
+    if args.trace:
+        profiler.enable()
+    try:
+        runlog = simulate(protocol_file, log_level=args.log_level)
+    finally:
+        if args.trace:
+            profiler.disable()
+            profiler.write(args.trace)
+    if args.output == 'runlog':
+        print(format_runlog(runlog))
+        duration = estimate_duration(runlog)
+        if duration is not None:
+            print('Estimated run time: {}'.format(
+                format_duration(duration)))
+    return 0
+
+
 # Note - this script is also set up as a setuptools entrypoint and thus does
 # an absolute minimum of work since setuptools does something odd generating
 # the scripts
@@ -193,9 +429,14 @@ def main():
     parser = argparse.ArgumentParser(prog='opentrons_simulate',
                                      description=__doc__)
     parser.add_argument(
-        'protocol', metavar='PROTOCOL_FILE',
-        type=argparse.FileType('r'),
-        help='The protocol file to simulate (specify - to read from stdin).')
+        'protocols', metavar='PROTOCOL_FILE', nargs='+',
+        help=('The protocol file to simulate (specify - to read from stdin). '
+              'Several files, directories or globs may be given to simulate '
+              'a batch of protocols, with a JSON result printed for each.'))
+    parser.add_argument(
+        '-j', '--jobs', action='store', type=int, default=None,
+        help=('Simulate a batch of protocols, this many at a time. Defaults '
+              'to 1 when simulating more than one protocol.'))
     parser.add_argument(
         '-v', '--version', action='version',
         version=f'%(prog)s {opentrons.__version__}',
@@ -212,12 +453,31 @@ def main():
         choices=['error', 'warning', 'info', 'debug'],
         default='warning'
     )
+    parser.add_argument(
+        '-t', '--trace', action='store', metavar='TRACE_FILE',
+        help=('Profile the simulation and write where the time went to this '
+              'file, in the Chrome trace event format (which can be opened '
+              'with chrome://tracing or https://ui.perfetto.dev)'))
     args = parser.parse_args()
 
-    runlog = simulate(args.protocol, log_level=args.log_level)
-    if args.output == 'runlog':
-        print(format_runlog(runlog))
-    return 0
+    if args.jobs is None and len(args.protocols) == 1\
+       and not os.path.isdir(args.protocols[0])\
+       and not glob.has_magic(args.protocols[0]):
+        try:
+            protocol_file = argparse.FileType('r')(args.protocols[0])
+        except argparse.ArgumentTypeError as e:
+            parser.error(str(e))
+        return _simulate_one(protocol_file, args)
+
+    if args.trace:
+        parser.error('--trace can only be used to simulate one protocol')
+    all_ok = True
+    for result in simulate_batch(
+            args.protocols, args.jobs or 1, args.log_level):
+        all_ok = all_ok and result['ok']
+        if args.output == 'runlog':
+            print(json.dumps(result), flush=True)
+    return 0 if all_ok else 1
 
 
 if __name__ == '__main__':
@@ -1,13 +1,36 @@
-import functools
-import itertools
-from collections import namedtuple, UserDict
-from typing import Dict, List
+"""
+Track the positions of objects in a tree of coordinate systems.
+
+The state of the tree is a :py:class:`PoseTree`, an immutable mapping of each
+tracked object to its :py:class:`Node`. The functions that change it
+(:py:func:`add`, :py:func:`update` and :py:func:`remove`) return a new tree
+rather than modifying the one they are given. The new tree shares everything
+that did not change with the old one, so changing a node costs the same
+however many objects are tracked.
+
+Trees derived from one another also share a cache of the transform from each
+node to the root of the tree (and its inverse). An entry is used as long as
+the node's transform and its parent's entry are the ones it was computed
+from, so updating a node makes its subtree be recomputed the next time it is
+used, and :py:func:`change_base` only multiplies two or three cached matrices
+after checking the entries on the way to the root. :py:func:`max_z` is also
+remembered for each node until something in its subtree changes.
+"""
+from collections import namedtuple
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, Iterator, List, Optional
 
 import numpy as np
 from numpy.linalg import inv
 
 ROOT = 'root'
 
+# Once this many nodes have changed since a tree's nodes were last copied,
+# the changes are merged into a new copy
+MAX_CHANGES = 64
+
+_REMOVED = object()
+
 
 class Point(namedtuple('Point', 'x y z')):
     def __str__(self):
@@ -58,74 +81,226 @@ class Node(namedtuple('Node', 'parent children transform')):
             (transform1 == transform2).all()
 
 
+class _Absolute:
+    """ The cached transforms between a node and the root of its tree.
+
+    ``up`` is the product of the transforms from the node up to (but not
+    including) the root, and ``down`` the product of the same transforms
+    from the root down, as :py:func:`change_base` multiplies them going up
+    and down the tree.
+    """
+    __slots__ = ('transform', 'parent', 'up', 'down', '_up_inv', '_down_inv')
+
+    def __init__(self, transform: np.ndarray,
+                 parent: Optional['_Absolute']) -> None:
+        self.transform = transform
+        self.parent = parent
+        if parent is None:
+            # The root's own transform is never applied
+            self.up = self.down = np.identity(4)
+        else:
+            self.up = transform.dot(parent.up)
+            self.down = parent.down.dot(transform)
+        self._up_inv: Optional[np.ndarray] = None
+        self._down_inv: Optional[np.ndarray] = None
+
+    @property
+    def up_inv(self) -> np.ndarray:
+        if self._up_inv is None:
+            self._up_inv = inv(self.up)
+        return self._up_inv
+
+    @property
+    def down_inv(self) -> np.ndarray:
+        if self._down_inv is None:
+            self._down_inv = inv(self.down)
+        return self._down_inv
+
+
+class PoseTree(Mapping):
+    """ An immutable mapping of tracked objects to their :py:class:`Node` """
+
+    def __init__(self, nodes: Mapping = None) -> None:
+        self._base: Dict[Any, Node] = dict(nodes or {})
+        self._changes: Dict[Any, Any] = {}
+        self._length = len(self._base)
+        self._absolute: Dict[Any, _Absolute] = {}
+        self._max_z: Dict[Any, float] = {}
+
+    def __getitem__(self, obj) -> Node:
+        try:
+            node = self._changes[obj]
+        except KeyError:
+            return self._base[obj]
+        if node is _REMOVED:
+            raise KeyError(obj)
+        return node
+
+    def __contains__(self, obj) -> bool:
+        node = self._changes.get(obj)
+        if node is None:
+            return obj in self._base
+        return node is not _REMOVED
+
+    def __iter__(self) -> Iterator:
+        changes = self._changes
+        for obj in self._base:
+            if changes.get(obj) is not _REMOVED:
+                yield obj
+        for obj, node in changes.items():
+            if node is not _REMOVED and obj not in self._base:
+                yield obj
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __repr__(self) -> str:
+        return '{}({!r})'.format(type(self).__name__, dict(self))
+
+    def add(self, obj, parent=ROOT, point=Point(0, 0, 0),
+            transform=np.identity(4)) -> 'PoseTree':
+        """ Syntax sugar for chaining :py:func:`add` """
+        return add(self, obj, parent, point, transform)
+
+    def _derive(self, changes: Dict[Any, Any],
+                stale: Iterable) -> 'PoseTree':
+        """ Build a tree with some nodes changed (or, if they are
+        ``_REMOVED``, removed), sharing the rest of this one.
+
+        :param stale: The nodes whose :py:func:`max_z` may be changed
+        """
+        tree = PoseTree.__new__(PoseTree)
+        length = self._length
+        for obj, node in changes.items():
+            length += (node is not _REMOVED) - (obj in self)
+        merged = dict(self._changes)
+        merged.update(changes)
+        if len(merged) > MAX_CHANGES:
+            base = {obj: node for obj, node in self._base.items()
+                    if merged.get(obj) is not _REMOVED}
+            base.update((obj, node) for obj, node in merged.items()
+                        if node is not _REMOVED)
+            tree._base, tree._changes = base, {}
+        else:
+            tree._base, tree._changes = self._base, merged
+        tree._length = length
+        tree._absolute = self._absolute
+        stale = set(stale) | set(changes)
+        tree._max_z = {obj: z for obj, z in self._max_z.items()
+                       if obj not in stale}
+        return tree
+
+
+def _tree(state: Mapping) -> PoseTree:
+    if isinstance(state, PoseTree):
+        return state
+    return PoseTree(state)
+
+
+def _ancestors(state: PoseTree, obj) -> List:
+    """ The ancestors of an object, from its parent up """
+    result = []
+    parent = state[obj].parent
+    while parent is not None:
+        result.append(parent)
+        parent = state[parent].parent
+    return result
+
+
+def _absolute(state: PoseTree, obj) -> _Absolute:
+    """ The cached transforms of an object, computed again if the object or
+    any of its ancestors changed since they were cached """
+    node = state[obj]
+    if node.parent is None:
+        parent = None
+    else:
+        parent = _absolute(state, node.parent)
+    entry = state._absolute.get(obj)
+    if entry is None or entry.transform is not node.transform \
+            or entry.parent is not parent:
+        entry = _Absolute(node.transform, parent)
+        state._absolute[obj] = entry
+    return entry
+
+
 def init():
     return add({}, ROOT, parent=None)
 
 
 def add(
-        state: Dict[object, Node],
+        state: Mapping,
         obj,
         parent=ROOT,
         point=Point(0, 0, 0),
-        transform=np.identity(4)) -> Dict[object, Node]:
+        transform=np.identity(4)) -> PoseTree:
 
     if isinstance(transform, list):
         transform = np.array(transform)
 
-    state = bind(state)
+    tree = _tree(state)
+    changes = {}
 
     if parent is not None:
-        state[parent] = state[parent].add(obj)
+        changes[parent] = tree[parent].add(obj)
 
-    assert obj not in state, 'object is already being tracked'
+    assert obj not in tree, 'object is already being tracked'
 
-    state[obj] = Node(
+    changes[obj] = Node(
         parent=parent,
         children=[],
         transform=transform.dot(inv(translate(point)))
     )
 
-    return state
+    stale = [] if parent is None else [parent] + _ancestors(tree, parent)
+    return tree._derive(changes, stale)
 
 
 def remove(state, obj):
-    state = state.copy()
+    state = _tree(state)
     nodes = descendants(state, obj) + [(obj, 0)]
+    stale = _ancestors(state, obj)
 
+    changes: Dict[Any, Any] = {}
     # remove object references from their parent's children
+    parent = state[obj].parent
+    if parent in state:
+        changes[parent] = state[parent].remove(obj)
     for child, *_ in nodes:
-        parent = state[child].parent
-        if parent in state:
-            state[parent] = state[parent].remove(child)
-        del state[child]
-    return state
+        changes[child] = _REMOVED
+        state._absolute.pop(child, None)
+    return state._derive(changes, stale)
 
 
 def update(state, obj, point: Point, transform=np.identity(4)):
-    state = state.copy()
-    state[obj] = state[obj].update(
-        transform.dot(inv(translate(point)))
-    )
-    return state
+    state = _tree(state)
+    return state._derive(
+        {obj: state[obj].update(transform.dot(inv(translate(point))))},
+        _ancestors(state, obj))
 
 
 def descendants(state, obj, level=0):
     """ Returns a flattened list tuples of DFS traversal of subtree
     from object that contains descendant object and it's depth """
-    return sum([
-        [(child, level)] + descendants(state, child, level + 1)
-        for child in state[obj].children
-    ], [])
+    result = []
+    stack = [(child, level) for child in reversed(state[obj].children)]
+    while stack:
+        child, depth = stack.pop()
+        result.append((child, depth))
+        stack.extend((grandchild, depth + 1)
+                     for grandchild in reversed(state[child].children))
+    return result
 
 
 def has_children(state, obj):
-    return True if len(descendants(state, obj)) > 0 else False
+    return bool(state[obj].children)
 
 
 def ascend(state, start, finish=ROOT) -> List[Node]:
-    if start is finish:
-        return [finish]
-    return [start] + ascend(state, start=state[start].parent, finish=finish)
+    path = [start]
+    while start is not finish:
+        start = state[start].parent
+        path.append(start)
+    return path
 
 
 def change_base(state, point=Point(0, 0, 0), src=ROOT, dst=ROOT):
@@ -133,29 +308,29 @@ def change_base(state, point=Point(0, 0, 0), src=ROOT, dst=ROOT):
     Transforms point from source coordinate system to destination.
     Point(0, 0, 0) means the origin of the source.
     """
-    def fold(objects):
-        return functools.reduce(
-            lambda a, b: a.dot(b),
-            [state[key].transform for key in objects],
-            np.identity(4)
-        )
-
-    up, down = ascend(state, src), list(reversed(ascend(state, dst)))
-
-    # Find common prefix. Last item is common root
-    root = [n1 for n1, n2 in zip(reversed(up), down) if n1 is n2].pop()
-
-    # Nodes up to root, EXCLUDING root
-    up = list(itertools.takewhile(lambda node: node is not root, up))
-
-    # Nodes down from root, EXCLUDING root
-    down = list(itertools.dropwhile(lambda node: node is not root, down))[1:]
+    state = _tree(state)
+    vector = np.array((*point, 1.0))
+    if src is dst:
+        return vector[:-1]
+
+    # Find the common ancestor of src and dst
+    if dst is ROOT:
+        root = ROOT
+    else:
+        down = {id(obj) for obj in ascend(state, dst)}
+        root = next(obj for obj in ascend(state, src) if id(obj) in down)
 
     # Point in root's coordinate system
-    point_in_root = inv(fold(up)).dot((*point, 1))
+    point_in_root = _absolute(state, src).up_inv.dot(vector)
+    root_abs = _absolute(state, root)
+    if root is not ROOT:
+        point_in_root = root_abs.up.dot(point_in_root)
 
     # Return point in destination's coordinate system
-    return fold(down).dot(point_in_root)[:-1]
+    result = _absolute(state, dst).down.dot(point_in_root)
+    if root is not ROOT:
+        result = root_abs.down_inv.dot(result)
+    return result[:-1]
 
 
 def absolute(state, obj):
@@ -166,14 +341,19 @@ def absolute(state, obj):
 
 
 def max_z(state, root):
-    test = [
-        (obj, Point(*change_base(state, src=obj, dst=root)).z)
-        for obj, _ in descendants(state, root)
-    ]
-
-    # from pprint import pprint
-    # pprint(test, indent=2)
-    m = max([i[1] for i in test])
+    state = _tree(state)
+    try:
+        return state._max_z[root]
+    except KeyError:
+        pass
+    # The z of the origin of each descendant in root's coordinate system
+    z_row = _absolute(state, root).up[2]
+    origins = [_absolute(state, obj).up_inv[:, 3]
+               for obj, _ in descendants(state, root)]
+    if not origins:
+        raise ValueError('{} has no descendants'.format(root))
+    m = np.array(origins).dot(z_row).max()
+    state._max_z[root] = m
     return m
 
 
@@ -192,8 +372,5 @@ def stringify(state, root=None):
 
 
 def bind(state):
-    state = UserDict(state.copy())
-    # add syntax sugar for chaining add operations
-    state.add = functools.partial(add, state)
-
-    return state
+    # Trees have an add method for chaining add operations
+    return _tree(state)
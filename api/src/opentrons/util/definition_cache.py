@@ -0,0 +1,183 @@
+"""
+A process-wide cache of the JSON definitions shipped in ``shared_data``
+(labware, module and pipette specifications).
+
+Each definition is parsed once and then shared by everything that loads it,
+so the objects returned here are frozen: :py:class:`FrozenDict` and
+:py:class:`FrozenList` behave like (and compare equal to) the dicts and lists
+``json.loads`` would return, but raise :py:class:`TypeError` if modified. To
+get a copy that can be modified, use :py:func:`copy.deepcopy`.
+
+Definitions are keyed by their path and, when they are files on disk, their
+modification time, so a changed file is parsed again. At most
+:py:data:`CACHE_SIZE` definitions are kept, least recently used first out.
+
+If the package was built with an index of the labware definitions (see
+``setup.py``), labware definitions are read from that instead of being parsed
+one file at a time.
+"""
+import copy
+import json
+import logging
+import os
+import pickle
+import pkgutil
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+log = logging.getLogger(__name__)
+
+#: The maximum number of definitions to keep
+CACHE_SIZE = 128
+
+#: The pickled index of labware definitions, relative to shared_data
+INDEX_PATH = 'definitions2.index.pickle'
+
+_SHARED_DATA_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'shared_data')
+
+
+def _frozen(*args, **kwargs):
+    raise TypeError(
+        'Definitions are shared and cannot be modified; '
+        'use copy.deepcopy() to get a copy to modify')
+
+
+class FrozenDict(dict):
+    """ A dict that cannot be modified """
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update\
+        = _frozen  # type: ignore
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return {key: copy.deepcopy(value, memo)
+                for key, value in self.items()}
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+
+class FrozenList(list):
+    """ A list that cannot be modified """
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = append = extend\
+        = insert = pop = remove = reverse = sort = clear\
+        = _frozen  # type: ignore
+
+    def __copy__(self):
+        return list(self)
+
+    def __deepcopy__(self, memo):
+        return [copy.deepcopy(value, memo) for value in self]
+
+    def __reduce__(self):
+        return (FrozenList, (list(self),))
+
+
+def freeze(obj: Any) -> Any:
+    """ Recursively convert the dicts and lists in a parsed JSON object to
+    :py:class:`FrozenDict` and :py:class:`FrozenList` """
+    if isinstance(obj, dict):
+        return FrozenDict((key, freeze(value)) for key, value in obj.items())
+    elif isinstance(obj, list):
+        return FrozenList(freeze(value) for value in obj)
+    return obj
+
+
+class DefinitionCache:
+    """ A least-recently-used cache of frozen definitions """
+    def __init__(self, size: int = CACHE_SIZE) -> None:
+        self._size = size
+        self._entries: 'OrderedDict[Hashable, Any]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+_cache = DefinitionCache()
+_index: Optional[Dict[str, Any]] = None
+_index_loaded = False
+
+
+def _load_index() -> Dict[str, Any]:
+    """ Load the index of labware definitions, if the package has one """
+    global _index, _index_loaded
+    if not _index_loaded:
+        _index_loaded = True
+        try:
+            _index = pickle.loads(
+                pkgutil.get_data('opentrons',  # type: ignore
+                                 'shared_data/' + INDEX_PATH))
+        except (FileNotFoundError, OSError):
+            _index = None
+        except Exception:
+            log.exception('Could not read the labware definition index')
+            _index = None
+    return _index or {}
+
+
+def load_shared_data(path: str) -> Any:
+    """
+    Load a frozen JSON definition from ``shared_data``.
+
+    :param path: The path of the file relative to ``shared_data``, for
+                 instance ``'definitions2/opentrons_96_tiprack_300_ul.json'``
+    :raises FileNotFoundError: If there is no such file
+    """
+    try:
+        mtime: Optional[int] = os.stat(
+            os.path.join(_SHARED_DATA_DIR, path)).st_mtime_ns
+    except OSError:
+        # Not a file on disk (or not there at all): the package data can
+        # only change with the package, so key on the path alone
+        mtime = None
+    key = (path, mtime)
+    definition = _cache.get(key)
+    if definition is None:
+        indexed = _load_index().get(path)
+        if indexed is not None:
+            definition = freeze(indexed)
+        else:
+            definition = freeze(json.loads(
+                pkgutil.get_data('opentrons',  # type: ignore
+                                 'shared_data/' + path)))
+        _cache.put(key, definition)
+    return definition
+
+
+def clear():
+    """ Empty the cache, so definitions are loaded again """
+    global _index, _index_loaded
+    _cache.clear()
+    _index = None
+    _index_loaded = False
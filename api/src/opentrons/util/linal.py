@@ -139,4 +139,25 @@ def apply_reverse(
         with_offsets=True) -> Tuple[float, float, float]:
     """ Like apply_transform but inverts the transform first
     """
-    return apply_transform(inv(t), pos)
+    return apply_transform(inv(t), pos, with_offsets)
+
+
+def apply_transform_to_points(
+        t: Union[List[List[float]], np.ndarray],
+        points: Union[List[Tuple[float, float, float]], np.ndarray],
+        with_offsets=True) -> np.ndarray:
+    """
+    Like apply_transform, but for many points at once.
+
+    :param t: A 4x4 affine transformation matrix from one 3D space [A] to
+              another [B]
+    :param points: An Nx3 array of XYZ points in space A
+    :param with_offsets: Whether to apply the translation part of the
+                         transform (see apply_transform)
+    :return: An Nx3 array of the corresponding XYZ points in space B
+    """
+    t = np.asarray(t, dtype=float)
+    transformed = dot(np.asarray(points, dtype=float), t[:3, :3].T)
+    if with_offsets:
+        transformed += t[:3, 3]
+    return transformed
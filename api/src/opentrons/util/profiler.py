@@ -0,0 +1,117 @@
+"""
+A lightweight profiler that records where the time in a run goes.
+
+When :py:data:`profiler` is enabled, instrumented code (broker commands,
+:py:class:`opentrons.hardware_control.API` coroutines and the phases of each
+command sent to the smoothie) records a timed span for everything it does.
+The spans can be exported in the Chrome trace event format, which can be
+opened with ``chrome://tracing`` or https://ui.perfetto.dev, either from the
+server (``GET /logs/trace``) or with ``opentrons_simulate --trace``.
+
+The profiler is disabled by default, in which case a span costs one attribute
+lookup. At most :py:data:`MAX_EVENTS` events are kept, oldest first out.
+"""
+import contextlib
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterator, List
+
+#: The maximum number of events to keep
+MAX_EVENTS = 100000
+
+
+def _now_us() -> float:
+    return time.perf_counter() * 1e6
+
+
+def _jsonable(args: Dict[str, Any]) -> Dict[str, Any]:
+    """ Replace span arguments json can't encode with their string
+    representations """
+    return {key: value if isinstance(value, (str, int, float, bool))
+            or value is None else str(value)
+            for key, value in args.items()}
+
+
+class Profiler:
+    """ Records timed spans as Chrome trace events """
+
+    def __init__(self, max_events: int = MAX_EVENTS) -> None:
+        self.enabled = False
+        self._events: Deque[Dict[str, Any]] = deque(maxlen=max_events)
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def enable(self, clear: bool = True):
+        """ Start recording spans, by default forgetting any recorded
+        before """
+        if clear:
+            self.clear()
+        self.enabled = True
+
+    def disable(self):
+        """ Stop recording spans. Spans already recorded are kept """
+        self.enabled = False
+
+    def clear(self):
+        self._events.clear()
+
+    @contextlib.contextmanager
+    def span(self, name: str, cat: str, **args) -> Iterator[Dict[str, Any]]:
+        """ Time the body of a with block.
+
+        :param name: The name of the span, for instance the command sent
+        :param cat: The category of the span, for instance ``'smoothie'``
+        :param args: Anything else to record with the span
+        :returns: The dict of arguments, which can be added to in the block
+        """
+        if not self.enabled:
+            yield args
+            return
+        start = _now_us()
+        try:
+            yield args
+        finally:
+            self._events.append({
+                'name': name, 'cat': cat, 'ph': 'X',
+                'ts': start, 'dur': _now_us() - start,
+                'pid': os.getpid(), 'tid': threading.get_ident(),
+                'args': args})
+
+    async def async_span(self, coro, name: str, cat: str, **args):
+        """ Await a coroutine in a span """
+        with self.span(name, cat, **args):
+            return await coro
+
+    def instant(self, name: str, cat: str, **args):
+        """ Record a single point in time """
+        if not self.enabled:
+            return
+        self._events.append({
+            'name': name, 'cat': cat, 'ph': 'i', 's': 't',
+            'ts': _now_us(),
+            'pid': os.getpid(), 'tid': threading.get_ident(),
+            'args': args})
+
+    def events(self) -> List[Dict[str, Any]]:
+        """ The recorded events, oldest first """
+        return list(self._events)
+
+    def export(self) -> Dict[str, Any]:
+        """ The recorded events as a Chrome trace event document """
+        return {
+            'traceEvents': [dict(event, args=_jsonable(event['args']))
+                            for event in self.events()],
+            'displayTimeUnit': 'ms'}
+
+    def write(self, path: str):
+        """ Write the recorded events to a trace file """
+        with open(path, 'w') as f:
+            json.dump(self.export(), f)
+
+
+#: The process-wide profiler
+profiler = Profiler()
@@ -1,18 +1,28 @@
 import itertools
+from collections import OrderedDict
 
 import pytest
 
 from opentrons.api import Session
-from opentrons.api.session import (
-    _accumulate, _get_labware, _dedupe, extract_metadata)
+from opentrons.api.session import _get_labware, extract_metadata
+from opentrons.commands import tree
 from tests.opentrons.conftest import state
 from opentrons.legacy_api.robot.robot import Robot
 from functools import partial
-from opentrons.broker import Broker
+from opentrons.broker import Broker, RELEASE_TOPIC
 
 state = partial(state, 'session')
 
 
+def _collect(labware):
+    """ The instruments, containers, modules and interactions in the
+    results of _get_labware, without duplicates and in the order they are
+    first used, as a session collects them """
+    return tuple(
+        list(OrderedDict.fromkeys(itertools.chain.from_iterable(items)))
+        for items in zip(*labware))
+
+
 @pytest.fixture
 def run_session(request, session_manager):
     if not isinstance(session_manager._hardware, Robot):
@@ -65,10 +75,19 @@ async def test_load_from_text(session_manager, protocol):
         for command in commands:
             acc.append(command)
             traverse(command['children'])
-    traverse(session.commands)
+    assert session.command_count == 75
+    traverse(tree.from_list(session.get_commands(0, session.command_count)))
     # Less commands now that trash is built in
     assert len(acc) == 75
 
+    # The flat command list can be read a window at a time
+    assert [c['id'] for c in session.get_commands(count=5)]\
+        == list(range(70, 75))
+    first = session.get_commands(start=0, count=3)
+    assert [(c['id'], c['description']) for c in first]\
+        == [(c['id'], c['description']) for c in acc[:3]]
+    assert session.get_commands(start=75) == []
+
 
 @pytest.mark.api1_only
 async def test_clear_tips(session_manager, tip_clear_protocol):
@@ -90,6 +109,32 @@ async def test_async_notifications(main_router):
     assert res == {'name': 'foo', 'payload': {'bar': 'baz'}}
 
 
+@pytest.mark.api1_only
+async def test_release_session(session_manager):
+    released = []
+    session_manager._broker.subscribe(RELEASE_TOPIC, released.append)
+    session_manager.create(name='first', text='from opentrons import robot')
+    assert released == []
+    session_manager.create(name='second', text='from opentrons import robot')
+    assert released == [{'name': 'first'}]
+    session_manager.clear()
+    assert released == [{'name': 'first'}, {'name': 'second'}]
+    session_manager.clear()
+    assert len(released) == 2
+
+
+@pytest.mark.api1_only
+def test_run_log_closed_with_session(session_manager):
+    first = session_manager.create(
+        name='first', text='from opentrons import robot')
+    second = session_manager.create(
+        name='second', text='from opentrons import robot')
+    assert first._run_log.closed
+    assert not second._run_log.closed
+    session_manager.clear()
+    assert second._run_log.closed
+
+
 def test_load_protocol_with_error(session_manager):
     with pytest.raises(Exception) as e:
         session = session_manager.create(name='<blank>', text='blah')
@@ -99,6 +144,22 @@ def test_load_protocol_with_error(session_manager):
     assert args == "name 'blah' is not defined"
 
 
+def test_run_log_closed_on_error(session_manager, monkeypatch):
+    from opentrons.api import session as session_module
+    run_logs = []
+
+    class RecordingRunLog(session_module.RunLog):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            run_logs.append(self)
+
+    monkeypatch.setattr(session_module, 'RunLog', RecordingRunLog)
+    with pytest.raises(Exception):
+        session_manager.create(name='<blank>', text='blah')
+    assert len(run_logs) == 1
+    assert run_logs[0].closed
+
+
 @pytest.mark.api2_only
 @pytest.mark.parametrize('protocol_file', ['testosaur_v2.py'])
 async def test_load_and_run_v2(
@@ -228,18 +289,18 @@ async def test_get_instruments_and_containers(labware_setup,
     p50, p1000 = instruments
 
     instruments, containers, modules, interactions = \
-        _accumulate([_get_labware(command) for command in commands])
+        _collect([_get_labware(command) for command in commands])
 
     session = Session.build_and_prep(name='', text='',
                                      hardware=hardware,
                                      loop=loop,
                                      broker=Broker())
-    # We are calling dedupe directly for testing purposes.
-    # Normally it is called from within a session
-    session._instruments.extend(_dedupe(instruments))
-    session._containers.extend(_dedupe(containers))
-    session._modules.extend(_dedupe(modules))
-    session._interactions.extend(_dedupe(interactions))
+    # We are collecting the labware directly for testing purposes.
+    # Normally it is collected while the session simulates
+    session._instruments.extend(instruments)
+    session._containers.extend(containers)
+    session._modules.extend(modules)
+    session._interactions.extend(interactions)
 
     instruments = session.get_instruments()
     containers = session.get_containers()
@@ -262,21 +323,6 @@ async def test_get_instruments_and_containers(labware_setup,
     assert modules == []
 
 
-def test_accumulate():
-    res = \
-        _accumulate([
-            (['a'], ['d'], ['g', 'h']),
-            (['b', 'c'], ['e', 'f'], ['i'])
-        ])
-
-    assert res == (['a', 'b', 'c'], ['d', 'e', 'f'], ['g', 'h', 'i'])
-    assert _accumulate([]) == ([], [], [], [])
-
-
-def test_dedupe():
-    assert ''.join(_dedupe('aaaaabbbbcbbbbcccaa')) == 'abc'
-
-
 @pytest.mark.api1_only
 def test_get_labware(labware_setup):
     instruments, tip_racks, plates, commands = labware_setup
@@ -294,16 +340,8 @@ def test_get_labware(labware_setup):
          [],
          [(p1000, plates[0]), (p1000, plates[1])])
 
-    instruments, containers, modules, interactions = \
-        _accumulate([_get_labware(command) for command in commands])
-
     assert \
-        [
-            list(_dedupe(instruments)),
-            list(_dedupe(containers)),
-            list(_dedupe(modules)),
-            list(_dedupe(interactions))
-        ] == \
+        list(_collect([_get_labware(command) for command in commands])) == \
         [
             [p100, p1000],
             [plates[0], plates[1]],
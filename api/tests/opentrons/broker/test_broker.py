@@ -66,3 +66,35 @@ def test_add_listener():
     fake_obj.A(0, 2)
 
     assert calls == expected, 'No calls expected after unsubscribe()'
+
+
+def test_publish_only_when_listened_to():
+    fake_obj = FakeClass()
+    built = []
+
+    def counting_command(arg1, meta=None, arg2='', arg3=''):
+        built.append(arg1)
+        return my_command(arg1, meta, arg2, arg3)
+
+    def publish_with_closure(arg1):
+        def action(arg1, arg2='closure'):
+            pass
+        commands.do_publish(fake_obj.broker, counting_command, action,
+                            'before', None, '{arg1} {arg2}', arg1)
+
+    commands.publish_stats.reset()
+    publish_with_closure(1)
+    assert built == []
+    assert commands.publish_stats.skipped == 1
+    assert commands.publish_stats.published == 0
+
+    messages = []
+    unsubscribe = fake_obj.broker.subscribe('command', messages.append)
+    publish_with_closure(2)
+    publish_with_closure(3)
+    unsubscribe()
+    assert built == [2, 3]
+    assert [m['payload']['description'] for m in messages]\
+        == ['2 closure', '3 closure']
+    assert commands.publish_stats.published == 2
+    assert commands.publish_stats.overhead > 0
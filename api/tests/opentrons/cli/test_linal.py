@@ -1,5 +1,6 @@
 from math import pi, sin, cos
-from opentrons.util.linal import solve, add_z, apply_transform
+from opentrons.util.linal import (
+    solve, add_z, apply_transform, apply_reverse, apply_transform_to_points)
 from numpy.linalg import inv
 import numpy as np
 
@@ -68,3 +69,36 @@ def test_apply_transform():
 
     result = apply_transform(inv(transform), (x, y, z))
     assert result == expected
+
+
+def test_apply_transform_to_points():
+    transform = [
+        [1, 0.1, 0, -0.1],
+        [0, 1, 0, -0.2],
+        [0.05, 0, 1, 0.3],
+        [0, 0, 0, 1]]
+    points = [(1, 2, 3), (100, 50, 25), (0, 0, 0)]
+
+    result = apply_transform_to_points(transform, points)
+    assert result.shape == (3, 3)
+    for point, transformed in zip(points, result):
+        assert np.isclose(transformed,
+                          apply_transform(transform, point)).all()
+
+    no_offsets = apply_transform_to_points(
+        transform, points, with_offsets=False)
+    for point, transformed in zip(points, no_offsets):
+        assert np.isclose(
+            transformed,
+            apply_transform(transform, point, with_offsets=False)).all()
+
+
+def test_apply_reverse_with_offsets():
+    transform = [
+        [1, 0, 0, 10],
+        [0, 1, 0, 20],
+        [0, 0, 1, 30],
+        [0, 0, 0, 1]]
+    assert apply_reverse(transform, (1, 2, 3)) == (-9, -18, -27)
+    assert apply_reverse(transform, (1, 2, 3), with_offsets=False) \
+        == (1, 2, 3)
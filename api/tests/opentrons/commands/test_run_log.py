@@ -0,0 +1,49 @@
+import json
+import os
+
+import pytest
+
+from opentrons.commands.run_log import RunLog
+from opentrons.types import Point
+
+
+def test_run_log(tmpdir):
+    path = str(tmpdir.join('runlog.ndjson'))
+    run_log = RunLog(path, window=3)
+    for idx in range(10):
+        assert run_log.append(
+            {'level': idx % 2, 'description': 'command {}'.format(idx),
+             'location': Point(1, 2, 3), 'volume': idx}) == idx
+
+    assert len(run_log) == 10
+    assert run_log.window() == [run_log[idx] for idx in (7, 8, 9)]
+    # Records outside the window are read back from disk
+    assert run_log[0] == {'level': 0, 'description': 'command 0',
+                          'location': str(Point(1, 2, 3)), 'volume': 0}
+    assert run_log[-1]['description'] == 'command 9'
+    assert [r['volume'] for r in run_log[5:9]] == [5, 6, 7, 8]
+    assert [r['volume'] for r in run_log] == list(range(10))
+    with pytest.raises(IndexError):
+        run_log[10]
+
+    # Appending after reading still appends to the end
+    run_log.append({'description': 'last'})
+    assert run_log[10] == {'description': 'last'}
+
+    run_log.close()
+    assert run_log.closed
+    # A log at a given path is kept, one record per line
+    with open(path) as f:
+        lines = [json.loads(line) for line in f]
+    assert len(lines) == 11
+    assert lines[3]['volume'] == 3
+
+
+def test_temporary_run_log():
+    with RunLog(window=0) as run_log:
+        run_log.append({'id': 0})
+        path = run_log.path
+        assert os.path.exists(path)
+        assert run_log[0] == {'id': 0}
+        assert run_log.window() == []
+    assert not os.path.exists(path)
@@ -1,4 +1,5 @@
 from opentrons.commands import tree
+from opentrons.commands.run_log import RunLog
 
 
 def test_command_tree():
@@ -53,3 +54,14 @@ def test_command_tree():
             'children': []
         }
     ]
+
+
+def test_command_tree_from_run_log():
+    with RunLog(window=1) as run_log:
+        for idx, level in enumerate([0, 1, 1, 0]):
+            run_log.append(
+                {'level': level, 'description': str(idx), 'id': idx})
+        commands = tree.from_list(run_log)
+
+    assert [c['id'] for c in commands] == [0, 3]
+    assert [c['id'] for c in commands[0]['children']] == [1, 2]
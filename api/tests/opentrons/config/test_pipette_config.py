@@ -136,3 +136,13 @@ def test_mutable_configs_only(monkeypatch):
         set(pipette_config.mutable_configs)
     # ensure empty
     assert bool(difference) is False
+
+
+def test_loaded_configs_are_copies():
+    names = pipette_config.name_config()
+    names['p10_single']['displayName'] = 'modified'
+    assert pipette_config.name_config()['p10_single']['displayName']\
+        != 'modified'
+    models = pipette_config.model_config()
+    models['mutableConfigs'].append('modified')
+    assert 'modified' not in pipette_config.model_config()['mutableConfigs']
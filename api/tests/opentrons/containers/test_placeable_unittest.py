@@ -128,6 +128,45 @@ class PlaceableTestCase(unittest.TestCase):
 
         self.assertEqual(plate['A1'].coordinates(deck), (105, 215, 0))
 
+    def test_coordinates_after_move(self):
+        deck = Deck()
+        slot = Slot()
+        plate = generate_plate(
+            wells=96,
+            cols=8,
+            spacing=(10, 15),
+            offset=(5, 15),
+            radius=5
+        )
+        deck.add(slot, 'B2', (100, 200, 0))
+        slot.add(plate)
+        well = plate['A1']
+        self.assertEqual(well.coordinates(deck), (105, 215, 0))
+        self.assertEqual(well.coordinates(plate), (5, 15, 0))
+
+        plate._coordinates = Vector(1, 2, 3)
+        self.assertEqual(well.coordinates(deck), (106, 217, 3))
+        self.assertEqual(well.coordinates(plate), (6, 17, 3))
+
+        other_slot = Slot()
+        deck.add(other_slot, 'B3', (200, 200, 0))
+        slot.children_by_name.clear()
+        slot.children_by_reference.clear()
+        other_slot.add(plate, 'plate')
+        self.assertEqual(well.coordinates(deck), (206, 217, 3))
+
+    def test_children_after_add(self):
+        c = generate_plate(4, 2, (5, 5), (0, 0), 5)
+        self.assertEqual(len(c), 4)
+        extra = Well(properties={'radius': 5})
+        c.add(extra, 'C1', (10, 0, 0))
+        self.assertEqual(len(c), 5)
+        self.assertEqual(c[-1], extra)
+        self.assertEqual(next(c['B2']), extra)
+        self.assertEqual(c.get_index_from_name('C1'), 4)
+        self.assertEqual(list(c)[-1], extra)
+        self.assertWellSeriesEqual(c['B2':], [c['B2'], extra])
+
     def test_get_container_name(self):
         deck = Deck()
         slot = Slot()
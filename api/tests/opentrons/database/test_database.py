@@ -1,3 +1,5 @@
+import multiprocessing
+
 import pytest
 
 from opentrons.legacy_api.containers import load as containers_load
@@ -59,3 +61,47 @@ def test_invalid_container_name():
     error_type = ValueError
     with pytest.raises(error_type):
         database.load_container("fake_container")
+
+
+def test_container_cache():
+    plate = database.load_container('96-flat')
+    # Every load gets its own container, built from the cached rows
+    again = database.load_container('96-flat')
+    assert again is not plate
+    assert [str(well) for well in again] == [str(well) for well in plate]
+
+    plate._coordinates = Vector(1, 2, 3)
+    database.overwrite_container(plate)
+    assert database.load_container('96-flat')._coordinates == (1, 2, 3)
+
+    database.save_new_container(plate, 'saved-plate')
+    saved = database.load_container('saved-plate')
+    assert len(saved) == 96
+    assert saved['H12'].coordinates() == plate['H12'].coordinates()
+    assert saved['H12'].properties == plate['H12'].properties
+
+    database.delete_container('96-flat')
+    with pytest.raises(ValueError):
+        database.load_container('96-flat')
+    assert '96-flat' not in database.list_all_containers()
+    assert 'saved-plate' in database.list_all_containers()
+
+
+def _check_reconnects(parent_connection):
+    with database._connect() as connection:
+        assert connection is not parent_connection
+        assert database.load_container('96-flat')
+
+
+def test_connection_reopened_after_fork():
+    with database._connect() as connection:
+        pass
+    process = multiprocessing.get_context('fork').Process(
+        target=_check_reconnects, args=(connection,))
+    process.start()
+    process.join()
+    assert process.exitcode == 0
+    # The parent's connection is still open and still used
+    with database._connect() as again:
+        assert again is connection
+        again.execute('SELECT 1')
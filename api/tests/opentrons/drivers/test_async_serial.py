@@ -0,0 +1,167 @@
+import asyncio
+import os
+import tty
+
+import pytest
+
+from opentrons.drivers.async_serial import AsyncSerial
+from opentrons.drivers.serial_communication import SerialNoResponse
+from opentrons.drivers.thermocycler import Thermocycler
+
+ACK = 'ok\r\nok\r\n'
+TERMINATOR = b'\r\n\r\n'
+
+
+class FakeDevice:
+    """ The device end of a pseudo-terminal, answering each command with the
+    response from `responses` (or echoing the command back) and an ack """
+    def __init__(self, loop, responses=None):
+        self.master, slave = os.openpty()
+        tty.setraw(self.master)
+        tty.setraw(slave)
+        self.port = os.ttyname(slave)
+        self._slave = slave
+        self._loop = loop
+        self._buffer = b''
+        self.responses = responses or {}
+        self.received = []
+        self.hold = False
+        loop.add_reader(self.master, self._on_readable)
+
+    def _on_readable(self):
+        self._buffer += os.read(self.master, 1024)
+        self._respond()
+
+    def _respond(self):
+        while not self.hold and TERMINATOR in self._buffer:
+            command, _, self._buffer = self._buffer.partition(TERMINATOR)
+            command = command.decode().strip()
+            self.received.append(command)
+            response = self.responses.get(command.split(' ')[0], command)
+            if response is not None:
+                self.send(response + '\r\n' + ACK)
+
+    def send(self, data):
+        os.write(self.master, data.encode())
+
+    def release(self):
+        self.hold = False
+        self._respond()
+
+    def close(self):
+        self._loop.remove_reader(self.master)
+        os.close(self.master)
+        os.close(self._slave)
+
+
+@pytest.fixture
+def device(loop):
+    dev = FakeDevice(loop)
+    yield dev
+    dev.close()
+
+
+async def test_write_and_return(device, loop):
+    connection = await AsyncSerial.connect(device.port, ACK, loop=loop)
+    assert connection.is_open()
+    assert connection.port == device.port
+
+    res = await connection.write_and_return('M105\r\n\r\n', timeout=1)
+    assert res == 'M105'
+
+    # Commands may be pipelined, and responses go to the right command
+    device.hold = True
+    first = asyncio.ensure_future(
+        connection.write_and_return('first\r\n\r\n', timeout=1))
+    second = asyncio.ensure_future(
+        connection.write_and_return('second\r\n\r\n', timeout=1))
+    await asyncio.sleep(0.05)
+    assert connection.pending == 2
+    device.release()
+    assert await second == 'second'
+    assert await first == 'first'
+    assert connection.pending == 0
+
+    connection.close()
+    assert not connection.is_open()
+
+
+async def test_unsolicited_and_timeout(device, loop):
+    lines = []
+    connection = await AsyncSerial.connect(
+        device.port, ACK, loop=loop, unsolicited_callback=lines.append)
+
+    device.send('Lid:open\r\n')
+    await asyncio.sleep(0.05)
+    assert lines == ['Lid:open']
+
+    device.responses['M126'] = None
+    with pytest.raises(SerialNoResponse):
+        await connection.write_and_return('M126\r\n\r\n', timeout=0.1)
+    assert connection.pending == 0
+    assert await connection.write_and_return(
+        'M127\r\n\r\n', timeout=1) == 'M127'
+
+    # A late response to a command that timed out does not go to a later
+    # command waiting at the same time
+    device.hold = True
+    late = asyncio.ensure_future(
+        connection.write_and_return('late\r\n\r\n', timeout=0.1))
+    waiting = asyncio.ensure_future(
+        connection.write_and_return('M104\r\n\r\n', timeout=1))
+    with pytest.raises(SerialNoResponse):
+        await late
+    device.release()
+    assert await waiting == 'M104'
+    assert connection.pending == 0
+
+    # Neither does one that arrives before the next command is written
+    device.hold = True
+    with pytest.raises(SerialNoResponse):
+        await connection.write_and_return('late\r\n\r\n', timeout=0.1)
+    device.release()
+    await asyncio.sleep(0.05)
+    assert await connection.write_and_return(
+        'M104\r\n\r\n', timeout=1) == 'M104'
+
+    device.hold = True
+    waiting = asyncio.ensure_future(
+        connection.write_and_return('M105\r\n\r\n', timeout=1))
+    await asyncio.sleep(0.05)
+    connection.close()
+    with pytest.raises(SerialNoResponse):
+        await waiting
+
+
+async def test_thermocycler_driver(loop):
+    device = FakeDevice(loop, {
+        'M119': 'Lid:closed',
+        'M105': 'T:40 C:25 H:none',
+        'M115': 'serial:s model:m version:v'})
+    interrupts = []
+    try:
+        tc = Thermocycler(interrupts.append)
+        await tc.connect(device.port)
+        assert tc.is_connected()
+        assert tc.port == device.port
+        assert tc.lid_status == 'closed'
+        assert await tc.get_device_info() == {
+            'serial': 's', 'model': 'm', 'version': 'v'}
+
+        # The status is polled in the background
+        await asyncio.sleep(0.05)
+        assert tc.temperature == 25
+        assert tc.target == 40
+        assert tc.status == 'ramping'
+
+        await tc.set_temperature(50, hold_time=10, ramp_rate=2)
+        assert device.received[-2:] == ['M566 S2', 'M104 S50 H10']
+
+        device.send('Lid:open\r\n')
+        await asyncio.sleep(0.05)
+        assert interrupts == ['Lid:open']
+
+        tc.disconnect()
+        assert not tc.is_connected()
+    finally:
+        device.close()
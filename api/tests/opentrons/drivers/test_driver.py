@@ -1022,3 +1022,164 @@ def test_unstick_axes(model):
     # from pprint import pprint
     # pprint(current_log)
     assert current_log == expected
+
+
+def test_streaming_moves(smoothie, monkeypatch):
+    from opentrons.drivers import serial_communication
+    from opentrons.drivers.smoothie_drivers import driver_3_0
+    command_log = []
+    smoothie._setup()
+    smoothie.home()
+    smoothie.simulating = False
+
+    def write_and_return_with_log(command, ack, connection, timeout):
+        command_log.append(command.strip())
+        return driver_3_0.SMOOTHIE_ACK
+
+    def write_with_log(command, connection):
+        command_log.append(command.strip())
+
+    def read_response(ack, connection, timeout):
+        command_log.append('<- ok')
+        return ''
+
+    def _parse_position_response(arg):
+        return smoothie.position
+
+    monkeypatch.setattr(serial_communication, 'write_and_return',
+                        write_and_return_with_log)
+    monkeypatch.setattr(serial_communication, 'write', write_with_log)
+    monkeypatch.setattr(serial_communication, 'read_response', read_response)
+    monkeypatch.setattr(
+        driver_3_0, '_parse_position_response', _parse_position_response)
+
+    smoothie.set_streaming(True, window=2)
+    assert smoothie.streaming
+
+    # The first move changes currents, so it has to wait for motion
+    smoothie.move({'X': 1, 'Y': 1, 'Z': 1, 'A': 1})
+    # These do not change currents, so they are streamed without M400 while
+    # keeping at most two of them unacknowledged
+    smoothie.move({'X': 2, 'Y': 2, 'Z': 2, 'A': 2})
+    smoothie.move({'X': 3, 'Y': 3, 'Z': 3, 'A': 3})
+    smoothie.move({'X': 4, 'Y': 4, 'Z': 4, 'A': 4})
+    # Plunger moves change currents, so they are synchronization points: the
+    # streamed moves are acknowledged and finished before the current changes
+    smoothie.move({'B': 2})
+    expected = [
+        ['M907 A0.8 B0.05 C0.05 X1.25 Y1.25 Z0.8 G4P0.005 G0A1.*'],
+        ['M400'],
+        ['M907 A0.8 B0.05 C0.05 X1.25 Y1.25 Z0.8 G4P0.005 G0A2.*'],
+        ['M907 A0.8 B0.05 C0.05 X1.25 Y1.25 Z0.8 G4P0.005 G0A3.*'],
+        ['<- ok'],
+        ['M907 A0.8 B0.05 C0.05 X1.25 Y1.25 Z0.8 G4P0.005 G0A4.*'],
+        ['<- ok'],
+        ['<- ok'],
+        ['M400'],
+        ['M907 A0.1 B0.5 C0.05 X0.3 Y0.3 Z0.1 G4P0.005 G0B2'],
+        ['M400'],
+        ['M907 A0.1 B0.05 C0.05 X0.3 Y0.3 Z0.1 G4P0.005'],
+        ['M400'],
+    ]
+    fuzzy_assert(result=command_log, expected=expected)
+    command_log = []
+
+    # Position reads are synchronization points as well
+    smoothie.move({'X': 5, 'Y': 5, 'Z': 5, 'A': 5})
+    smoothie.move({'X': 6, 'Y': 6, 'Z': 6, 'A': 6})
+    smoothie.update_position()
+    expected = [
+        ['M907 A0.8 B0.05 C0.05 X1.25 Y1.25 Z0.8 G4P0.005 G0A5.*'],
+        ['M400'],
+        ['M907 A0.8 B0.05 C0.05 X1.25 Y1.25 Z0.8 G4P0.005 G0A6.*'],
+        ['<- ok'],
+        ['M400'],
+        ['M114.2'],
+        ['M400'],
+    ]
+    fuzzy_assert(result=command_log, expected=expected)
+    command_log = []
+
+    # Disabling streaming waits for in-flight commands
+    smoothie.move({'X': 7, 'Y': 7, 'Z': 7, 'A': 7})
+    smoothie.set_streaming(False)
+    assert not smoothie.streaming
+    smoothie.move({'X': 8, 'Y': 8, 'Z': 8, 'A': 8})
+    expected = [
+        ['M907 A0.8 B0.05 C0.05 X1.25 Y1.25 Z0.8 G4P0.005 G0A7.*'],
+        ['<- ok'],
+        ['M400'],
+        ['M907 A0.8 B0.05 C0.05 X1.25 Y1.25 Z0.8 G4P0.005 G0A8.*'],
+        ['M400'],
+    ]
+    fuzzy_assert(result=command_log, expected=expected)
+
+    with pytest.raises(ValueError):
+        smoothie.set_streaming(True, window=0)
+
+
+def test_streaming_error(smoothie, monkeypatch):
+    from opentrons.drivers import serial_communication
+    from opentrons.drivers.smoothie_drivers import driver_3_0
+    smoothie.simulating = False
+    smoothie.set_streaming(True)
+    home_log = []
+
+    monkeypatch.setattr(
+        serial_communication, 'write_and_return',
+        lambda command, ack, connection, timeout: driver_3_0.SMOOTHIE_ACK)
+    monkeypatch.setattr(
+        serial_communication, 'write', lambda command, connection: None)
+    monkeypatch.setattr(
+        serial_communication, 'read_response',
+        lambda ack, connection, timeout: 'ALARM: Hard limit +X')
+    monkeypatch.setattr(smoothie, 'home', lambda axis: home_log.append(axis))
+    monkeypatch.setattr(smoothie, 'update_homed_flags', lambda: None)
+
+    smoothie.move({'X': 1, 'Y': 1, 'Z': 1, 'A': 1})
+    smoothie.move({'X': 2, 'Y': 2, 'Z': 2, 'A': 2})
+    with pytest.raises(driver_3_0.SmoothieError):
+        smoothie.update_position()
+    assert home_log == ['X']
+    assert not smoothie._streamed_commands
+
+
+def test_send_command_trace(smoothie, monkeypatch):
+    from opentrons.drivers import serial_communication
+    from opentrons.drivers.smoothie_drivers import driver_3_0
+    from opentrons.util.profiler import profiler
+    smoothie._setup()
+    smoothie.home()
+    smoothie.simulating = False
+
+    monkeypatch.setattr(
+        serial_communication, 'write_and_return',
+        lambda command, ack, connection, timeout: driver_3_0.SMOOTHIE_ACK)
+    monkeypatch.setattr(
+        serial_communication, 'write', lambda command, connection: None)
+    monkeypatch.setattr(
+        serial_communication, 'read_response',
+        lambda ack, connection, timeout: '')
+
+    profiler.enable()
+    try:
+        smoothie.move({'X': 1, 'Y': 1, 'Z': 1, 'A': 1})
+        smoothie.set_streaming(True)
+        smoothie.move({'X': 2, 'Y': 2, 'Z': 2, 'A': 2})
+        smoothie.set_streaming(False)
+    finally:
+        profiler.disable()
+    events = [event for event in profiler.events()
+              if event['cat'] == 'smoothie']
+    profiler.clear()
+
+    # Turning streaming off then waits for motion to finish
+    assert [event['args']['phase'] for event in events]\
+        == ['write', 'wait', 'stream', 'ack', 'wait']
+    write, wait, stream, ack, *_ = events
+    assert write['args']['current_change']
+    assert write['name'].startswith('M907')
+    assert wait['name'] == 'M400'
+    assert wait['args']['command'] == write['name']
+    assert stream['name'] == ack['name']
+    assert write['ts'] + write['dur'] <= wait['ts']
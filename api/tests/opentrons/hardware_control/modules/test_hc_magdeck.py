@@ -18,9 +18,9 @@ async def test_sim_data():
 
 async def test_sim_state_update():
     mag = await modules.build('', 'magdeck', True, lambda x: None)
-    mag.calibrate()
+    await mag.calibrate()
     assert mag.status == 'disengaged'
-    mag.engage(2)
+    await mag.engage(2)
     assert mag.status == 'engaged'
-    mag.deactivate()
+    await mag.deactivate()
     assert mag.status == 'disengaged'
@@ -24,12 +24,12 @@ async def test_sim_state():
 
 async def test_sim_update():
     temp = await modules.build('', 'tempdeck', True, lambda x: None)
-    temp.set_temperature(10)
+    await temp.set_temperature(10)
     assert temp.temperature == 10
     assert temp.target == 10
     assert temp.status == 'holding at target'
     await asyncio.wait_for(temp.wait_for_temp(), timeout=0.2)
-    temp.deactivate()
+    await temp.deactivate()
     assert temp.temperature == 0
     assert temp.target is None
     assert temp.status == 'idle'
@@ -1,3 +1,7 @@
+import asyncio
+
+import pytest
+
 from opentrons.types import Mount
 from opentrons.hardware_control import adapters, API
 
@@ -9,3 +13,36 @@ def test_synch_adapter(loop):
     assert synch.attached_instruments[Mount.LEFT]['name']\
                 .startswith('p10_single')
     synch.join()
+
+
+def test_inline_adapter():
+    inline = adapters.InlineAdapter.build(API.build_hardware_simulator)
+    inline.cache_instruments({Mount.LEFT: 'p10_single'})
+    assert inline.attached_instruments[Mount.LEFT]['name']\
+                 .startswith('p10_single')
+    inline.home()
+    assert inline.current_position(Mount.LEFT)
+
+    # Calls that wait on a future run the adapter's loop until it resolves
+    async def waits(value):
+        await asyncio.sleep(0.01, loop=inline._loop)
+        return value
+
+    assert inline.call_coroutine_sync(inline._loop, waits, 1) == 1
+
+    async def fails():
+        await asyncio.sleep(0.01, loop=inline._loop)
+        raise ValueError('failed')
+
+    with pytest.raises(ValueError):
+        inline.call_coroutine_sync(inline._loop, fails)
+    inline.join()
+
+
+def test_incomplete_adapter_fails_to_build(loop):
+    class NoModules(adapters._SynchronizingAdapter):
+        call_coroutine_sync = adapters.InlineAdapter.call_coroutine_sync
+
+    api = API.build_hardware_simulator(loop=loop)
+    with pytest.raises(TypeError):
+        NoModules(api, loop)
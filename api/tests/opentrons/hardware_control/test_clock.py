@@ -0,0 +1,96 @@
+import pytest
+
+from opentrons import types
+from opentrons import hardware_control as hc
+from opentrons.hardware_control.clock import ModeledClock, move_time
+from opentrons.protocol_api import ProtocolContext
+
+
+def test_move_time():
+    assert move_time(0, 100, 1000) == 0
+    # Long enough to reach full speed: 0.1s speeding up and slowing down
+    # covers 10mm, and the other 90mm takes 0.9s
+    assert move_time(100, 100, 1000) == pytest.approx(1.1)
+    assert move_time(-100, 100, 1000) == pytest.approx(1.1)
+    # Too short to reach full speed
+    assert move_time(10, 100, 1000) == pytest.approx(0.2)
+    assert move_time(2.5, 100, 1000) == pytest.approx(0.1)
+
+
+def test_clock():
+    clock = ModeledClock({'X': 100, 'Y': 50}, {'X': 1000, 'Y': 1000})
+    assert clock.elapsed == 0
+    # The move takes as long as its slowest axis
+    assert clock.move({'X': 0, 'Y': 0}, {'X': 100, 'Y': 100})\
+        == pytest.approx(move_time(100, 50, 1000))
+    assert clock.elapsed == pytest.approx(2.05)
+    # and a speed limits every axis
+    assert clock.move({'X': 100}, {'X': 0}, speed=10)\
+        == pytest.approx(move_time(100, 10, 1000))
+    clock.advance(10)
+    assert clock.elapsed == pytest.approx(22.06)
+    ready = clock.ramp(25, 45, 0.5)
+    assert ready == pytest.approx(62.06)
+    clock.advance_to(ready)
+    clock.advance_to(0)
+    assert clock.elapsed == pytest.approx(62.06)
+
+
+async def test_simulator_clock(loop):
+    hardware = hc.API.build_hardware_simulator(
+        attached_instruments={
+            types.Mount.RIGHT: {'model': 'p300_single_v1', 'id': 'testy'}},
+        loop=loop)
+    clock = hardware.clock
+    await hardware.home()
+    await hardware.cache_instruments()
+    start = clock.elapsed
+    await hardware.move_rel(types.Mount.RIGHT, types.Point(0, -100, 0))
+    assert clock.elapsed - start == pytest.approx(move_time(
+        100, hardware.config.default_max_speed['Y'],
+        hardware.config.acceleration['Y']))
+
+    # Plunger moves go at the flow rate
+    pipette = hardware._attached_instruments[types.Mount.RIGHT]
+    hardware.set_flow_rate(types.Mount.RIGHT, aspirate=10)
+    # Get the plunger to the bottom, where aspirates start from
+    await hardware.aspirate(types.Mount.RIGHT, 50)
+    await hardware.dispense(types.Mount.RIGHT)
+    start = clock.elapsed
+    await hardware.aspirate(types.Mount.RIGHT, 100)
+    slow = clock.elapsed - start
+    hardware.set_flow_rate(types.Mount.RIGHT, aspirate=20)
+    await hardware.dispense(types.Mount.RIGHT)
+    start = clock.elapsed
+    await hardware.aspirate(types.Mount.RIGHT, 100)
+    fast = clock.elapsed - start
+    assert fast < slow
+    speed = 10 / pipette.ul_per_mm(pipette.config.max_volume, 'aspirate')
+    assert slow > 100 / 10 * 0.9
+    assert slow == pytest.approx(move_time(
+        100 / pipette.ul_per_mm(100, 'aspirate'), speed,
+        hardware.config.acceleration['C']))
+
+    start = clock.elapsed
+    await hardware.delay(30)
+    assert clock.elapsed - start == 30
+
+
+def test_module_ramps(loop):
+    ctx = ProtocolContext(loop)
+    clock = ctx._hw_manager.hardware.clock
+    tempdeck = ctx.load_module('tempdeck', 1)
+    tempdeck.set_temperature(45)
+    start = clock.elapsed
+    tempdeck.wait_for_temp()
+    assert clock.elapsed - start == pytest.approx(200)
+    # Waiting again doesn't take any longer
+    tempdeck.wait_for_temp()
+    assert clock.elapsed - start == pytest.approx(200)
+
+    thermocycler = ctx.load_module('thermocycler', 7)
+    thermocycler.set_temperature(95, ramp_rate=5)
+    start = clock.elapsed
+    thermocycler.wait_for_temp()
+    assert clock.elapsed - start == pytest.approx(14)
+    assert thermocycler.temperature == 95
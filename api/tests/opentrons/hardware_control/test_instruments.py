@@ -161,6 +161,27 @@ async def test_dispense(dummy_instruments, loop):
         == plunger_pos_2
 
 
+async def test_plunger_speed(dummy_instruments, loop, monkeypatch):
+    hw_api = hc.API.build_hardware_simulator(
+        attached_instruments=dummy_instruments, loop=loop)
+    await hw_api.home()
+    await hw_api.cache_instruments()
+    speeds = []
+    backend_move = hw_api._backend.move
+
+    def move(target_position, home_flagged_axes=True, speed=None):
+        speeds.append(speed)
+        return backend_move(target_position, home_flagged_axes, speed)
+
+    monkeypatch.setattr(hw_api._backend, 'move', move)
+    # The p10_single_v1 flow rates (5 uL/s to aspirate and 10 uL/s to
+    # dispense) are converted to plunger speeds in mm/s, matching the legacy
+    # API's Pipette.speeds (6.613549 and 12.586532 mm/s)
+    await hw_api.aspirate(types.Mount.LEFT, 5)
+    await hw_api.dispense(types.Mount.LEFT, 5, rate=2)
+    assert speeds == [6.613549, 25.173065]
+
+
 async def test_no_pipette(dummy_instruments, loop):
     hw_api = hc.API.build_hardware_simulator(
         attached_instruments=dummy_instruments, loop=loop)
@@ -1,3 +1,6 @@
+import asyncio
+import threading
+
 import pytest
 from opentrons import types
 from opentrons import hardware_control as hc
@@ -210,6 +213,25 @@ async def test_deck_cal_applied(monkeypatch, loop):
     assert called_with['Z'] == 30
 
 
+async def test_deck_cal_updated(loop):
+    hardware_api = hc.API.build_hardware_simulator(loop=loop)
+    await hardware_api.home()
+    before = dict(hardware_api._current_position)
+    await hardware_api.update_deck_calibration([[1, 0, 0, 10],
+                                                [0, 1, 0, 20],
+                                                [0, 0, 1, 30],
+                                                [0, 0, 0, 1]])
+    deck = hardware_api.deck_points_from_smoothie([(10, 20, 30),
+                                                   (418, 353, 218)])
+    assert deck.tolist() == [[0, 0, 0], [408, 333, 188]]
+    smoothie = hardware_api.smoothie_points_from_deck(deck)
+    assert smoothie.tolist() == [[10, 20, 30], [418, 353, 218]]
+    await hardware_api.home()
+    assert hardware_api._current_position[Axis.X] == before[Axis.X] - 10
+    assert hardware_api._current_position[Axis.Y] == before[Axis.Y] - 20
+    assert hardware_api._current_position[Axis.A] == before[Axis.A] - 30
+
+
 async def test_other_mount_retracted(hardware_api):
     await hardware_api.home()
     await hardware_api.move_to(types.Mount.RIGHT, types.Point(0, 0, 0))
@@ -274,3 +296,29 @@ async def catch_oob_moves(hardware_api):
         await hardware_api.move_rel(types.Mount.LEFT, types.Point(0, 0, 12))
     await hardware_api.pick_up_tip(types.Mount.LEFT)
     await hardware_api.move_rel(types.Mount.LEFT, types.Point(0, 0, 0))
+
+
+async def test_backend_moves_leave_loop_free(loop):
+    sim = hc.API.build_hardware_simulator(loop=loop)._backend
+    released = threading.Event()
+
+    class BlockingBackend:
+        """ A non-simulator backend whose moves block until released """
+        def __getattr__(self, name):
+            return getattr(sim, name)
+
+        def move(self, *args, **kwargs):
+            assert released.wait(1)
+            return sim.move(*args, **kwargs)
+
+    c = hc.API(BlockingBackend(), loop=loop)
+    assert not c.is_simulator
+    await c.home()
+    move = asyncio.ensure_future(
+        c.move_to(types.Mount.RIGHT, types.Point(0, 10, 0)), loop=loop)
+    # The loop keeps running while the backend waits on the move
+    await asyncio.sleep(0.05, loop=loop)
+    assert not move.done()
+    released.set()
+    await move
+    assert (await c.gantry_position(types.Mount.RIGHT)).y == 10
@@ -0,0 +1,41 @@
+""" Time consuming a full 96-tip rack the way protocols do, looking up the
+next tip and reading the rack's rows and columns for each pick-up.
+
+Run with ``pytest -s -m benchmark`` to see the timings.
+"""
+import time
+
+import pytest
+
+from opentrons.protocol_api import labware
+from opentrons.types import Location, Point
+
+pytestmark = pytest.mark.benchmark
+
+RACKS = 20
+
+
+def _consume_rack(tiprack):
+    picked = []
+    tip = tiprack.next_tip()
+    while tip:
+        tiprack.wells_by_index()
+        tiprack.rows()
+        tiprack.columns()
+        tiprack.use_tips(tip)
+        picked.append(tip)
+        tip = tiprack.next_tip()
+    return picked
+
+
+def test_tip_rack_consumption_speed():
+    definition = labware.load_definition_by_name(
+        'opentrons_96_tiprack_300_ul')
+    start = time.perf_counter()
+    for _ in range(RACKS):
+        tiprack = labware.Labware(definition, Location(Point(0, 0, 0), '1'))
+        picked = _consume_rack(tiprack)
+        assert picked == tiprack.wells()
+        assert not any(well.has_tip for well in tiprack.wells())
+    elapsed = time.perf_counter() - start
+    print('\n{:.2f} ms per 96-tip rack'.format(elapsed / RACKS * 1000))
@@ -0,0 +1,49 @@
+""" Time serializing a session-sized object tree for the RPC server: a
+96-well plate and a 10,000 command protocol.
+
+Run with ``pytest -s -m benchmark`` to see the timings.
+"""
+import json
+import time
+
+import pytest
+
+from opentrons.api import models
+from opentrons.commands import tree
+from opentrons.protocol_api import labware
+from opentrons.server import serialize
+from opentrons.types import Location, Point
+
+pytestmark = pytest.mark.benchmark
+
+COMMANDS = 10000
+REPEATS = 5
+
+
+class FakeSession:
+    def __init__(self, plate):
+        self.name = 'benchmark.py'
+        self.state = 'loaded'
+        self.commands = tree.from_list(
+            {'level': idx % 3, 'description': 'Command {}'.format(idx),
+             'id': idx}
+            for idx in range(COMMANDS))
+        self.containers = [models.Container(plate)]
+        self.plate = plate
+
+
+def test_serialize_session_speed():
+    plate = labware.Labware(
+        labware.load_definition_by_name('generic_96_wellplate_380_ul'),
+        Location(Point(0, 0, 0), '1'))
+    session = FakeSession(plate)
+
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        serialized, refs = serialize.get_object_tree(session)
+    elapsed = (time.perf_counter() - start) / REPEATS
+
+    assert len(serialized['v']['commands']) == COMMANDS // 3 + 1
+    assert id(plate) in refs
+    print('\n{:.1f} ms to serialize a {} command session ({} kB)'.format(
+        elapsed * 1000, COMMANDS, len(json.dumps(serialized)) // 1000))
@@ -0,0 +1,56 @@
+""" Compare protocol simulation throughput with hardware calls handed to a
+worker thread (SynchronousAdapter) and run inline (InlineAdapter).
+
+Run with ``pytest -s -m benchmark`` to see the protocols/sec for each.
+"""
+import time
+
+import pytest
+
+from opentrons.hardware_control import adapters, API
+from opentrons.protocol_api import ProtocolContext, execute
+
+pytestmark = pytest.mark.benchmark
+
+PROTOCOL = """
+from opentrons import types
+
+
+def run(ctx):
+    ctx.home()
+    tr = ctx.load_labware_by_name('opentrons_96_tiprack_300_ul', 1)
+    right = ctx.load_instrument('p300_single', types.Mount.RIGHT, [tr])
+    source = ctx.load_labware_by_name('generic_96_wellplate_380_ul', 2)
+    dest = ctx.load_labware_by_name('generic_96_wellplate_380_ul', 3)
+    right.pick_up_tip()
+    for src, dst in zip(source.wells(), dest.wells()):
+        right.aspirate(10, src.bottom())
+        right.dispense(10, dst.bottom())
+        right.blow_out()
+    right.drop_tip()
+"""
+RUNS = 5
+
+
+def _simulate_repeatedly(adapter_cls, code, runs):
+    runlogs = []
+    start = time.perf_counter()
+    for _ in range(runs):
+        hardware = adapter_cls.build(API.build_hardware_simulator)
+        ctx = ProtocolContext(loop=hardware.loop, hardware=hardware)
+        execute.run_protocol(protocol_code=code, simulate=True, context=ctx)
+        runlogs.append(ctx.commands())
+        hardware.join()
+    return runs / (time.perf_counter() - start), runlogs
+
+
+@pytest.mark.api2_only
+def test_inline_simulation_speed():
+    threaded_rate, threaded_logs = _simulate_repeatedly(
+        adapters.SynchronousAdapter, PROTOCOL, RUNS)
+    inline_rate, inline_logs = _simulate_repeatedly(
+        adapters.InlineAdapter, PROTOCOL, RUNS)
+
+    print('\nSynchronousAdapter: {:.1f} protocols/sec'.format(threaded_rate))
+    print('InlineAdapter: {:.1f} protocols/sec'.format(inline_rate))
+    assert inline_logs == threaded_logs
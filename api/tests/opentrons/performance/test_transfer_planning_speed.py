@@ -0,0 +1,42 @@
+""" Time planning a plate-to-plate transfer of a 384-well plate with a volume
+gradient large enough that some volumes are split.
+
+Run with ``pytest -s -m benchmark`` to see the timings.
+"""
+import time
+
+import pytest
+
+from opentrons.protocol_api import ProtocolContext, transfers
+from opentrons.types import Mount
+
+pytestmark = pytest.mark.benchmark
+
+REPEATS = 20
+
+
+def test_transfer_planning_speed(loop):
+    ctx = ProtocolContext(loop)
+    source = ctx.load_labware_by_name('corning_384_wellplate_112_ul', 1)
+    dest = ctx.load_labware_by_name('corning_384_wellplate_112_ul', 2)
+    instr = ctx.load_instrument('p300_single', Mount.RIGHT)
+    options = transfers.TransferOptions()
+    options = options._replace(
+        transfer=options.transfer._replace(
+            air_gap=10,
+            touch_tip_strategy=transfers.TouchTipStrategy.ALWAYS))
+
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        plan = transfers.TransferPlan(
+            (10, 500), source.wells(), dest.wells(), instr, options=options)
+        steps = plan.steps
+    planned = (time.perf_counter() - start) / REPEATS
+    start = time.perf_counter()
+    commands = sum(1 for _ in plan)
+    resolved = time.perf_counter() - start
+
+    assert len(steps) == commands
+    assert steps['volume'].max() <= instr.max_volume
+    print('\n{:.2f} ms to plan and {:.1f} ms to resolve {} steps'.format(
+        planned * 1000, resolved * 1000, len(steps)))
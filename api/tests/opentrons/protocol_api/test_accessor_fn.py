@@ -223,3 +223,25 @@ def test_col_index_accessor():
     a2 = Point(x=offset[0] + x, y=offset[1] + y, z=offset[2] + depth2)
     assert fake_labware.columns_by_index()['1'][0]._position == a1
     assert fake_labware.columns_by_index()['2'][0]._position == a2
+
+
+def test_accessors_cached_until_calibrated():
+    deck = Location(Point(0, 0, 0), 'deck')
+    fake_labware = labware.Labware(minimalLabwareDef, deck)
+    a1 = fake_labware.wells_by_index()['A1']
+    assert fake_labware.rows()[0][0] is a1
+    assert fake_labware.columns_by_index()['1'][0] is a1
+    assert fake_labware.rows_by_index()['A'][0] is a1
+
+    # Modifying the results does not affect later calls
+    fake_labware.columns()[0].clear()
+    fake_labware.wells_by_index().clear()
+    assert fake_labware.columns()[0][0] is a1
+    assert fake_labware.wells_by_index()['A1'] is a1
+
+    fake_labware.set_calibration(Point(1, 1, 1))
+    new_a1 = fake_labware.wells_by_index()['A1']
+    assert new_a1 is not a1
+    assert fake_labware.columns()[0][0] is new_a1
+    assert fake_labware.rows_by_index()['A'][0] is new_a1
+    assert new_a1._position == a1._position + Point(1, 1, 1)
@@ -104,7 +104,11 @@ def test_move_uses_arc(loop, monkeypatch, load_my_labware):
     monkeypatch.setattr(hardware, 'move_to', fake_move)
 
     right.move_to(lw.wells()[0].top())
-    assert len(targets) == 3
+    # The pipette starts out homed, above the arc's safe height, so it
+    # doesn't need to retract first
+    assert len(targets) == 2
+    assert targets[0][1]._replace(z=0) == targets[1][1]._replace(z=0)
+    assert targets[0][1].z > targets[1][1].z
     assert targets[-1][0] == Mount.RIGHT
     assert targets[-1][1] == lw.wells()[0].top().point
 
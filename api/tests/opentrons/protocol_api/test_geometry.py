@@ -1,7 +1,8 @@
 import pytest
 
 from opentrons.types import Location, Point
-from opentrons.protocol_api.geometry import Deck, plan_moves
+from opentrons.protocol_api.geometry import (
+    Deck, plan_moves, optimize_moves)
 from opentrons.protocol_api import labware
 from opentrons.hardware_control.types import CriticalPoint
 
@@ -244,3 +245,72 @@ def test_direct_cp():
     assert to_normal[0][1] == CriticalPoint.XY_CENTER
     assert to_normal[1][1] is None
     assert to_normal[2][1] is None
+
+
+def test_height_map():
+    deck = Deck()
+    lw = labware.load(labware_name, deck.position_for(1))
+    deck[1] = lw
+    mod = labware.load_module('tempdeck', deck.position_for(9))
+    deck[9] = mod
+    tc = labware.load_module('thermocycler', deck.position_for(7))
+    deck[7] = tc
+    heights = deck.height_map()
+    assert heights[1] == lw.highest_z
+    assert heights[9] == mod.highest_z
+    for slot in (7, 8, 10, 11):
+        assert heights[slot] == tc.highest_z
+    for slot in (2, 3, 4, 5, 6, 12):
+        assert heights[slot] == 0
+
+    # Moves only need to clear what is on the slots they pass over
+    slot_1 = deck.position_for(1).point + Point(10, 10, 0)
+    slot_2 = deck.position_for(2).point + Point(60, 10, 0)
+    slot_3 = deck.position_for(3).point + Point(60, 40, 0)
+    slot_12 = deck.position_for(12).point + Point(60, 40, 0)
+    assert deck.highest_z_between(slot_2, slot_2) == 0
+    assert deck.highest_z_between(slot_1, slot_2) == lw.highest_z
+    assert deck.highest_z_between(slot_3, slot_12) == mod.highest_z
+    assert deck.highest_z_between(slot_1, slot_12) == deck.highest_z
+    # Anywhere off the deck is over the nearest slot
+    assert deck.highest_z_between(Point(-50, -50, 0), Point(-50, -50, 0))\
+        == lw.highest_z
+
+    lw2 = labware.load(labware_name, deck.position_for(2))
+    deck[2] = lw2
+    different_lw = plan_moves(lw.wells()[0].top(), lw2.wells()[0].top(),
+                              deck, 7.0, 15.0)
+    check_arc_basic(different_lw, lw.wells()[0].top(), lw2.wells()[0].top())
+    assert different_lw[0][0].z == lw.highest_z + 15.0
+    assert different_lw[0][0].z < deck.highest_z + 15.0
+
+
+def test_optimize_moves():
+    start = Point(10, 10, 50)
+    # An arc that starts at its safe height doesn't retract first
+    arc = [(Point(10, 10, 50), None),
+           (Point(20, 20, 50), None),
+           (Point(20, 20, 5), None)]
+    assert optimize_moves(start, None, arc) == arc[1:]
+    # unless the critical point changes
+    assert optimize_moves(start, CriticalPoint.XY_CENTER, arc) == arc
+    # and one that ends at its safe height doesn't descend
+    arc = [(Point(10, 10, 60), None),
+           (Point(20, 20, 60), None),
+           (Point(20, 20, 60), None)]
+    assert optimize_moves(start, None, arc) == arc[:2]
+    # Moves that carry on in the same direction are merged
+    arc = [(Point(10, 10, 60), None),
+           (Point(10, 10, 70), None),
+           (Point(20, 20, 70), None),
+           (Point(30, 30, 70), None),
+           (Point(30, 30, 70), None),
+           (Point(30, 30, 10), None)]
+    assert optimize_moves(start, None, arc) == [
+        (Point(10, 10, 70), None),
+        (Point(30, 30, 70), None),
+        (Point(30, 30, 10), None)]
+    # but ones that double back are not
+    arc = [(Point(10, 10, 60), None), (Point(10, 10, 40), None)]
+    assert optimize_moves(start, None, arc) == arc
+    assert optimize_moves(start, None, [(start, None)]) == []
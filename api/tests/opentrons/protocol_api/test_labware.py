@@ -1,3 +1,4 @@
+import copy
 import json
 import pkgutil
 
@@ -179,6 +180,40 @@ def test_well_parent():
     assert well.center().labware.parent is lw
 
 
+def test_shared_well_geometry():
+    labware_def = labware.load_definition_by_name(
+        'generic_96_wellplate_380_ul')
+    first = labware.Labware(labware_def, Location(Point(0, 0, 0), '1'))
+    second = labware.Labware(
+        labware.load_definition_by_name('generic_96_wellplate_380_ul'),
+        Location(Point(10, 20, 30), '2'))
+    # Equivalent definitions share one read-only geometry table
+    assert first._geometry is second._geometry
+    assert len(first._geometry) == 96
+    with pytest.raises(ValueError):
+        first._geometry.tops[0, 0] = 1
+
+    a1 = labware_def['wells']['A1']
+    assert first.wells_by_index()['A1'].top().point\
+        == Point(a1['x'], a1['y'], a1['z'] + a1['depth'])\
+        + first._offset
+    assert second.well('A1').top().point\
+        == first.well('A1').top().point + Point(10, 20, 30)
+
+    # A modified definition gets its own table
+    modified = copy.deepcopy(
+        labware.load_definition_by_name('generic_96_wellplate_380_ul'))
+    modified['wells']['A1']['depth'] = 1
+    third = labware.Labware(modified, Location(Point(0, 0, 0), '3'))
+    assert third._geometry is not first._geometry
+    assert third.well('A1')._depth == 1
+
+    # Calibration moves every well by the same offset
+    first.set_calibration(Point(1, 2, 3))
+    assert tuple(first.wells()[-1].top().point) == pytest.approx(
+        tuple(second.wells()[-1].top().point + Point(-9, -18, -27)))
+
+
 def test_tip_tracking_init():
     labware_name = 'opentrons_96_tiprack_300_ul'
     labware_def = labware.load_definition_by_name(labware_name)
@@ -284,6 +319,65 @@ def test_select_next_tip():
     assert next_eight == well_list[16]
 
 
+def test_tip_tracker():
+    tiprack = labware.Labware(
+        labware.load_definition_by_name('opentrons_96_tiprack_300_ul'),
+        Location(Point(0, 0, 0), 'Test Slot'))
+    well_list = tiprack.wells()
+    tracker = tiprack.tip_tracker
+    full = tracker.snapshot()
+
+    # Only the first run of tips in a column is considered
+    well_list[2].has_tip = False
+    assert not tracker.has_tip(2)
+    assert tiprack.next_tip(2) == well_list[0]
+    assert tiprack.next_tip(3) == well_list[8]
+    tiprack.use_tips(well_list[0], num_channels=2)
+    assert tiprack.next_tip() == well_list[3]
+    assert tiprack.next_tip(5) == well_list[3]
+    assert tiprack.next_tip(6) == well_list[8]
+
+    # Tips can't be used twice
+    with pytest.raises(AssertionError):
+        tiprack.use_tips(well_list[1])
+
+    partial = tracker.snapshot()
+    for well in well_list:
+        well.has_tip = False
+    assert tiprack.next_tip() is None
+    tracker.restore(partial)
+    assert [well.has_tip for well in well_list[:4]]\
+        == [False, False, False, True]
+    assert tiprack.next_tip() == well_list[3]
+    tracker.restore(full)
+    assert all(well.has_tip for well in well_list)
+    with pytest.raises(ValueError):
+        tracker.restore(full[:-1])
+
+    # Recalibrating puts all the tips back without affecting old wells
+    tiprack.use_tips(well_list[0], num_channels=8)
+    tiprack.set_calibration(Point(1, 1, 1))
+    assert tiprack.tip_tracker is not tracker
+    assert tiprack.next_tip(8) == tiprack.wells()[0]
+    assert not well_list[0].has_tip
+
+
+def test_select_tiprack_from_list():
+    definition = labware.load_definition_by_name('opentrons_96_tiprack_300_ul')
+    first = labware.Labware(definition, Location(Point(0, 0, 0), '1'))
+    second = labware.Labware(definition, Location(Point(0, 0, 0), '2'))
+    for column in first.columns()[:-1]:
+        first.use_tips(column[0], num_channels=8)
+    first.use_tips(first.columns()[-1][0])
+
+    assert labware.select_tiprack_from_list([first, second], 1)\
+        == (first, first.columns()[-1][1])
+    assert labware.select_tiprack_from_list([first, second], 8)\
+        == (second, second.wells()[0])
+    assert labware.select_tiprack_from_list([first], 8) is None
+    assert labware.select_tiprack_from_list([], 1) is None
+
+
 def test_module_load():
     module_names = ['tempdeck', 'magdeck']
     module_defs = json.loads(
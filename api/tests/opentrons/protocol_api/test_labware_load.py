@@ -29,6 +29,15 @@ def test_load_mixed_case():
     assert dfn['parameters']['loadName'] == labware_name
 
 
+def test_loaded_definition_is_a_copy():
+    dfn = papi.labware.load_definition_by_name(labware_name)
+    dfn['parameters']['loadName'] = 'modified'
+    del dfn['wells']['A1']
+    again = papi.labware.load_definition_by_name(labware_name)
+    assert again['parameters']['loadName'] == labware_name
+    assert 'A1' in again['wells']
+
+
 def test_load_label(loop):
     ctx = papi.ProtocolContext(loop=loop)
     labware = ctx.load_labware_by_name(labware_name, '1', 'my cool labware')
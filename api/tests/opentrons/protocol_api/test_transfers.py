@@ -517,3 +517,163 @@ def test_all_options(_instr_labware):
             {'method': 'touch_tip', 'args': [], 'kwargs': {'speed': 1.6}},
             {'method': 'return_tip', 'args': [], 'kwargs': {}}]
     assert xfer_plan_list == exp1
+
+
+def test_plan_steps(_instr_labware):
+    _instr_labware['ctx'].home()
+    lw1 = _instr_labware['lw1']
+    lw2 = _instr_labware['lw2']
+
+    options = tx.TransferOptions()
+    options = options._replace(
+        transfer=options.transfer._replace(
+            new_tip=TransferTipPolicy.ALWAYS,
+            gradient_function=lambda x: x * x))
+    # Volumes past the pipette's max volume are split
+    xfer_plan = tx.TransferPlan((100, 400), lw1.columns()[0][:3],
+                                lw2.columns()[0][:3],
+                                _instr_labware['instr'], options=options)
+    steps = xfer_plan.steps
+    assert list(steps['op']) == [
+        tx.StepOp.PICK_UP_TIP, tx.StepOp.ASPIRATE, tx.StepOp.DISPENSE,
+        tx.StepOp.DROP_TIP,
+        tx.StepOp.PICK_UP_TIP, tx.StepOp.ASPIRATE, tx.StepOp.DISPENSE,
+        tx.StepOp.DROP_TIP,
+        tx.StepOp.PICK_UP_TIP, tx.StepOp.ASPIRATE, tx.StepOp.DISPENSE,
+        tx.StepOp.ASPIRATE, tx.StepOp.DISPENSE, tx.StepOp.DROP_TIP]
+    assert list(steps['volume'][[1, 5, 9, 11]]) == [100, 175, 300, 100]
+    assert [xfer_plan.locations[idx] for idx in steps['location'][[9, 12]]]\
+        == [lw1.columns()[0][2], lw2.columns()[0][2]]
+    assert len(list(xfer_plan)) == len(xfer_plan) == 14
+
+    # Dispenses are grouped by what fits in the pipette with the disposal
+    # volume, and anything too large for it gets an aspirate of its own
+    options = tx.TransferOptions()
+    options = options._replace(
+        transfer=options.transfer._replace(
+            new_tip=TransferTipPolicy.NEVER,
+            disposal_volume=20))
+    dist_plan = tx.TransferPlan([100, 150, 50, 400, 30],
+                                lw1.columns()[0][0], lw2.columns()[0][:5],
+                                _instr_labware['instr'], options=options)
+    assert [(step['method'], step['args'][0]) for step in dist_plan] == [
+        ('aspirate', 270), ('dispense', 100), ('dispense', 150),
+        ('aspirate', 70), ('dispense', 50),
+        ('aspirate', 420), ('dispense', 400),
+        ('aspirate', 50), ('dispense', 30)]
+
+
+def test_execute_plan_checks_volume(_instr_labware):
+    _instr_labware['ctx'].home()
+    lw1 = _instr_labware['lw1']
+    lw2 = _instr_labware['lw2']
+    instr = _instr_labware['instr']
+
+    options = tx.TransferOptions()
+    options = options._replace(
+        transfer=options.transfer._replace(
+            mix_strategy=tx.MixStrategy.BEFORE,
+            blow_out_strategy=tx.BlowOutStrategy.DEST_IF_EMPTY),
+        mix=options.mix._replace(
+            mix_before=options.mix.mix_before._replace(repetitions=1)))
+    # Mixes and blow outs that need an empty pipette are decided as the
+    # plan is executed
+    plan = tx.TransferPlan(100, lw1.columns()[0][0], lw2.columns()[0][:2],
+                           instr, options=options)
+    methods = []
+    for method, args, kwargs in plan.commands():
+        methods.append(method)
+        getattr(instr, method)(*args, **kwargs)
+        if method == 'pick_up_tip':
+            instr.aspirate(10, lw1.columns()[0][0])
+    assert methods == ['pick_up_tip', 'aspirate', 'dispense', 'dispense',
+                       'drop_tip']
+
+
+def test_optimize_order(_instr_labware):
+    _instr_labware['ctx'].home()
+    lw1 = _instr_labware['lw1']
+    lw2 = _instr_labware['lw2']
+    instr = _instr_labware['instr']
+
+    options = tx.TransferOptions()
+    options = options._replace(
+        transfer=options.transfer._replace(optimize_order=True))
+    # Scrambled wells in two plates: each plate's wells are visited
+    # together, each followed by the nearest one left (or the first given of
+    # those as near)
+    dests = [lw2.wells_by_index()[name]
+             for name in ['H2', 'A1', 'C1', 'A2', 'B1']]\
+        + [lw1.wells_by_index()['B1']]\
+        + [lw2.wells_by_index()[name] for name in ['B2', 'D1']]
+    volumes = [10, 20, 30, 40, 50, 60, 70, 80]
+    dist_plan = tx.TransferPlan(volumes, lw1.wells()[0], dests, instr,
+                                mode='distribute', options=options)
+    dispensed = [(step['args'][1], step['args'][0]) for step in dist_plan
+                 if step['method'] == 'dispense']
+    assert dispensed == [
+        (lw2.wells_by_index()['A1'], 20), (lw2.wells_by_index()['A2'], 40),
+        (lw2.wells_by_index()['B2'], 70), (lw2.wells_by_index()['B1'], 50),
+        (lw2.wells_by_index()['C1'], 30), (lw2.wells_by_index()['D1'], 80),
+        (lw2.wells_by_index()['H2'], 10), (lw1.wells_by_index()['B1'], 60)]
+
+    # The trips cover less ground than in the given order
+    def travel(plan):
+        points = [step['args'][1].top().point for step in plan
+                  if step['method'] in ('aspirate', 'dispense')]
+        return sum(((b.x - a.x) ** 2 + (b.y - a.y) ** 2) ** 0.5
+                   for a, b in zip(points, points[1:]))
+
+    scrambled = lw2.wells()[::7] + lw2.wells()[1::7] + lw2.wells()[2::7]
+    optimized = tx.TransferPlan(30, scrambled, lw1.wells()[0], instr,
+                                mode='consolidate', options=options)
+    plain = tx.TransferPlan(30, scrambled, lw1.wells()[0], instr,
+                            mode='consolidate')
+    assert len([s for s in optimized if s['method'] == 'dispense'])\
+        == len([s for s in plain if s['method'] == 'dispense'])
+    assert travel(optimized) < travel(plain)
+
+
+def test_multichannel_compaction(loop):
+    ctx = papi.ProtocolContext(loop)
+    ctx.home()
+    plate = ctx.load_labware_by_name('generic_96_wellplate_380_ul', 1)
+    plate384 = ctx.load_labware_by_name('corning_384_wellplate_112_ul', 2)
+    instr = ctx.load_instrument('p300_multi', Mount.RIGHT)
+
+    # Whole plates collapse into one operation per column, with a volume
+    # given for each well
+    interleaved = [well for column in plate384.columns()[:12]
+                   for well in column[::2]]
+    xfer_plan = tx.TransferPlan([50] * 48 + [100] * 48,
+                                plate.wells(), interleaved, instr)
+    assert xfer_plan.compaction == tx.Compaction(96, 12)
+    steps = [step for step in xfer_plan
+             if step['method'] in ('aspirate', 'dispense')]
+    assert [step['args'][:2] for step in steps[:4]] == [
+        [50, plate.columns()[0][0]], [50, plate384.columns()[0][0]],
+        [50, plate.columns()[1][0]], [50, plate384.columns()[1][0]]]
+    assert steps[-1]['args'][:2] == [100, plate384.columns()[11][0]]
+
+    # Every other row of a 384 well plate is reached from row A, and the
+    # rest from row B
+    dist_plan = tx.TransferPlan(20, plate.columns()[0], plate384.columns()[0],
+                                instr)
+    assert dist_plan.compaction == tx.Compaction(16, 2)
+    assert [step['args'][1] for step in dist_plan
+            if step['method'] == 'dispense']\
+        == [plate384.columns()[0][0], plate384.columns()[0][1]]
+
+    # Wells can't be handled together if they get different volumes or
+    # would need different channels
+    with pytest.raises(ValueError):
+        tx.TransferPlan(list(range(8)), plate.columns()[0],
+                        plate.columns()[1], instr)
+    with pytest.raises(ValueError):
+        tx.TransferPlan(10, plate.columns()[0],
+                        plate.columns()[1][1:] + plate.columns()[1][:1],
+                        instr)
+
+    single = ctx.load_instrument('p300_single', Mount.LEFT)
+    assert tx.TransferPlan(10, plate.columns()[0], plate.columns()[1],
+                           single).compaction == tx.Compaction(8, 8)
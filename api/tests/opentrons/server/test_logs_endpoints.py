@@ -1,8 +1,97 @@
+import asyncio
+import datetime
+import importlib
 import json
+import sys
+import types
+
+import pytest
+
 from opentrons import config
 from opentrons.server import init
 
 
+class FakeReader:
+    """ Enough of systemd.journal.Reader to read the records in ``entries``,
+    whose cursors are ``c=<n>`` with ``n`` increasing """
+    entries = []
+
+    def __init__(self, flags):
+        self._match = {}
+        self._entries = []
+        self._prev = self._next = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def add_match(self, **match):
+        self._match = match
+        self._entries = [
+            entry for entry in self.entries
+            if all(entry.get(key) == val for key, val in match.items())]
+        self.seek_tail()
+
+    def seek_tail(self):
+        self._prev = self._next = len(self._entries)
+
+    def seek_cursor(self, cursor):
+        # The next record read back is the one at the cursor, or the one
+        # before where it would be if it is gone
+        try:
+            number = int(cursor.split('=')[1])
+        except (IndexError, ValueError):
+            # As sd_journal_seek_cursor fails with EINVAL
+            raise OSError(22, 'Invalid argument')
+        self._prev = self._next = len([
+            entry for entry in self._entries
+            if int(entry['__CURSOR'].split('=')[1]) <= number])
+
+    def _read(self, index):
+        self._prev, self._next = index, index + 1
+        self._current = self._entries[index]
+        return dict(self._current)
+
+    def get_previous(self):
+        if self._prev == 0:
+            return {}
+        return self._read(self._prev - 1)
+
+    def get_next(self):
+        if self._next >= len(self._entries):
+            return {}
+        return self._read(self._next)
+
+    def test_cursor(self, cursor):
+        return self._current['__CURSOR'] == cursor
+
+
+@pytest.fixture
+def logs(monkeypatch):
+    """ The logs endpoints module, imported with a fake systemd.journal """
+    journal = types.ModuleType('systemd.journal')
+    journal.SYSTEM_ONLY = 4
+    journal.NOP = 0
+    journal.Reader = FakeReader
+    systemd = types.ModuleType('systemd')
+    systemd.journal = journal
+    monkeypatch.setitem(sys.modules, 'systemd', systemd)
+    monkeypatch.setitem(sys.modules, 'systemd.journal', journal)
+    monkeypatch.setattr(FakeReader, 'entries', [
+        {'SYSLOG_IDENTIFIER': 'opentrons-api' if idx % 4 else 'other',
+         'MESSAGE': f'message {idx}',
+         'PRIORITY': 6,
+         'LOGGER': 'opentrons.test',
+         '__REALTIME_TIMESTAMP': datetime.datetime(2019, 1, 1, 0, 0, idx),
+         '__CURSOR': f'c={idx}'}
+        for idx in range(20)])
+    sys.modules.pop('opentrons.server.endpoints.logs', None)
+    yield importlib.import_module('opentrons.server.endpoints.logs')
+    sys.modules.pop('opentrons.server.endpoints.logs', None)
+
+
 async def test_log_endpoints(
         virtual_smoothie_env, loop, test_client):
     app = init(loop)
@@ -28,3 +117,155 @@ async def test_log_endpoints(
     a1 = await cli.get('/logs/api.log')
     a1body = await a1.text()
     assert json.loads(a1body) == data2
+
+
+async def test_trace_endpoints(
+        virtual_smoothie_env, loop, test_client):
+    from opentrons.util.profiler import profiler
+    app = init(loop)
+    cli = await loop.create_task(test_client(app))
+
+    resp = await cli.post('/logs/trace', json={'enabled': True})
+    assert resp.status == 200
+    assert await resp.json() == {'enabled': True, 'events': 0}
+    assert profiler.enabled
+    with profiler.span('test', 'test'):
+        pass
+    resp = await cli.post('/logs/trace', json={'enabled': False})
+    assert await resp.json() == {'enabled': False, 'events': 1}
+
+    resp = await cli.get('/logs/trace')
+    assert resp.status == 200
+    trace = await resp.json()
+    assert [event['name'] for event in trace['traceEvents']] == ['test']
+
+    resp = await cli.post('/logs/trace', json={'enabled': 'yes'})
+    assert resp.status == 400
+    resp = await cli.post('/logs/trace', json={'clear': True})
+    assert await resp.json() == {'enabled': False, 'events': 0}
+
+
+async def test_log_stream(
+        virtual_smoothie_env, loop, test_client):
+    import logging
+    app = init(loop)
+    cli = await loop.create_task(test_client(app))
+
+    resp = await cli.get('/logs/stream', params={'level': 'bogus'})
+    assert resp.status == 400
+
+    resp = await cli.get('/logs/stream', params={'level': 'error'})
+    assert resp.status == 200
+    assert resp.headers['Content-Type'] == 'text/event-stream'
+    assert await resp.content.readline() == b': subscribed\n'
+    assert await resp.content.readline() == b'\n'
+
+    log = logging.getLogger('opentrons.test_log_stream')
+    log.warning('not severe enough')
+    log.error('streamed\nover two lines')
+    event = await resp.content.readline()
+    assert event.startswith(b'data: ')
+    record = json.loads(event[len(b'data: '):])
+    assert record['logger'] == 'opentrons.test_log_stream'
+    assert record['level_name'] == 'error'
+    assert record['message'] == 'streamed\nover two lines'
+    resp.close()
+
+    # The handler is removed once nobody is subscribed
+    from opentrons.server.endpoints.log_stream import _broadcaster
+    for _ in range(100):
+        if _broadcaster not in logging.getLogger('opentrons').handlers:
+            break
+        await asyncio.sleep(0.01)
+    else:
+        assert False, 'log stream handler was not removed'
+
+
+async def test_log_stream_drops_oldest(loop):
+    from opentrons.server.endpoints.log_stream import Subscriber
+    subscriber = Subscriber(loop, max_queued=3)
+    for i in range(5):
+        subscriber.put({'level': 6, 'message': i})
+    records, dropped = await subscriber.get()
+    assert [record['message'] for record in records] == [2, 3, 4]
+    assert dropped == 2
+    assert await subscriber.get(0.01) == ([], 0)
+
+
+def test_parse_time(logs):
+    time = datetime.datetime(2019, 1, 1, 12, 30, 15, 250000)
+    assert logs._parse_time(str(time.timestamp())) == time
+    assert logs._parse_time('2019-01-01T12:30:15.250000') == time
+    assert logs._parse_time('2019-01-01T12:30:15')\
+        == time.replace(microsecond=0)
+    with pytest.raises(ValueError):
+        logs._parse_time('yesterday')
+
+
+def test_get_options(logs):
+    assert logs._get_options({}, 15) == {
+        'format': 'json', 'records': 15, 'before': None, 'since': None}
+    assert logs._get_options({
+        'format': 'ndjson', 'records': '20', 'before': 'c=5',
+        'since': '2019-01-01T00:00:10'}, 15) == {
+            'format': 'ndjson', 'records': 20, 'before': 'c=5',
+            'since': datetime.datetime(2019, 1, 1, 0, 0, 10)}
+    # Malformed options are ignored
+    assert logs._get_options({
+        'format': 'xml', 'records': '0', 'before': '', 'since': 'never'},
+        15) == {
+            'format': 'json', 'records': 15, 'before': None, 'since': None}
+    assert logs._get_options(
+        {'records': str(logs.MAX_RECORDS + 1)}, 15)['records'] == 15
+
+
+async def test_get_records(logs):
+    async def messages(count, before=None, since=None):
+        records = await logs._get_records(
+            'opentrons-api', count, before, since)
+        return [int(record['__CURSOR'].split('=')[1]) for record in records]
+
+    # The last records, oldest first, of the identifier only
+    assert await messages(4) == [15, 17, 18, 19]
+    assert await messages(100) == [
+        idx for idx in range(20) if idx % 4]
+    # Read back from a cursor, which is not included
+    assert await messages(3, before='c=10') == [6, 7, 9]
+    # or from where the cursor's record would be, if it is not there (as
+    # the records of other identifiers are not)
+    assert await messages(3, before='c=12') == [9, 10, 11]
+    # and stop at the first record before a time
+    assert await messages(
+        100, before='c=10',
+        since=datetime.datetime(2019, 1, 1, 0, 0, 6)) == [6, 7, 9]
+    with pytest.raises(ValueError):
+        await messages(3, before='not a cursor')
+
+
+async def test_bad_cursor_is_bad_request(logs):
+    opts = logs._get_options({'before': 'not a cursor'}, 15)
+    # The cursor is checked before the response is prepared
+    resp = await logs._get_log_response(None, 'opentrons-api', opts)
+    assert resp.status == 400
+    assert json.loads(resp.text) == {
+        'message': 'Bad log cursor: not a cursor'}
+
+
+def test_format_chunks(logs, monkeypatch):
+    monkeypatch.setattr(logs, 'CHUNK_RECORDS', 2)
+    records = logs.journal.Reader.entries[:5]
+
+    chunks = list(logs._format_chunks(records, 'json'))
+    assert len(chunks) == 5
+    assert json.loads(''.join(chunks)) == [
+        logs._format_record_dict(record) for record in records]
+    assert json.loads(''.join(logs._format_chunks([], 'json'))) == []
+
+    lines = ''.join(logs._format_chunks(records, 'ndjson')).splitlines()
+    assert [json.loads(line) for line in lines] == [
+        logs._format_record_dict(record) for record in records]
+
+    text = ''.join(logs._format_chunks(records, 'text')).splitlines()
+    assert text[0] == \
+        '2019-01-01T00:00:00 opentrons.test [info]: message 0'
+    assert len(text) == 5
@@ -1,3 +1,4 @@
+import copy
 import json
 import pytest
 
@@ -113,3 +114,69 @@ def test_ordered_dict():
                 'i': id(b),
                 't': type_id(b),
                 'v': {'b': 1}}}}
+
+
+def test_patch():
+    before = {'state': 'loaded', 'steps': [1, 2], 'a/b': 1}
+    after = {'state': 'running', 'steps': [1, 2], 'new': None}
+    old, _ = serialize.get_object_tree(before)
+    new, _ = serialize.get_object_tree(after)
+
+    patch = serialize.make_field_patch(old, new)
+    assert serialize.make_field_patch(new, new) == []
+    assert patch == [
+        {'op': 'replace', 'path': '/i', 'value': new['i']},
+        {'op': 'remove', 'path': '/v/a~1b'},
+        {'op': 'replace', 'path': '/v/state', 'value': 'running'},
+        {'op': 'add', 'path': '/v/new', 'value': None}]
+    assert serialize.make_field_patch(
+        old, new, '/v/payload', skip=('state',))[1:] == [
+            {'op': 'remove', 'path': '/v/payload/v/a~1b'},
+            {'op': 'add', 'path': '/v/payload/v/new', 'value': None}]
+    assert serialize.apply_patch(copy.deepcopy(old), patch) == new
+
+    # Patches still apply once numeric keys are strings, as they are
+    # when sent as JSON
+    tree = {'i': 1, 't': 2, 'v': {0: 'a', 1: [1]}}
+    assert serialize.apply_patch(json.loads(json.dumps(tree)), [
+        {'op': 'replace', 'path': '/v/0', 'value': 'b'},
+        {'op': 'add', 'path': '/v/1/-', 'value': 2}]) == {
+            'i': 1, 't': 2, 'v': {'0': 'b', '1': [1, 2]}}
+    assert serialize.apply_patch(old, [
+        {'op': 'replace', 'path': '', 'value': 1}]) == 1
+
+
+def test_schema():
+    class Model:
+        def __init__(self):
+            self.name = 'model'
+            self.hidden = 'not sent'
+            self.child = self
+
+    class SubModel(Model):
+        pass
+
+    serialize.register_schema(Model, ('child', 'name', 'missing'))
+    for model in (Model(), SubModel()):
+        tree, refs = serialize.get_object_tree(model)
+        assert tree == {
+            'i': id(model),
+            't': type_id(model),
+            'v': {
+                'child': {'i': id(model), 't': type_id(model), 'v': None},
+                'name': 'model'}}
+        assert list(tree['v']) == ['child', 'name']
+
+
+def test_deep_tree():
+    # Deeper than the recursion limit
+    root = node = {}
+    for _ in range(5000):
+        node['child'] = {}
+        node = node['child']
+    tree, _ = serialize.get_object_tree(root)
+    depth = 0
+    while tree['v']:
+        tree = tree['v']['child']
+        depth += 1
+    assert depth == 5000
@@ -3,7 +3,8 @@ import pytest
 import sys
 import time
 
-from opentrons.server import rpc
+from opentrons.broker import Broker, RELEASE_TOPIC
+from opentrons.server import rpc, serialize
 from opentrons.protocol_api.execute import ExceptionInProtocolError
 from threading import Event
 
@@ -378,6 +379,118 @@ async def test_concurrent_calls(session, root):
     ]
 
 
+def test_object_registry():
+    registry = rpc.ObjectRegistry(max_retained=2)
+    system = rpc.SystemCalls(registry)
+    first, second, third = Foo(1), Foo(2), Foo(3)
+    registry.update({id(first): first, id(second): second})
+    assert registry[id(first)] is first
+    assert len(registry) == 3
+
+    # Beyond max_retained, the least recently registered is held weakly
+    registry.update({id(third): third})
+    assert registry.stats() == {
+        'generation': 0, 'pinned': 1, 'retained': 2, 'weak': 1,
+        'dropped': 0}
+    assert registry[id(first)] is first
+    first_id = id(first)
+    del first
+    assert first_id not in registry
+
+    # A new generation is only weakly referenced until serialized again
+    registry.release()
+    assert registry.stats()['generation'] == 1
+    assert registry.stats()['retained'] == 0
+    assert registry[id(second)] is second
+    third_id = id(third)
+    del third
+    assert third_id not in registry
+    unreferenceable = ()
+    registry.update({id(unreferenceable): unreferenceable})
+    registry.release()
+    assert id(unreferenceable) not in registry
+    assert registry.stats()['dropped'] == 1
+    assert registry[id(system)] is system
+
+
+class Router(object):
+    def __init__(self):
+        self.broker = Broker()
+
+    def init(self, loop):
+        self.notifications = Notifications(loop)
+
+
+@pytest.mark.parametrize('root', [Router()])
+async def test_release_objects(session, root):
+    result = session.server.call_and_serialize(lambda: Foo(0))
+    assert result['i'] in session.server.objects
+    generation = session.server.objects.generation
+
+    root.broker.publish(RELEASE_TOPIC, {'name': 'session'})
+    assert session.server.objects.generation == generation + 1
+    # The result is no longer held on to, so it is gone
+    assert result['i'] not in session.server.objects
+
+    session.server.shutdown()
+    root.broker.publish(RELEASE_TOPIC, {'name': 'session'})
+    assert session.server.objects.generation == generation + 1
+
+
+class Publisher(object):
+    def init(self, loop):
+        self.notifications = Notifications(loop)
+
+    def update(self, state, steps):
+        self.notifications.put({
+            'topic': 'session',
+            'payload': {'state': state, 'steps': list(range(steps))}})
+
+    def snapshot(self, value):
+        self.notifications.put({'topic': 'session', 'payload': Foo(value)})
+
+
+@pytest.mark.parametrize('root', [Publisher()])
+async def test_notification_patches(session, root, test_client):
+    client = await test_client(session.server.app)
+    patching = await client.ws_connect('/?patches=1')
+    await session.socket.receive_json()  # Skip init
+    await patching.receive_json()
+
+    root.update('loaded', 100)
+    root.update('running', 100)
+    root.snapshot('first')
+    root.snapshot('second')
+    full, patch, *snapshots = [
+        await patching.receive_json() for _ in range(4)]
+    legacy = [await session.socket.receive_json() for _ in range(4)]
+
+    # Other clients get every notification in full
+    assert [m['$'] for m in legacy] == [{'type': rpc.NOTIFICATION_MESSAGE}] * 4
+    assert full['$'] == {'type': rpc.NOTIFICATION_MESSAGE,
+                         'key': full['$']['key'], 'seq': 0}
+    assert full['data'] == legacy[0]['data']
+    # Updates are patched with just the fields that changed
+    assert patch['$'] == {'type': rpc.NOTIFICATION_MESSAGE,
+                          'key': full['$']['key'], 'seq': 1, 'patch': True}
+    assert {'op': 'replace', 'path': '/v/payload/v/state',
+            'value': 'running'} in patch['data']
+    assert not [op for op in patch['data'] if 'steps' in op['path']]
+    assert serialize.apply_patch(full['data'], patch['data'])\
+        == legacy[1]['data']
+    # and whole objects are always sent in full
+    assert [m['$'].get('patch') for m in snapshots] == [None, None]
+    assert [m['data'] for m in snapshots] == [m['data'] for m in legacy[2:]]
+
+    await patching.send_json({'$': {'resync': True}})
+    resynced = [await patching.receive_json() for _ in range(2)]
+    assert {m['$']['key']: (m['$']['seq'], m['data']) for m in resynced} == {
+        full['$']['key']: (1, legacy[1]['data']),
+        snapshots[1]['$']['key']: (1, legacy[3]['data'])}
+
+    await patching.close()
+
+
 async def call(socket, **kwargs):
     token = str(uuid())
     request = {'$': {'token': token}, **kwargs}
@@ -0,0 +1,113 @@
+import json
+import os
+import shutil
+import sys
+
+import pytest
+
+from opentrons import simulate
+from opentrons.commands.run_log import RunLog
+from opentrons.util.profiler import profiler
+
+PROTOCOL = os.path.join(os.path.dirname(__file__), 'data', 'testosaur_v2.py')
+
+
+@pytest.mark.api2_only
+def test_simulate_batch(tmpdir, monkeypatch):
+    monkeypatch.setenv('OT_API_FF_useProtocolApi2', '1')
+    tmpdir = tmpdir.mkdir('protocols')
+    shutil.copy(PROTOCOL, str(tmpdir.join('first.py')))
+    tmpdir.mkdir('nested')
+    shutil.copy(PROTOCOL, str(tmpdir.join('nested', 'second.py')))
+    tmpdir.join('broken.py').write(
+        'def run(ctx):\n    raise RuntimeError("broken")\n')
+    tmpdir.join('notes.txt').write('not a protocol')
+
+    results = list(simulate.simulate_batch([str(tmpdir)], jobs=2))
+
+    assert [os.path.relpath(r['protocol'], str(tmpdir)) for r in results]\
+        == ['broken.py', 'first.py', os.path.join('nested', 'second.py')]
+    broken, first, second = results
+    assert not broken['ok']
+    assert broken['runlog_length'] is None
+    assert broken['estimated_duration'] is None
+    assert 'broken' in broken['errors'][-1]
+    for result in (first, second):
+        assert result['ok']
+        assert result['errors'] == []
+        assert result['runlog_length'] > 0
+        assert result['estimated_duration'] > 0
+        assert result['wall_time'] > 0
+        assert result['peak_memory_kb'] > 0
+
+    globbed = list(simulate.simulate_batch([str(tmpdir.join('*.py'))]))
+    assert [r['protocol'] for r in globbed]\
+        == [str(tmpdir.join('broken.py')), str(tmpdir.join('first.py'))]
+
+    with pytest.raises(ValueError):
+        list(simulate.simulate_batch([str(tmpdir)], jobs=0))
+
+
+@pytest.mark.api2_only
+def test_simulate_to_run_log(monkeypatch):
+    monkeypatch.setenv('OT_API_FF_useProtocolApi2', '1')
+    with open(PROTOCOL) as protocol_file:
+        in_memory = simulate.simulate(protocol_file)
+    with open(PROTOCOL) as protocol_file, RunLog(window=2) as run_log:
+        streamed = simulate.simulate(protocol_file, run_log=run_log)
+        assert streamed is run_log
+        assert len(streamed) == len(in_memory)
+        assert [c['level'] for c in streamed]\
+            == [c['level'] for c in in_memory]
+        assert simulate.format_runlog(streamed)\
+            == simulate.format_runlog(in_memory)
+
+
+@pytest.mark.api2_only
+def test_simulate_estimates_duration(monkeypatch, tmpdir):
+    monkeypatch.setenv('OT_API_FF_useProtocolApi2', '1')
+    protocol = tmpdir.join('transfer.py')
+    protocol.write('''
+from opentrons import types
+
+
+def run(ctx):
+    tr = ctx.load_labware_by_name('opentrons_96_tiprack_300_ul', 1)
+    right = ctx.load_instrument('p300_single', types.Mount.RIGHT, [tr])
+    lw = ctx.load_labware_by_name('generic_96_wellplate_380_ul', 2)
+    right.transfer(100, lw.wells()[0], lw.wells()[1])
+    ctx.delay(seconds=30)
+''')
+    with open(str(protocol)) as protocol_file:
+        runlog = simulate.simulate(protocol_file)
+    transfer, *nested, delay = runlog
+    assert transfer['level'] == 0 and delay['level'] == 0
+    assert nested and all(command['level'] > 0 for command in nested)
+    assert transfer['duration']\
+        >= sum(command['duration'] for command in nested
+               if command['level'] == 1) > 0
+    assert delay['duration'] == pytest.approx(30)
+    assert delay['start'] >= transfer['start'] + transfer['duration']
+    assert simulate.estimate_duration(runlog)\
+        == delay['start'] + delay['duration']
+    assert '[30.0s]' in simulate.format_runlog(runlog)
+
+    # Streamed commands are written in order, once their durations are known
+    with open(str(protocol)) as protocol_file, RunLog(window=0) as run_log:
+        streamed = simulate.simulate(protocol_file, run_log=run_log)
+        assert [(c['start'], c['duration']) for c in streamed]\
+            == [(c['start'], c['duration']) for c in runlog]
+
+
+@pytest.mark.api2_only
+def test_simulate_trace(monkeypatch, tmpdir, capsys):
+    monkeypatch.setenv('OT_API_FF_useProtocolApi2', '1')
+    trace = str(tmpdir.join('trace.json'))
+    monkeypatch.setattr(
+        sys, 'argv', ['opentrons_simulate', '-t', trace, PROTOCOL])
+    assert simulate.main() == 0
+    with open(trace) as f:
+        events = json.load(f)['traceEvents']
+    categories = {event['cat'] for event in events}
+    assert {'command', 'hardware'} <= categories
+    assert not profiler.enabled
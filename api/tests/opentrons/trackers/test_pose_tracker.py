@@ -3,7 +3,9 @@ from opentrons.trackers.pose_tracker import (
     Point, Node, add, descendants, ascend, change_base, max_z,
     update, remove, translate, init, ROOT, has_children
 )
-from numpy import isclose, array, ndarray
+from functools import reduce
+from numpy import isclose, array, ndarray, identity
+from numpy.linalg import inv
 
 
 def scale(cx, cy, cz) -> ndarray:
@@ -150,3 +152,64 @@ def test_change_base():
         .add('1-1', parent='1', point=Point(1, 0, 0))
 
     assert isclose(change_base(state, src='1-1'), (0.5, 0, 0)).all()
+
+
+def test_update_invalidates_subtree(state):
+    # Fill the caches
+    assert (change_base(state, src='1-1-1') == (12, 14, 16)).all()
+    assert max_z(state, ROOT) == 26.0
+    assert max_z(state, '2') == -13.0
+
+    moved = update(state, '1', Point(0, 0, 100))
+    assert (change_base(moved, src='1-1-1') == (11, 12, 113)).all()
+    assert (change_base(moved, src='1-2', dst='2-1') == (33, 36, 139)).all()
+    assert max_z(moved, ROOT) == 123.0
+    assert max_z(moved, '1') == 23.0
+    assert max_z(moved, '2') == -13.0
+
+    # The tree it was derived from still has the old positions
+    assert (change_base(state, src='1-1-1') == (12, 14, 16)).all()
+    assert max_z(state, ROOT) == 26.0
+
+    # and so does a tree derived from a node that was moved and removed
+    readded = remove(moved, '1-1').add(
+        '1-1', parent='1', point=Point(0, 0, 0))
+    assert (change_base(readded, src='1-1') == (0, 0, 100)).all()
+    assert (change_base(moved, src='1-1') == (11, 12, 113)).all()
+
+
+def test_many_updates(state):
+    original = state
+    for i in range(200):
+        state = update(state, '2', Point(i, i, i))
+        assert (change_base(state, src='2-1') == (i - 11, i - 12, i - 13))\
+            .all()
+    assert {*state} == {*original}
+    assert len(state) == len(original) == 8
+    assert state['2'].children == ['2-1', '2-2']
+    assert (change_base(original, src='2-1') == (-12, -14, -16)).all()
+
+
+def test_change_base_rotated():
+    state = init() \
+        .add('1', transform=rotate(0.5)) \
+        .add('1-1', parent='1', point=Point(1, 2, 3),
+             transform=scale(2, 1, 1)) \
+        .add('1-2', parent='1', point=Point(-4, 0, 1)) \
+        .add('1-2-1', parent='1-2', transform=rotate(-1.2))
+
+    def fold(objects):
+        return reduce(lambda a, b: a.dot(b),
+                      [state[obj].transform for obj in objects], identity(4))
+
+    def reference(point, src, dst):
+        up, down = ascend(state, src), ascend(state, dst)
+        root = next(obj for obj in up if obj in down)
+        up, down = up[:up.index(root)], down[:down.index(root)][::-1]
+        return fold(down).dot(inv(fold(up)).dot((*point, 1)))[:-1]
+
+    point = Point(3, -1, 2)
+    for src, dst in [('1-1', ROOT), ('1-1', '1-2-1'), ('1-2-1', '1-1'),
+                     (ROOT, '1-2-1'), ('1-2', '1'), ('1-2-1', '1-2')]:
+        assert isclose(change_base(state, point, src, dst),
+                       reference(point, src, dst)).all()
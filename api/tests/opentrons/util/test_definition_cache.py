@@ -0,0 +1,80 @@
+import copy
+import os
+import pickle
+
+import pytest
+
+from opentrons.util import definition_cache
+
+TIPRACK = 'definitions2/opentrons_96_tiprack_300_ul.json'
+
+
+@pytest.fixture
+def clean_cache():
+    definition_cache.clear()
+    yield
+    definition_cache.clear()
+
+
+def test_frozen():
+    frozen = definition_cache.freeze({'a': [1, {'b': 2}], 'c': 'd'})
+    assert frozen == {'a': [1, {'b': 2}], 'c': 'd'}
+    with pytest.raises(TypeError):
+        frozen['c'] = 'e'
+    with pytest.raises(TypeError):
+        frozen['a'].append(3)
+    with pytest.raises(TypeError):
+        frozen['a'][1].update({'b': 3})
+
+    thawed = copy.deepcopy(frozen)
+    thawed['a'][1]['b'] = 3
+    assert type(thawed['a']) is list
+    assert frozen['a'][1]['b'] == 2
+
+    unpickled = pickle.loads(pickle.dumps(frozen))
+    assert unpickled == frozen
+    with pytest.raises(TypeError):
+        unpickled['a'].append(3)
+
+
+def test_shared_definitions(clean_cache):
+    first = definition_cache.load_shared_data(TIPRACK)
+    second = definition_cache.load_shared_data(TIPRACK)
+    assert first is second
+    assert first['parameters']['loadName'] == 'opentrons_96_tiprack_300_ul'
+    assert definition_cache._cache.hits == 1
+
+    with pytest.raises(FileNotFoundError):
+        definition_cache.load_shared_data('definitions2/not_a_labware.json')
+
+
+def test_reloaded_when_changed(clean_cache):
+    first = definition_cache.load_shared_data(TIPRACK)
+    path = os.path.join(definition_cache._SHARED_DATA_DIR, TIPRACK)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+    try:
+        second = definition_cache.load_shared_data(TIPRACK)
+    finally:
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert second is not first
+    assert second == first
+
+
+def test_lru_eviction():
+    cache = definition_cache.DefinitionCache(size=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert len(cache) == 2
+
+
+def test_index(clean_cache, monkeypatch):
+    monkeypatch.setattr(definition_cache, '_index_loaded', True)
+    monkeypatch.setattr(
+        definition_cache, '_index', {TIPRACK: {'from': 'index'}})
+    assert definition_cache.load_shared_data(TIPRACK) == {'from': 'index'}
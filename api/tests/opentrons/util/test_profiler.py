@@ -0,0 +1,71 @@
+import json
+
+from opentrons import types
+from opentrons.protocol_api import ProtocolContext
+from opentrons.util.profiler import Profiler, profiler
+
+
+def test_spans(tmpdir):
+    prof = Profiler(max_events=3)
+    with prof.span('nothing', 'test'):
+        pass
+    prof.instant('nothing', 'test')
+    assert not prof.events()
+
+    prof.enable()
+    with prof.span('outer', 'test', arg=1) as args:
+        with prof.span('inner', 'test'):
+            pass
+        args['location'] = types.Point(1, 2, 3)
+    prof.instant('mark', 'test')
+    inner, outer, mark = prof.events()
+    assert inner['name'] == 'inner' and inner['ph'] == 'X'
+    assert outer['ts'] <= inner['ts']
+    assert outer['ts'] + outer['dur'] >= inner['ts'] + inner['dur']
+    assert outer['args']['arg'] == 1
+    assert mark['ph'] == 'i'
+
+    # Only the most recent events are kept
+    with prof.span('last', 'test'):
+        pass
+    assert [e['name'] for e in prof.events()] == ['outer', 'mark', 'last']
+
+    path = str(tmpdir.join('trace.json'))
+    prof.write(path)
+    with open(path) as f:
+        exported = json.load(f)
+    assert [e['name'] for e in exported['traceEvents']]\
+        == ['outer', 'mark', 'last']
+    assert exported['traceEvents'][0]['args']['location']\
+        == str(types.Point(1, 2, 3))
+
+    prof.disable()
+    with prof.span('ignored', 'test'):
+        pass
+    assert len(prof) == 3
+    prof.enable()
+    assert not len(prof)
+
+
+def test_protocol_trace(loop):
+    ctx = ProtocolContext(loop)
+    tiprack = ctx.load_labware_by_name('opentrons_96_tiprack_300_ul', 1)
+    instr = ctx.load_instrument('p300_single', types.Mount.RIGHT, [tiprack])
+    ctx.home()
+    profiler.enable()
+    try:
+        instr.pick_up_tip()
+    finally:
+        profiler.disable()
+    events = profiler.export()['traceEvents']
+    profiler.clear()
+    by_cat = {}
+    for event in events:
+        by_cat.setdefault(event['cat'], []).append(event)
+    command, = by_cat['command']
+    assert command['name'] == 'InstrumentContext.pick_up_tip'
+    hardware = {event['name'] for event in by_cat['hardware']}
+    assert {'pick_up_tip', 'move_to', 'backend.move'} <= hardware
+    for event in by_cat['hardware']:
+        assert command['ts'] <= event['ts']
+        assert event['ts'] + event['dur'] <= command['ts'] + command['dur']
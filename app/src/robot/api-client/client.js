@@ -19,6 +19,8 @@ const RUN_TIME_TICK_INTERVAL_MS = 1000
 const NO_INTERVAL = -1
 const RE_VOLUME = /.*?(\d+).*?/
 const RE_TIPRACK = /tiprack/i
+// number of protocol commands to read from the session in each call
+const COMMANDS_PAGE_SIZE = 500
 
 export default function client(dispatch) {
   let rpcClient
@@ -400,14 +402,24 @@ export default function client(dispatch) {
     }
 
     // else we're doing a heavy full session deserialization
-    try {
-      // TODO(mc, 2017-08-30): Use a reduce
-      if (apiSession.commands) {
-        update.protocolCommands = []
-        update.protocolCommandsById = {}
-        apiSession.commands.forEach(makeHandleCommand())
-      }
+    // the most recent command id at each level, to find each one's parent
+    const parentIds = []
+
+    return getApiCommands(apiSession)
+      .then(commands => {
+        // TODO(mc, 2017-08-30): Use a reduce
+        if (commands) {
+          update.protocolCommands = []
+          update.protocolCommandsById = {}
+          commands.forEach(handleCommand)
+        }
 
+        handleSessionObjects()
+        dispatch(actions.sessionResponse(null, update))
+      })
+      .catch(error => dispatch(actions.sessionResponse(error)))
+
+    function handleSessionObjects() {
       if (apiSession.instruments) {
         update.pipettesByMount = {}
         apiSession.instruments.forEach(addApiInstrumentToPipettes)
@@ -447,30 +459,29 @@ export default function client(dispatch) {
           ['protocol-name', 'description', 'author', 'source']
         )
       }
-
-      dispatch(actions.sessionResponse(null, update))
-    } catch (error) {
-      dispatch(actions.sessionResponse(error))
     }
 
-    function makeHandleCommand(depth = 0) {
-      return function handleCommand(command) {
-        const { id, description } = command
-        const logEntry = apiSession.command_log[id]
-        const children = Array.from(command.children)
-        let handledAt = null
+    // commands come as a flat, depth-first list with the level of each one
+    function handleCommand(command) {
+      const { id, description, level } = command
+      const logEntry = apiSession.command_log[id]
+      let handledAt = null
 
-        if (logEntry != null) handledAt = logEntry
-        if (depth === 0) update.protocolCommands.push(id)
+      if (logEntry != null) handledAt = logEntry
 
-        children.forEach(makeHandleCommand(depth + 1))
+      parentIds.length = level
+      if (level === 0) {
+        update.protocolCommands.push(id)
+      } else {
+        update.protocolCommandsById[parentIds[level - 1]].children.push(id)
+      }
+      parentIds.push(id)
 
-        update.protocolCommandsById[id] = {
-          id,
-          description,
-          handledAt,
-          children: children.map(c => c.id),
-        }
+      update.protocolCommandsById[id] = {
+        id,
+        description,
+        handledAt,
+        children: [],
       }
     }
 
@@ -505,6 +516,32 @@ export default function client(dispatch) {
     }
   }
 
+  // read the session's commands a page at a time, so the robot never has to
+  // send (or hold) all of them at once
+  function getApiCommands(apiSession) {
+    const count = apiSession.command_count
+    const starts = []
+
+    if (count == null) return Promise.resolve(null)
+
+    for (let start = 0; start < count; start += COMMANDS_PAGE_SIZE) {
+      starts.push(start)
+    }
+
+    return starts.reduce(
+      (result, start) =>
+        result.then(commands =>
+          rpcClient
+            .callRemote(apiSession._id, 'get_commands', [
+              start,
+              COMMANDS_PAGE_SIZE,
+            ])
+            .then(page => commands.concat(page))
+        ),
+      Promise.resolve([])
+    )
+  }
+
   function handleRobotNotification(message) {
     const { topic, payload } = message
 
@@ -4,7 +4,7 @@ export default function MockSession() {
   return {
     name: 'MOCK SESSION',
     protocol_text: '# mock protocol text',
-    commands: [],
+    command_count: 0,
     command_log: {},
     state: 'loaded',
     instruments: [],
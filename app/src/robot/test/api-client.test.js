@@ -53,6 +53,7 @@ describe('api client', () => {
       on: jest.fn(() => rpcClient),
       removeAllListeners: jest.fn(() => rpcClient),
       close: jest.fn(),
+      callRemote: jest.fn(),
       remote: {
         session_manager: sessionManager,
         calibration_manager: calibrationManager,
@@ -358,32 +359,52 @@ describe('api client', () => {
         })
       )
 
-      session.commands = [
-        {
-          id: 0,
-          description: 'a',
-          children: [
-            {
-              id: 1,
-              description: 'b',
-              children: [
-                { id: 2, description: 'c', children: [] },
-                { id: 3, description: 'd', children: [] },
-              ],
-            },
-          ],
-        },
-        { id: 4, description: 'e', children: [] },
-      ]
+      session._id = 'session-id'
+      session.command_count = 5
       session.command_log = {
         0: 0,
         1: 1,
         2: 2,
       }
+      mockResolvedValue(rpcClient.callRemote, [
+        { id: 0, description: 'a', level: 0 },
+        { id: 1, description: 'b', level: 1 },
+        { id: 2, description: 'c', level: 2 },
+        { id: 3, description: 'd', level: 2 },
+        { id: 4, description: 'e', level: 0 },
+      ])
 
-      return sendConnect().then(() =>
+      return sendConnect().then(() => {
+        expect(rpcClient.callRemote).toHaveBeenCalledTimes(1)
+        expect(rpcClient.callRemote).toHaveBeenCalledWith(
+          'session-id',
+          'get_commands',
+          [0, 500]
+        )
         expect(dispatch).toHaveBeenCalledWith(expected)
+      })
+    })
+
+    test('reads api session commands a page at a time', () => {
+      const pages = [[{ id: 0, description: 'a', level: 0 }], []]
+
+      session.command_count = 501
+      rpcClient.callRemote.mockImplementation((id, name, [start]) =>
+        Promise.resolve(pages[start / 500])
       )
+
+      return sendConnect().then(() => {
+        expect(rpcClient.callRemote.mock.calls.map(c => c[2])).toEqual([
+          [0, 500],
+          [500, 500],
+        ])
+        expect(dispatch).toHaveBeenCalledWith(
+          actions.sessionResponse(
+            null,
+            expect.objectContaining({ protocolCommands: [0] })
+          )
+        )
+      })
     })
 
     test('maps api instruments and intruments by mount', () => {
@@ -527,8 +548,9 @@ describe('api client', () => {
     test('sends error if received malformed session from API', () => {
       const expected = actions.sessionResponse(expect.anything())
 
-      session.commands = [{ foo: 'bar' }]
+      session.command_count = 1
       session.command_log = null
+      mockResolvedValue(rpcClient.callRemote, [{ foo: 'bar' }])
 
       return sendConnect().then(() =>
         expect(dispatch).toHaveBeenCalledWith(expected)
@@ -7,6 +7,7 @@ import EventEmitter from 'events'
 import WebSocketClient from './websocket-client'
 import RemoteObject from './remote-object'
 import RemoteError from './remote-error'
+import applyPatch from './patch'
 import {
   statuses,
   RESULT,
@@ -49,6 +50,8 @@ class RpcContext extends EventEmitter {
     this._ws = ws
     this._resultTypes = new Map()
     this._typeObjectCache = new Map()
+    this._notifications = new Map()
+    this._resyncing = false
     this._pingInterval = null
     this._missedPings = 0
 
@@ -201,6 +204,36 @@ class RpcContext extends EventEmitter {
     this._ws.send(message)
   }
 
+  // notifications with a key come in full once and then as patches against
+  // the last notification with the same key; if one goes missing, drop the
+  // rest and ask the server to send them all in full again
+  _resolveNotification(meta, data) {
+    const { key, seq } = meta
+    if (key == null) return data
+
+    if (!meta.patch) {
+      this._resyncing = false
+      this._notifications.set(key, { seq, data })
+      return data
+    }
+
+    const last = this._notifications.get(key)
+
+    if (!last || seq !== last.seq + 1) {
+      if (!this._resyncing) {
+        this._resyncing = true
+        this._notifications.clear()
+        this._send({ $: { resync: true } })
+      }
+
+      return null
+    }
+
+    const next = applyPatch(last.data, data)
+    this._notifications.set(key, { seq, data: next })
+    return next
+  }
+
   _handleError(error) {
     this.emit('error', error)
   }
@@ -248,9 +281,12 @@ class RpcContext extends EventEmitter {
         break
 
       case NOTIFICATION:
-        this._cacheCallResultMetadata(data)
+        const notification = this._resolveNotification(meta, data)
+        if (!notification) break
+
+        this._cacheCallResultMetadata(notification)
 
-        RemoteObject(this, data, { methods: false }).then(remote =>
+        RemoteObject(this, notification, { methods: false }).then(remote =>
           this.emit('notification', remote)
         )
         // .catch((e) => log.error('Error creating notification remote', e))
@@ -268,7 +304,8 @@ class RpcContext extends EventEmitter {
 }
 
 export default function Client(url) {
-  const ws = new WebSocketClient(url)
+  // ask for notifications as patches against the previous ones
+  const ws = new WebSocketClient(`${url}?patches=1`)
 
   return new Promise((resolve, reject) => {
     let context
@@ -0,0 +1,46 @@
+// apply JSON patches (RFC 6902) from the RPC server to serialized notifications
+// IMPORTANT: this needs to stay in sync with apply_patch in the python server
+// only add, remove and replace are sent, and adds to arrays always append
+
+const unescapeToken = token => token.replace(/~1/g, '/').replace(/~0/g, '~')
+
+const clone = target => (Array.isArray(target) ? [...target] : { ...target })
+
+function applyOperation(tree, op) {
+  if (!op.path) return op.value
+
+  const tokens = op.path
+    .split('/')
+    .slice(1)
+    .map(unescapeToken)
+  const last = tokens.pop()
+  const root = clone(tree)
+  let target = root
+
+  // copy every container on the way down so trees that have already been
+  // handed out (e.g. to a RemoteObject still resolving) are never changed
+  tokens.forEach(token => {
+    target[token] = clone(target[token])
+    target = target[token]
+  })
+
+  if (Array.isArray(target)) {
+    if (op.op === 'add') {
+      target.push(op.value)
+    } else if (op.op === 'remove') {
+      target.splice(Number(last), 1)
+    } else {
+      target[Number(last)] = op.value
+    }
+  } else if (op.op === 'remove') {
+    delete target[last]
+  } else {
+    target[last] = op.value
+  }
+
+  return root
+}
+
+export default function applyPatch(tree, patch) {
+  return patch.reduce(applyOperation, tree)
+}
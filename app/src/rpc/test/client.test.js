@@ -348,6 +348,48 @@ describe('rpc client', () => {
     })
   })
 
+  test('applies notification patches to the previous notification', done => {
+    const FULL = { i: 32, t: 30, v: { state: 'loaded', lastCommand: null } }
+    const PATCH = [{ op: 'replace', path: '/v/state', value: 'running' }]
+    const key = 'session:30'
+    const messages = [
+      { $: { type: NOTIFICATION, key, seq: 0 }, data: FULL },
+      { $: { type: NOTIFICATION, key, seq: 1, patch: true }, data: PATCH },
+      // seq 2 never arrives, so this one is dropped
+      { $: { type: NOTIFICATION, key, seq: 3, patch: true }, data: PATCH },
+    ]
+    let resyncs = 0
+    let path
+
+    RemoteObject.mockClear()
+    addListener(wss, 'connection', (socket, request) => {
+      path = request.url
+    })
+    sendControlAndResolveRemote(message => {
+      if (message.$.resync) resyncs++
+    })
+    RemoteObject.mockImplementation(() => Promise.resolve({}))
+
+    Client(url).then(() => {
+      expect(path).toBe('/?patches=1')
+      messages.forEach(m => ws.send(m))
+
+      setTimeout(() => {
+        const notifications = RemoteObject.mock.calls.filter(
+          call => call[2] && call[2].methods === false
+        )
+
+        expect(notifications.map(call => call[1])).toEqual([
+          FULL,
+          { ...FULL, v: { ...FULL.v, state: 'running' } },
+        ])
+        expect(resyncs).toBe(1)
+        RemoteObject.mockReset()
+        done()
+      }, 50)
+    })
+  })
+
   test('closes the socket', () => {
     sendControlAndResolveRemote()
 
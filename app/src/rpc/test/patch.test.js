@@ -0,0 +1,45 @@
+// RPC notification patch tests
+import applyPatch from '../patch'
+
+describe('rpc notification patches', () => {
+  const TREE = {
+    i: 1,
+    t: 2,
+    v: { state: 'loaded', steps: [1, 2], 'a/b': { '~c': 0 } },
+  }
+
+  test('applies add, remove and replace operations', () => {
+    const patch = [
+      { op: 'replace', path: '/v/state', value: 'running' },
+      { op: 'add', path: '/v/steps/-', value: 3 },
+      { op: 'remove', path: '/v/steps/0' },
+      { op: 'replace', path: '/v/a~1b/~0c', value: 1 },
+      { op: 'add', path: '/v/lastCommand', value: null },
+    ]
+
+    expect(applyPatch(TREE, patch)).toEqual({
+      i: 1,
+      t: 2,
+      v: {
+        state: 'running',
+        steps: [2, 3],
+        'a/b': { '~c': 1 },
+        lastCommand: null,
+      },
+    })
+  })
+
+  test('replaces the whole tree for an empty path', () => {
+    expect(applyPatch(TREE, [{ op: 'replace', path: '', value: 1 }])).toBe(1)
+  })
+
+  test('leaves the tree it is given unchanged', () => {
+    const before = JSON.parse(JSON.stringify(TREE))
+    const result = applyPatch(TREE, [
+      { op: 'replace', path: '/v/state', value: 'running' },
+    ])
+
+    expect(TREE).toEqual(before)
+    expect(result.v.steps).toBe(TREE.v.steps)
+  })
+})